@@ -0,0 +1,125 @@
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+
+from .models import Course, Enrollment, WaitlistEntry
+from .schedule import schedule_conflicts
+from .seats import claim_seat, add_to_waitlist, remove_from_waitlist
+from .stats import record_enrollments
+
+# A prerequisite counts as completed once the student has been enrolled in it
+# for this many days.
+PREREQUISITE_DAYS = 119
+
+# Outcomes of admit()
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+MISSING_PREREQUISITES = 'missing_prerequisites'
+SCHEDULE_CONFLICT = 'schedule_conflict'
+WAITLISTED = 'waitlisted'
+ALREADY_WAITLISTED = 'already_waitlisted'
+FULL = 'full'
+
+Admission = namedtuple('Admission', ['status', 'enrollment', 'missing_prerequisites', 'conflicts'],
+                       defaults=((),))
+
+
+def current_term_start():
+    # enrollments younger than this are the student's current courses, older ones are completed
+    return date.today() - timedelta(days=PREREQUISITE_DAYS)
+
+
+def completed_course_ids(student):
+    cutoff = current_term_start()
+    return Enrollment.objects.filter(student=student, date_enrolled__lte=cutoff).values_list('course_id', flat=True)
+
+
+def missing_prerequisites(student, course):
+    return list(course.prerequisites.exclude(id__in=completed_course_ids(student)))
+
+
+def eligible_courses(student, courses):
+    """
+    Narrow `courses` to the ones whose prerequisites the student has all
+    completed. Anti-join against the prerequisite table: a course is dropped
+    if any of its prerequisite rows points outside the completed set, so this
+    stays a single query no matter how many courses match.
+    """
+    unmet = Course.prerequisites.through.objects \
+        .exclude(to_course_id__in=completed_course_ids(student)) \
+        .values('from_course_id')
+    return courses.exclude(id__in=unmet)
+
+
+def admit(student, course, check_prerequisites=True, enforce_seat_limit=True, check_schedule=True):
+    """
+    Single entry point for putting a student into a course.
+
+    The duplicate, prerequisite, seat and waitlist decisions all happen inside
+    one transaction. The seat itself is taken with a conditional UPDATE on
+    Course.enrolled_count (see seats.claim_seat), so two requests racing for
+    the last seat can't both succeed, and the unique (student, course)
+    constraint on Enrollment stops a double submit from enrolling twice.
+
+    Approved overrides pass check_prerequisites=False / enforce_seat_limit=False
+    / check_schedule=False.
+    """
+    with transaction.atomic():
+        if Enrollment.objects.filter(student=student, course=course).exists():
+            return Admission(ALREADY_ENROLLED, None, [])
+
+        if check_prerequisites:
+            missing = missing_prerequisites(student, course)
+            if missing:
+                return Admission(MISSING_PREREQUISITES, None, missing)
+
+        if check_schedule:
+            conflicts = schedule_conflicts(student, course, since=current_term_start())
+            if conflicts:
+                return Admission(SCHEDULE_CONFLICT, None, [], conflicts)
+
+        try:
+            with transaction.atomic():
+                if claim_seat(course, enforce_seat_limit):
+                    enrollment = Enrollment.objects.create(student=student, course=course,
+                                                           date_enrolled=date.today())
+                    record_enrollments([enrollment], instructors={course.id: course.instructor_id})
+                    remove_from_waitlist(WaitlistEntry.objects.filter(student=student, course=course))
+                    return Admission(ENROLLED, enrollment, [])
+        except IntegrityError:
+            return Admission(ALREADY_ENROLLED, None, [])
+
+        # No seat left
+        if not course.waitlist_enabled:
+            return Admission(FULL, None, [])
+        if WaitlistEntry.objects.filter(student=student, course=course).exists():
+            return Admission(ALREADY_WAITLISTED, None, [])
+        try:
+            with transaction.atomic():
+                add_to_waitlist(student, course)
+        except IntegrityError:
+            return Admission(ALREADY_WAITLISTED, None, [])
+        return Admission(WAITLISTED, None, [])
+
+
+def admission_message(admission, course):
+    """Student-facing message for the outcome of admit()."""
+    if admission.status == ENROLLED:
+        return f"🎉 You have successfully enrolled in {course.name}!"
+    if admission.status == ALREADY_ENROLLED:
+        return f"Oops! You're already enrolled in {course.name}."
+    if admission.status == MISSING_PREREQUISITES:
+        missing_titles = ", ".join([p.title for p in admission.missing_prerequisites])
+        return (
+            f"Oops! You must complete all prerequisites for {course.name} at least {PREREQUISITE_DAYS} days "
+            f"before enrolling. Missing or too recent: {missing_titles}."
+        )
+    if admission.status == SCHEDULE_CONFLICT:
+        conflict_titles = ", ".join([c.title for c in admission.conflicts])
+        return f"Oops! {course.name} meets at the same time as {conflict_titles}."
+    if admission.status == WAITLISTED:
+        return f"{course.name} is full. You have been added to the waitlist."
+    if admission.status == ALREADY_WAITLISTED:
+        return f"You are already on the waitlist for {course.name}."
+    return f"{course.name} is full, and this course does not support waitlisting."
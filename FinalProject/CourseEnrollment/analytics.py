@@ -0,0 +1,251 @@
+import math
+from collections import namedtuple
+from datetime import date, timedelta
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # only the analytics page and command need NumPy
+    np = None
+
+from .admission import current_term_start
+from .models import Course, Enrollment, Grade, WaitlistEntry
+from .stats import REPORT_ROWS, TERM_NAMES
+
+# Campus-wide analytics over columnar NumPy arrays. load_campus() reads each
+# table once, a chunk of rows at a time, into one array per column; every
+# metric below is then a handful of vectorized passes (bincount, unique,
+# cumsum) over those arrays rather than per-row Python or per-course queries.
+# Dates are held as days since 1970-01-01 and courses as dense indexes into
+# Campus.course_ids.
+
+CHUNK_SIZE = 20000
+EPOCH = date(1970, 1, 1).toordinal()
+
+# final_grade letters; anything else ('n/a', blank) is an enrollment without a grade yet
+GRADE_LETTERS = ['A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-', 'F', 'W']
+GRADE_POINTS = [4.0, 3.7, 3.3, 3.0, 2.7, 2.3, 2.0, 1.7, 1.3, 1.0, 0.7, 0.0, math.nan]
+GRADE_INDEX = {letter: i for i, letter in enumerate(GRADE_LETTERS)}
+WITHDRAWN = GRADE_INDEX['W']
+
+RETENTION_TERMS = 6
+FILL_WEEKS = 8
+TREND_WEEKS = 12
+MIN_DROP_ENROLLMENTS = 10
+
+Campus = namedtuple('Campus', [
+    'course_ids', 'course_codes', 'seat_limits',     # one entry per course
+    'student', 'course', 'day', 'grade',             # one entry per enrollment
+    'score', 'score_course',                         # one entry per assignment grade
+    'waitlist_course',                               # one entry per waitlist entry
+])
+
+
+def available():
+    return np is not None
+
+
+def load_campus(chunk_size=CHUNK_SIZE):
+    """Read courses, enrollments, assignment grades and waitlists into a Campus of arrays."""
+    courses = list(Course.objects.order_by('id').values_list('id', 'code', 'seat_limit'))
+    course_ids = np.array([row[0] for row in courses], dtype=np.int64)
+
+    student, course, day, grade = _columns(
+        Enrollment.objects.order_by().values_list('student_id', 'course_id', 'date_enrolled', 'final_grade'),
+        [(np.int64, None), (np.int64, None), (np.int32, lambda d: d.toordinal() - EPOCH),
+         (np.int8, lambda g: GRADE_INDEX.get(g, -1))],
+        chunk_size)
+    score, score_course = _columns(
+        Grade.objects.order_by().values_list('score', 'enrollment__course_id'),
+        [(np.float64, float), (np.int64, None)], chunk_size)
+    waitlist_course, = _columns(WaitlistEntry.objects.order_by().values_list('course_id'),
+                                [(np.int64, None)], chunk_size)
+
+    return Campus(
+        course_ids=course_ids,
+        course_codes=[row[1] for row in courses],
+        seat_limits=np.array([row[2] for row in courses], dtype=np.int64),
+        student=student,
+        course=np.searchsorted(course_ids, course),
+        day=day,
+        grade=grade,
+        score=score,
+        score_course=np.searchsorted(course_ids, score_course),
+        waitlist_course=np.searchsorted(course_ids, waitlist_course),
+    )
+
+
+def _columns(rows, kinds, chunk_size):
+    """One array per (dtype, converter) in `kinds`, filled from a values_list a chunk at a time."""
+    parts = [[] for _ in kinds]
+    rows = rows.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        for part, column, (dtype, convert) in zip(parts, zip(*chunk), kinds):
+            values = map(convert, column) if convert else column
+            part.append(np.fromiter(values, dtype=dtype, count=len(chunk)))
+    return [np.concatenate(part) if part else np.zeros(0, dtype=dtype) for part, (dtype, _) in zip(parts, kinds)]
+
+
+def term_index(days):
+    """Terms since 1970 (three a year, as in stats.TERM_NAMES) for an array of days."""
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return (months // 12) * 3 + (months % 12) // 4
+
+
+def term_label(index):
+    first_months = sorted(TERM_NAMES)
+    return f'{TERM_NAMES[first_months[index % 3]]} {1970 + index // 3}'
+
+
+def cohort_retention(campus, terms=RETENTION_TERMS):
+    """
+    Students grouped by the term of their first enrollment, with the share of
+    each cohort enrolled in anything 0, 1, ... terms later. Terms that haven't
+    happened yet for a cohort are None.
+    """
+    if not len(campus.student):
+        return []
+    term = term_index(campus.day)
+    low = int(term.min())
+    span = int(term.max()) - low + 1
+
+    # seen[s, t]: student s was enrolled in anything in term t (counted once however many courses)
+    seen = np.zeros((int(campus.student.max()) + 1, span), dtype=bool)
+    seen[campus.student, term - low] = True
+    seen = seen[seen.any(axis=1)]
+    first = seen.argmax(axis=1)
+    cohorts, row = np.unique(first, return_inverse=True)
+
+    counts = np.zeros((len(cohorts), terms), dtype=np.int64)
+    for k in range(terms):
+        later = first + k
+        reached = np.flatnonzero(later < span)
+        returned = reached[seen[reached, later[reached]]]
+        counts[:, k] = np.bincount(row[returned], minlength=len(cohorts))
+
+    result = []
+    for cohort, cohort_counts in zip(cohorts.tolist(), counts):
+        size = int(cohort_counts[0])
+        result.append({
+            'cohort': term_label(low + cohort),
+            'students': size,
+            'retention': [round(float(n) / size, 3) if cohort + k < span else None
+                          for k, n in enumerate(cohort_counts)],
+        })
+    return result
+
+
+def fill_rates(campus, weeks=FILL_WEEKS, since=None, limit=REPORT_ROWS):
+    """
+    For this term's enrollments (on or after `since`, by default the current
+    term start): each course's share of seats taken by the end of week 1, 2,
+    ... since the term opened, with its waitlist length. Fullest courses first.
+    """
+    start = (since or current_term_start()).toordinal() - EPOCH
+    current = campus.day >= start
+    week = np.minimum((campus.day[current] - start) // 7, weeks - 1)
+    n = len(campus.course_ids)
+    counts = np.bincount(campus.course[current] * weeks + week, minlength=n * weeks).reshape(n, weeks)
+    enrolled = counts.cumsum(axis=1)
+    curves = enrolled / np.maximum(campus.seat_limits, 1)[:, None]
+    waitlisted = np.bincount(campus.waitlist_course, minlength=n)
+
+    order = np.lexsort((np.arange(n), -curves[:, -1]))[:limit] if n else []
+    return [{
+        'course': campus.course_codes[i],
+        'seat_limit': int(campus.seat_limits[i]),
+        'enrolled': int(enrolled[i, -1]),
+        'waitlisted': int(waitlisted[i]),
+        'curve': [round(float(rate), 3) for rate in curves[i]],
+    } for i in order]
+
+
+def drop_rates(campus, min_enrollments=MIN_DROP_ENROLLMENTS, limit=REPORT_ROWS):
+    """
+    Share of each course's enrollments that ended in a withdrawal ('W').
+    Enrollments dropped during registration are deleted outright, so only
+    recorded withdrawals can be counted. Courses under `min_enrollments` are
+    left out; highest rate first.
+    """
+    n = len(campus.course_ids)
+    total = np.bincount(campus.course, minlength=n)
+    withdrawn = np.bincount(campus.course[campus.grade == WITHDRAWN], minlength=n)
+    eligible = np.flatnonzero(total >= max(min_enrollments, 1))
+    rates = withdrawn[eligible] / total[eligible]
+    order = eligible[np.lexsort((eligible, -rates))][:limit]
+    return [{
+        'course': campus.course_codes[i],
+        'enrollments': int(total[i]),
+        'withdrawn': int(withdrawn[i]),
+        'rate': round(float(withdrawn[i]) / total[i], 3),
+    } for i in order]
+
+
+def grade_distribution(campus, limit=REPORT_ROWS):
+    """
+    Campus-wide count of each final letter grade, a histogram of assignment
+    scores in bands of ten points, and each course's mean grade points (best first).
+    """
+    graded = campus.grade >= 0
+    letters = np.bincount(campus.grade[graded], minlength=len(GRADE_LETTERS))
+
+    bands = np.bincount(np.clip(campus.score // 10, 0, 9).astype(np.int64), minlength=10)
+
+    points = np.array(GRADE_POINTS)[campus.grade[graded]]
+    counted = ~np.isnan(points)
+    course = campus.course[graded][counted]
+    n = len(campus.course_ids)
+    sums = np.bincount(course, weights=points[counted], minlength=n)
+    counts = np.bincount(course, minlength=n)
+    has_grades = np.flatnonzero(counts)
+    gpa = sums[has_grades] / counts[has_grades]
+    order = has_grades[np.lexsort((has_grades, -gpa))][:limit]
+
+    return {
+        'letters': [{'grade': letter, 'count': int(count)} for letter, count in zip(GRADE_LETTERS, letters)],
+        'scores': [{'band': f'{10 * i}-{10 * i + 9 if i < 9 else 100}', 'count': int(count)}
+                   for i, count in enumerate(bands)],
+        'courses': [{'course': campus.course_codes[i], 'graded': int(counts[i]),
+                     'gpa': round(float(sums[i] / counts[i]), 2)} for i in order],
+    }
+
+
+def weekly_trend(campus, weeks=TREND_WEEKS):
+    """
+    New enrollments per Monday-to-Sunday week for the last `weeks` weeks that
+    have data, with the change from the week before (percent is None after an
+    empty week).
+    """
+    if not len(campus.day):
+        return []
+    # 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+    week = (campus.day.astype(np.int64) + 3) // 7
+    first = int(week.max()) - weeks
+    counts = np.bincount(week[week >= first] - first, minlength=weeks + 1)
+    change = np.diff(counts)
+
+    monday = date(1970, 1, 1) - timedelta(days=3)
+    return [{
+        'week': monday + timedelta(weeks=first + i + 1),
+        'enrollments': int(counts[i + 1]),
+        'change': int(change[i]),
+        'percent': round(100.0 * change[i] / counts[i], 1) if counts[i] else None,
+    } for i in range(weeks)]
+
+
+def campus_analytics(campus=None):
+    """Every metric above for one load of the campus."""
+    campus = campus if campus is not None else load_campus()
+    return {
+        'enrollments': len(campus.student),
+        'retention': cohort_retention(campus),
+        'retention_terms': list(range(RETENTION_TERMS)),
+        'fill_rates': fill_rates(campus),
+        'fill_weeks': list(range(1, FILL_WEEKS + 1)),
+        'drop_rates': drop_rates(campus),
+        'grades': grade_distribution(campus),
+        'weekly_trend': weekly_trend(campus),
+    }
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
 
 
 class CourseenrollmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'CourseEnrollment'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .duplicate_users import check_before_unique_names
+        pre_migrate.connect(check_before_unique_names, sender=self)
@@ -0,0 +1,238 @@
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .admission import PREREQUISITE_DAYS
+from .models import (MyUser, Course, Enrollment, OverrideRequest, WaitlistEntry, Grade, OfficeHourSlot,
+                     OfficeHourBooking)
+from .grading import rebuild_grades
+from .office_hours import reconcile_booking_counts
+from .prerequisites import rebuild_closure
+from .schedule import sync_meeting_blocks
+from .seats import reconcile_seat_counts
+from .stats import rebuild_enrollment_stats
+
+# Synthetic campus generator for scale tests and benchmarks (see
+# `manage.py seed_campus`). Everything is drawn from one random.Random(seed)
+# and all dates are relative to `today`, so the same arguments always produce
+# the same rows. Rows are written with bulk_create in batches; signals don't
+# fire for those, so the derived tables (meeting blocks, prerequisite
+# closure, seat counters, enrollment statistics) are rebuilt at the end.
+
+TERM_DAYS = PREREQUISITE_DAYS + 1
+TERMS_PER_YEAR = 3
+
+DEPARTMENTS = {
+    'CS': ['Programming', 'Data Structures', 'Algorithms', 'Operating Systems', 'Databases', 'Networks',
+           'Compilers', 'Machine Learning', 'Security', 'Graphics'],
+    'MATH': ['Calculus', 'Linear Algebra', 'Discrete Mathematics', 'Probability', 'Statistics', 'Topology',
+             'Number Theory', 'Real Analysis', 'Numerical Methods', 'Geometry'],
+    'PHYS': ['Mechanics', 'Electromagnetism', 'Optics', 'Thermodynamics', 'Quantum Physics', 'Astrophysics'],
+    'CHEM': ['General Chemistry', 'Organic Chemistry', 'Biochemistry', 'Physical Chemistry', 'Spectroscopy'],
+    'BIO': ['Cell Biology', 'Genetics', 'Ecology', 'Microbiology', 'Evolution', 'Physiology'],
+    'ECON': ['Microeconomics', 'Macroeconomics', 'Econometrics', 'Game Theory', 'Public Finance'],
+    'HIST': ['World History', 'Ancient Rome', 'Modern Europe', 'American History', 'History of Science'],
+    'ENG': ['Composition', 'Poetry', 'The Novel', 'Shakespeare', 'Rhetoric', 'Creative Writing'],
+}
+LEVEL_NAMES = {1: 'Introduction to', 2: 'Intermediate', 3: 'Advanced', 4: 'Topics in'}
+MEETING_PATTERNS = [
+    'MWF 8-9AM', 'MWF 9-10AM', 'MWF 10-11AM', 'MWF 11-12PM', 'MWF 1-2PM', 'MWF 2-3PM',
+    'TTh 8-9:15AM', 'TTh 9:30-10:45AM', 'TTh 11-12:15PM', 'TTh 12:30-1:45PM', 'TTh 2-3:15PM',
+    'TTh 3:30-4:45PM', 'MW 4-5:15PM', 'MW 5:30-6:45PM', 'T 6-9PM', 'W 6-9PM', 'Th 6-9PM',
+]
+SEAT_LIMITS = [15, 25, 30, 40, 60, 100, 150, 250]
+FIRST_NAMES = ['Ada', 'Alan', 'Grace', 'Edsger', 'Barbara', 'Donald', 'Frances', 'John', 'Radia', 'Ken',
+               'Margaret', 'Dennis', 'Hedy', 'Tim', 'Shafi', 'Leslie', 'Katherine', 'Niklaus', 'Lynn', 'Guido']
+LAST_NAMES = ['Lovelace', 'Turing', 'Hopper', 'Dijkstra', 'Liskov', 'Knuth', 'Allen', 'McCarthy', 'Perlman',
+              'Thompson', 'Hamilton', 'Ritchie', 'Lamarr', 'Berners-Lee', 'Goldwasser', 'Lamport', 'Johnson',
+              'Wirth', 'Conway', 'van Rossum']
+GRADES = ['A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D', 'F']
+GRADE_WEIGHTS = [18, 14, 13, 15, 10, 8, 9, 5, 4, 4]
+ASSIGNMENTS = ['Homework 1', 'Homework 2', 'Quiz 1', 'Midterm', 'Project', 'Final Exam']
+OVERRIDE_REASONS = ['Prerequisite taken at another school', 'Need this course to graduate on time',
+                    'Instructor approved over email', 'Schedule conflict is with a lab I can move']
+
+
+def generate_campus(students=5000, instructors=200, admins=5, courses=800, years=4, courses_per_term=4,
+                    grades_per_enrollment=3, slots_per_instructor=4, override_rate=0.02, seed=1,
+                    today=None, batch_size=5000, log=None):
+    """
+    Populate the database with a synthetic campus and return a dict of row
+    counts per model. Students average about 25 enrollments over 4 years, so
+    the defaults give ~120k enrollments and 40k students about a million.
+
+    `log`, if given, is called with a progress message after each table.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    log = log or (lambda message: None)
+    writer = _BatchWriter(batch_size)
+
+    with transaction.atomic():
+        MyUser.objects.bulk_create(
+            [_person(rng, f'admin{i:03d}', 'administrator') for i in range(admins)], batch_size=batch_size)
+        faculty = MyUser.objects.bulk_create(
+            [_person(rng, f'prof{i:05d}', 'instructor') for i in range(instructors)], batch_size=batch_size)
+        body = MyUser.objects.bulk_create(
+            [_person(rng, f'student{i:06d}', 'student') for i in range(students)], batch_size=batch_size)
+        log(f"users: {admins + instructors + students}")
+
+        catalog = _create_courses(rng, courses, faculty, batch_size)
+        log(f"courses: {len(catalog)}")
+
+        by_level = {}
+        for course in catalog:
+            by_level.setdefault(course.level, []).append(course)
+        current_start = today - timedelta(days=30)
+        seats_taken = {}
+
+        for student in body:
+            # how many terms the student has been here, 0 = first term
+            tenure = rng.randint(0, years * TERMS_PER_YEAR - 1)
+            taken = set()
+            for term in range(tenure, -1, -1):
+                level = min(4, 1 + (tenure - term) // TERMS_PER_YEAR)
+                choices = by_level.get(level) or catalog
+                picks = [c for c in rng.sample(choices, min(courses_per_term + 2, len(choices)))
+                         if c.id not in taken][:courses_per_term]
+                if term:
+                    enrolled_on = today - timedelta(days=term * TERM_DAYS + rng.randint(0, 20))
+                    for course in picks:
+                        taken.add(course.id)
+                        writer.add(Enrollment(student_id=student.id, course_id=course.id, date_enrolled=enrolled_on,
+                                              final_grade=rng.choices(GRADES, GRADE_WEIGHTS)[0]))
+                    continue
+                for course in picks:
+                    taken.add(course.id)
+                    if seats_taken.get(course.id, 0) < course.seat_limit:
+                        seats_taken[course.id] = seats_taken.get(course.id, 0) + 1
+                        writer.add(Enrollment(student_id=student.id, course_id=course.id, final_grade='n/a',
+                                              date_enrolled=current_start + timedelta(days=rng.randint(0, 30))))
+                    elif course.waitlist_enabled:
+                        writer.add(WaitlistEntry(student_id=student.id, course_id=course.id,
+                                                 timestamp=_moment(rng, current_start, 30)))
+            if rng.random() < override_rate:
+                writer.add(OverrideRequest(student_id=student.id, course_id=rng.choice(catalog).id,
+                                           reason=rng.choice(OVERRIDE_REASONS),
+                                           status=rng.choices(['pending', 'approved', 'denied'], [6, 3, 1])[0]))
+        writer.flush()
+        log(f"enrollments: {writer.counts.get(Enrollment, 0)}, waitlist entries: {writer.counts.get(WaitlistEntry, 0)}")
+
+        if grades_per_enrollment:
+            current = Enrollment.objects.filter(date_enrolled__gte=current_start).order_by('id') \
+                .values_list('id', flat=True)
+            for enrollment_id in current.iterator(chunk_size=batch_size):
+                for assignment in ASSIGNMENTS[:grades_per_enrollment]:
+                    writer.add(Grade(enrollment_id=enrollment_id, assignment_name=assignment,
+                                     score=Decimal(rng.randint(4000, 10000)) / 100))
+            writer.flush()
+            log(f"grades: {writer.counts.get(Grade, 0)}")
+
+        _create_office_hours(rng, writer, faculty, body, slots_per_instructor, today, batch_size)
+        log(f"office hour slots: {writer.counts.get(OfficeHourSlot, 0)}, "
+            f"bookings: {writer.counts.get(OfficeHourBooking, 0)}")
+
+        rebuild_closure()
+        sync_meeting_blocks(Course.objects.only('id', 'meeting_times'))
+        reconcile_seat_counts()
+        reconcile_booking_counts()
+        rebuild_enrollment_stats()
+        rebuild_grades()
+        log("rebuilt prerequisite closure, meeting blocks, seat counters, enrollment statistics and grades")
+
+    counts = {model.__name__: count for model, count in writer.counts.items()}
+    counts.update(MyUser=admins + instructors + students, Course=len(catalog))
+    return counts
+
+
+def _person(rng, name, role):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return MyUser(name=name, fullName=f'{first} {last}', password='pass', role=role,
+                  email=f'{name}@campus.example.edu')
+
+
+def _moment(rng, start, days):
+    moment = datetime.combine(start, time(8)) + timedelta(minutes=rng.randint(0, days * 24 * 60))
+    return timezone.make_aware(moment, timezone.get_current_timezone())
+
+
+def _create_courses(rng, count, faculty, batch_size):
+    """Courses spread over departments and levels 1-4; returns them with a `level` attribute."""
+    departments = list(DEPARTMENTS)
+    specs = []
+    for i in range(count):
+        department = departments[i % len(departments)]
+        level = 1 + (i // len(departments)) % 4
+        number = i // (len(departments) * 4)
+        topic = rng.choice(DEPARTMENTS[department])
+        specs.append((department, level, Course(
+            code=f'{department}{level}{number:02d}',
+            title=f'{LEVEL_NAMES[level]} {topic}',
+            syllabus=f'{topic}: {rng.choice(ASSIGNMENTS).lower()}s, readings and a final project.',
+            meeting_times=rng.choice(MEETING_PATTERNS),
+            seat_limit=rng.choice(SEAT_LIMITS),
+            waitlist_enabled=rng.random() < 0.8,
+            instructor=rng.choice(faculty),
+        )))
+    created = Course.objects.bulk_create([course for _, _, course in specs], batch_size=batch_size)
+
+    # prerequisites come from lower levels of the same department, so the graph is a DAG
+    lower = {}
+    Through = Course.prerequisites.through
+    edges = []
+    for (department, level, _), course in zip(specs, created):
+        course.level = level
+        candidates = [c for l in range(1, level) for c in lower.get((department, l), [])]
+        for prerequisite in rng.sample(candidates, min(len(candidates), rng.randint(0, 3))):
+            edges.append(Through(from_course_id=course.id, to_course_id=prerequisite.id))
+        lower.setdefault((department, level), []).append(course)
+    Through.objects.bulk_create(edges, batch_size=batch_size)
+    return created
+
+
+def _create_office_hours(rng, writer, faculty, body, per_instructor, today, batch_size):
+    slots = []
+    for instructor in faculty:
+        # half-hour slots on the hour or half past, so distinct starts never overlap
+        starts = set()
+        for _ in range(per_instructor):
+            day = today + timedelta(days=rng.randint(1, 14))
+            starts.add(timezone.make_aware(datetime.combine(day, time(rng.randint(9, 16), rng.choice([0, 30]))),
+                                           timezone.get_current_timezone()))
+        slots.extend(OfficeHourSlot(instructor_id=instructor.id, start_time=start,
+                                    end_time=start + timedelta(minutes=30)) for start in sorted(starts))
+    slots = OfficeHourSlot.objects.bulk_create(slots, batch_size=batch_size)
+    writer.counts[OfficeHourSlot] = len(slots)
+    if body:
+        for slot in slots:
+            if rng.random() < 0.5:
+                writer.add(OfficeHourBooking(slot_id=slot.id, student_id=rng.choice(body).id))
+    writer.flush()
+
+
+class _BatchWriter:
+    """Buffers unsaved rows per model and bulk_creates them `batch_size` at a time."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.pending = {}
+        self.counts = {}
+
+    def add(self, obj):
+        rows = self.pending.setdefault(type(obj), [])
+        rows.append(obj)
+        if len(rows) >= self.batch_size:
+            self._write(type(obj))
+
+    def flush(self):
+        for model in list(self.pending):
+            self._write(model)
+
+    def _write(self, model):
+        rows = self.pending.pop(model, [])
+        if rows:
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+            self.counts[model] = self.counts.get(model, 0) + len(rows)
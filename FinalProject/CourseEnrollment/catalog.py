@@ -0,0 +1,38 @@
+from django.shortcuts import render
+
+from .models import Course, Enrollment
+
+
+# Query layer for the course catalog page. Every row of the catalog shows the
+# instructor and the prerequisites, so we load them up front instead of letting
+# the template query once per row. Enrolled counts come from Course.enrolled_count.
+def catalog_courses():
+    return (
+        Course.objects
+        .select_related('instructor')
+        .prefetch_related('prerequisites')
+        .order_by('id')
+    )
+
+
+# Enrollments of one student with the same course data as catalog_courses().
+def student_catalog_enrollments(student):
+    return (
+        Enrollment.objects
+        .filter(student=student)
+        .select_related('course__instructor')
+        .prefetch_related('course__prerequisites')
+        .order_by('id')
+    )
+
+
+# Used by the GET and every POST branch of CourseCatalogView so the page always
+# renders with the same, fixed number of queries.
+def render_catalog(request, student, message=''):
+    return render(request, 'course_catalog.html', {
+        'message': message,
+        'courses': catalog_courses(),
+        'name': request.session.get('name'),
+        'role': request.session.get('role'),
+        'enrollments': student_catalog_enrollments(student),
+    })
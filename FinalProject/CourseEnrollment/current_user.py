@@ -0,0 +1,105 @@
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import connection
+from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+
+from .models import MyUser
+
+# The logged-in MyUser for a request, resolved from the session's user_id and
+# kept in the cache so most requests don't touch the user table at all. Only
+# CACHED_FIELDS go in the cache (never the password); the user comes back as
+# a MyUser with the other fields deferred. Keys carry the database name, so
+# the dev server, the test suite and load_test never see each other's users.
+# Edits to a user drop the cached copy (see signals.py); that only reaches
+# every worker process because settings.CACHES is a shared cache.
+
+CURRENT_USER_TIMEOUT = 300
+CACHED_FIELDS = ['id', 'name', 'fullName', 'email', 'role']
+
+
+def _cache_key(user_id):
+    return f"CourseEnrollment:current_user:{connection.settings_dict['NAME']}:{user_id}"
+
+
+def _remember(user):
+    cache.set(_cache_key(user.id), {field: getattr(user, field) for field in CACHED_FIELDS},
+              CURRENT_USER_TIMEOUT)
+
+
+def _cached_user(user_id):
+    values = cache.get(_cache_key(user_id))
+    if values is None:
+        return None
+    # from_db() wants the values in the model's field order
+    fields = [f.attname for f in MyUser._meta.concrete_fields if f.attname in values]
+    return MyUser.from_db(connection.alias, fields, [values[field] for field in fields])
+
+
+def forget_user(user_id):
+    cache.delete(_cache_key(user_id))
+
+
+def resolve_current_user(request):
+    """
+    The MyUser the session belongs to, or None. Sessions that only carry a
+    name and role (older sessions, tests) are looked up once by name and then
+    remember the user_id.
+    """
+    session = request.session
+    user_id = session.get('user_id')
+    name = session.get('name')
+    if user_id is None:
+        if not name:
+            return None
+        users = MyUser.objects.filter(name=name)
+        if session.get('role'):
+            users = users.filter(role=session['role'])
+        user = users.first()
+        if user:
+            session['user_id'] = user.id
+            _remember(user)
+        return user
+
+    user = _cached_user(user_id)
+    if user is None or user.name != name:
+        user = MyUser.objects.filter(id=user_id).first()
+        if user is None:
+            return None
+        _remember(user)
+        if name != user.name:
+            # renamed by an administrator since logging in
+            session['name'] = user.name
+    return user
+
+
+class CurrentUserMiddleware:
+    """Sets request.current_user; the user is only looked up if a view uses it."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.current_user = SimpleLazyObject(lambda: resolve_current_user(request))
+        return self.get_response(request)
+
+
+def role_required(*roles):
+    """
+    Decorator for view methods: redirect to the login page unless the session
+    is logged in as an existing user and, if roles are given, with one of
+    them. The role comes from the session; the user usually from the cache.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            session = request.session
+            if not session.get('name') or (roles and session.get('role') not in roles):
+                return redirect('login')
+            if not request.current_user:
+                # the account was deleted (or renamed away) after logging in
+                return redirect('login')
+            return view_method(self, request, *args, **kwargs)
+        return wrapper
+    return decorator
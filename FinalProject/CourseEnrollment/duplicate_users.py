@@ -0,0 +1,72 @@
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.models import Count, Min
+
+from .models import MyUser
+
+# Migration 0013 adds the unique_user_name constraint. Nothing stopped two
+# accounts sharing a name before it (only SignupView checked), and renaming an
+# account locks its owner out, so the migration never does that by itself:
+# check_before_unique_names() stops `migrate` with the list of clashes, and an
+# administrator either fixes them by hand or runs `rename_duplicate_users`.
+UNIQUE_NAMES_MIGRATION = ('CourseEnrollment', '0013_hot_lookup_indexes')
+
+
+def duplicate_names(using='default'):
+    """Shared names, oldest account first: [{'name', 'keep', 'ids'}]."""
+    users = MyUser.objects.using(using)
+    clashes = users.values('name').annotate(keep=Min('id'), total=Count('id')).filter(total__gt=1)
+    return [
+        {
+            'name': clash['name'],
+            'keep': clash['keep'],
+            'ids': list(users.filter(name=clash['name']).order_by('id').values_list('id', flat=True)),
+        }
+        for clash in clashes.order_by('name')
+    ]
+
+
+def rename_duplicates(using='default'):
+    """
+    Keep each name on its oldest account and rename the others to
+    "<name>-<id>". Returns [(user_id, old_name, new_name)] so the caller can
+    tell the renamed users their new login.
+    """
+    users = MyUser.objects.using(using)
+    max_length = MyUser._meta.get_field('name').max_length
+    taken = set(users.values_list('name', flat=True))
+    renamed = []
+    for clash in duplicate_names(using):
+        for user_id in clash['ids']:
+            if user_id == clash['keep']:
+                continue
+            suffix, n = f'-{user_id}', 1
+            new_name = clash['name'][:max_length - len(suffix)] + suffix
+            while new_name in taken:
+                suffix, n = f'-{user_id}-{n}', n + 1
+                new_name = clash['name'][:max_length - len(suffix)] + suffix
+            taken.add(new_name)
+            users.filter(id=user_id).update(name=new_name)
+            renamed.append((user_id, clash['name'], new_name))
+    return renamed
+
+
+def check_before_unique_names(plan=None, using='default', **kwargs):
+    """pre_migrate receiver: refuse to apply 0013 while names are shared."""
+    if not any(
+        (migration.app_label, migration.name) == UNIQUE_NAMES_MIGRATION and not backwards
+        for migration, backwards in plan or []
+    ):
+        return
+    connection = connections[using]
+    if MyUser._meta.db_table not in connection.introspection.table_names():
+        return
+    clashes = duplicate_names(using)
+    if clashes:
+        lines = [f"  {clash['name']!r}: user ids {', '.join(map(str, clash['ids']))}" for clash in clashes]
+        raise CommandError(
+            "Migration 0013 makes user names unique, but these names are shared:\n"
+            + "\n".join(lines)
+            + "\nRename or remove the extra accounts, or run `manage.py rename_duplicate_users` "
+            "to rename all but the oldest of each to \"<name>-<id>\", then migrate again."
+        )
@@ -0,0 +1,115 @@
+import csv
+import json
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+
+from .models import Enrollment, Grade, WaitlistEntry
+from .waitlist import with_positions
+
+# Streaming exports of the raw report data. Rows are read with
+# values_list(...).iterator(), so the database cursor is consumed a chunk at a
+# time and nothing but the current chunk is ever held in memory; the header
+# goes out before the first query runs.
+
+CHUNK_SIZE = 2000
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/jsonl'}
+
+# `rows(course, start, end)` returns the queryset for the filters (course may be
+# None, dates inclusive and optional); `columns` maps output names to fields.
+Dataset = namedtuple('Dataset', ['columns', 'rows', 'needs_course'])
+
+
+def _enrollments(course, start, end):
+    rows = Enrollment.objects.order_by('id')
+    if course is not None:
+        rows = rows.filter(course=course)
+    if start is not None:
+        rows = rows.filter(date_enrolled__gte=start)
+    if end is not None:
+        rows = rows.filter(date_enrolled__lte=end)
+    return rows
+
+
+def _roster(course, start, end):
+    return _enrollments(course, start, end).order_by('student__name')
+
+
+def _grades(course, start, end):
+    enrollments = _enrollments(course, start, end)
+    return Grade.objects.filter(enrollment__in=enrollments.values('id')).order_by('enrollment_id', 'id')
+
+
+def _waitlist(course, start, end):
+    rows = WaitlistEntry.objects.order_by('course_id', 'timestamp', 'id')
+    if course is not None:
+        rows = rows.filter(course=course)
+    if start is not None:
+        rows = rows.filter(timestamp__date__gte=start)
+    if end is not None:
+        rows = rows.filter(timestamp__date__lte=end)
+    return with_positions(rows)
+
+
+DATASETS = {
+    'enrollments': Dataset({
+        'id': 'id',
+        'student': 'student__name',
+        'student_name': 'student__fullName',
+        'course': 'course__code',
+        'date_enrolled': 'date_enrolled',
+        'final_grade': 'final_grade',
+    }, _enrollments, False),
+    'roster': Dataset({
+        'student': 'student__name',
+        'student_name': 'student__fullName',
+        'email': 'student__email',
+        'date_enrolled': 'date_enrolled',
+        'final_grade': 'final_grade',
+    }, _roster, True),
+    'grades': Dataset({
+        'student': 'enrollment__student__name',
+        'course': 'enrollment__course__code',
+        'assignment': 'assignment_name',
+        'score': 'score',
+        'feedback': 'feedback',
+        'updated_at': 'updated_at',
+    }, _grades, False),
+    'waitlist': Dataset({
+        'course': 'course__code',
+        'position': 'position',
+        'student': 'student__name',
+        'student_name': 'student__fullName',
+        'timestamp': 'timestamp',
+    }, _waitlist, False),
+}
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class _Echo:
+    # csv.writer wants a file; this one hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def export_lines(dataset, fmt, course=None, start=None, end=None):
+    """Generator of encoded-ready text lines for one export, header first."""
+    spec = DATASETS[dataset]
+    names = list(spec.columns)
+    rows = spec.rows(course, start, end).values_list(*spec.columns.values()).iterator(chunk_size=CHUNK_SIZE)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+        for row in rows:
+            yield writer.writerow([_plain(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(names, map(_plain, row)))) + '\n'
@@ -0,0 +1,152 @@
+import csv
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .grading import record_grade_changes
+from .models import Enrollment, Grade
+
+# Spreadsheet-style grading: a whole assignment column (or a CSV of scores)
+# is saved in one request. save_grades() loads the course roster and the
+# existing Grade rows for the submitted assignments in one query each, diffs
+# the submission against them, and writes only what changed with one
+# bulk_create and one bulk_update inside a transaction, then hands the
+# (old, new) scores to grading.record_grade_changes() so only the affected
+# enrollments' final scores are recomputed. Cells that fail validation are
+# returned as errors; the rest are saved.
+
+BATCH_SIZE = 500
+SCORE_STEP = Decimal('0.01')
+
+_score = Grade._meta.get_field('score')
+MAX_SCORE = Decimal(10) ** (_score.max_digits - _score.decimal_places) - SCORE_STEP
+ASSIGNMENT_LENGTH = Grade._meta.get_field('assignment_name').max_length
+
+# One submitted score. `row` identifies it in errors (a CSV line number; None
+# means use the student's name); either enrollment_id or student (a user name)
+# is set; feedback None leaves the stored feedback alone.
+Cell = namedtuple('Cell', ['row', 'enrollment_id', 'student', 'assignment', 'score', 'feedback'])
+CellError = namedtuple('CellError', ['row', 'message'])
+
+
+class GradebookResult:
+    """What one save_grades() call created, updated, left alone and rejected."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+
+
+def roster(course):
+    return Enrollment.objects.filter(course=course).select_related('student').order_by('student__name', 'id')
+
+
+def assignments(course):
+    return list(Grade.objects.filter(enrollment__course=course).order_by('assignment_name')
+                .values_list('assignment_name', flat=True).distinct())
+
+
+def assignment_column(course, assignment):
+    """(enrollment, grade or None) for every student in the course, by name."""
+    grades = {grade.enrollment_id: grade
+              for grade in Grade.objects.filter(enrollment__course=course, assignment_name=assignment)}
+    return [(enrollment, grades.get(enrollment.id)) for enrollment in roster(course)]
+
+
+def form_cells(data, assignment):
+    """Cells from the gradebook form: score_<enrollment id> and feedback_<enrollment id> fields."""
+    for key, score in data.items():
+        if not key.startswith('score_'):
+            continue
+        try:
+            enrollment_id = int(key[len('score_'):])
+        except ValueError:
+            continue
+        yield Cell(None, enrollment_id, None, assignment, score, data.get(f'feedback_{enrollment_id}'))
+
+
+def csv_cells(file, assignment=''):
+    """
+    Cells from a CSV with student (user name) and score columns, plus optional
+    feedback and assignment columns; without an assignment column every row
+    is for `assignment`. ValueError if a needed column is missing.
+    """
+    reader = csv.DictReader(file)
+    columns = reader.fieldnames or ()
+    missing = [column for column in ('student', 'score') if column not in columns]
+    if not assignment and 'assignment' not in columns:
+        missing.append('assignment')
+    if missing:
+        raise ValueError(f"The grades file is missing the column(s): {', '.join(missing)}.")
+    for row in reader:
+        yield Cell(reader.line_num, None, (row.get('student') or '').strip(),
+                   row.get('assignment') or assignment, row.get('score'),
+                   row.get('feedback') if 'feedback' in columns else None)
+
+
+def save_grades(course, cells):
+    result = GradebookResult()
+    names = dict(Enrollment.objects.filter(course=course).values_list('id', 'student__name'))
+    by_name = {name: enrollment_id for enrollment_id, name in names.items()}
+
+    submitted = {}
+    for cell in cells:
+        enrollment_id = cell.enrollment_id if cell.enrollment_id is not None else by_name.get(cell.student)
+        if enrollment_id not in names:
+            result.errors.append(CellError(cell.row or cell.student or cell.enrollment_id,
+                                           f"not enrolled in {course.code}."))
+            continue
+        row = cell.row or names[enrollment_id]
+        assignment = (cell.assignment or '').strip()
+        text = (cell.score or '').strip()
+        if not text:
+            continue  # an empty cell: nothing entered yet
+        if not assignment or len(assignment) > ASSIGNMENT_LENGTH:
+            result.errors.append(CellError(row, f"assignment must be 1-{ASSIGNMENT_LENGTH} characters."))
+            continue
+        try:
+            score = Decimal(text)
+        except InvalidOperation:
+            score = None
+        if score is None or not score.is_finite() or not 0 <= score <= MAX_SCORE:
+            result.errors.append(CellError(row, f"score must be a number from 0 to {MAX_SCORE}."))
+            continue
+        key = (enrollment_id, assignment)
+        if key in submitted:
+            result.errors.append(CellError(row, f"{names[enrollment_id]} has two scores for {assignment}."))
+            continue
+        submitted[key] = (score.quantize(SCORE_STEP), cell.feedback)
+
+    existing = {(grade.enrollment_id, grade.assignment_name): grade
+                for grade in Grade.objects.filter(enrollment__course=course,
+                                                  assignment_name__in={a for _, a in submitted})}
+    now = timezone.now()
+    new, changed, scores = [], [], []
+    for (enrollment_id, assignment), (score, feedback) in submitted.items():
+        grade = existing.get((enrollment_id, assignment))
+        if grade is None:
+            new.append(Grade(enrollment_id=enrollment_id, assignment_name=assignment, score=score,
+                             feedback=feedback or ''))
+            scores.append((enrollment_id, assignment, None, score))
+        elif grade.score != score or (feedback is not None and grade.feedback != feedback):
+            if grade.score != score:
+                scores.append((enrollment_id, assignment, grade.score, score))
+            grade.score = score
+            if feedback is not None:
+                grade.feedback = feedback
+            # bulk_update doesn't run auto_now
+            grade.updated_at = now
+            changed.append(grade)
+        else:
+            result.unchanged += 1
+
+    with transaction.atomic():
+        Grade.objects.bulk_create(new, batch_size=BATCH_SIZE)
+        Grade.objects.bulk_update(changed, ['score', 'feedback', 'updated_at'], batch_size=BATCH_SIZE)
+        record_grade_changes(course, scores)
+    result.created, result.updated = len(new), len(changed)
+    return result
@@ -0,0 +1,377 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+try:
+    import numpy as np
+except ImportError:  # recompute_course() falls back to a plain loop
+    np = None
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from .models import Assignment, CategoryScore, Enrollment, Grade, GradeCategory, StudentGPA
+
+# Weighted course scores from the Grade rows. Every enrollment keeps a
+# CategoryScore (sum and count of its scores) per category of its course, so
+# when grades change record_grade_changes() adjusts just those rows and
+# recomputes the enrollment's final score from its handful of categories; it
+# never re-reads the course's grades. When a course's categories, weights or
+# assignment mapping change, recompute_course() rebuilds the course in one
+# pass, aggregating its grades with NumPy's bincount when NumPy is installed;
+# rebuild_grades() does the same for every course at once.
+#
+# The final score is the weight-averaged mean score of each category that has
+# grades (weights are renormalized over those), or the plain mean of all
+# scores for a course without categories. It is stored as
+# Enrollment.final_score/score_letter; post_final_grades() copies the letters
+# into the official final_grade, from which each student's GPA is cached.
+
+SCORE_STEP = Decimal('0.01')
+LETTER_CUTOFFS = [(93, 'A'), (90, 'A-'), (87, 'B+'), (83, 'B'), (80, 'B-'), (77, 'C+'), (73, 'C'), (70, 'C-'),
+                  (67, 'D+'), (63, 'D'), (60, 'D-'), (0, 'F')]
+GRADE_POINTS = {'A': Decimal('4.0'), 'A-': Decimal('3.7'), 'B+': Decimal('3.3'), 'B': Decimal('3.0'),
+                'B-': Decimal('2.7'), 'C+': Decimal('2.3'), 'C': Decimal('2.0'), 'C-': Decimal('1.7'),
+                'D+': Decimal('1.3'), 'D': Decimal('1.0'), 'D-': Decimal('0.7'), 'F': Decimal('0.0')}
+
+
+def letter_for(score):
+    if score is None:
+        return ''
+    return next(letter for cutoff, letter in LETTER_CUTOFFS if score >= cutoff)
+
+
+def final_score(totals, weights):
+    """
+    Final score from {category id or None: (total, count)} for one enrollment,
+    given {category id: weight} for its course (empty: no categories).
+    """
+    if weights:
+        used = [(weights[category], total / count) for category, (total, count) in totals.items()
+                if count and weights.get(category)]
+        weight = sum(w for w, _ in used)
+        if not weight:
+            return None
+        score = sum(w * mean for w, mean in used) / weight
+    else:
+        count = sum(n for _, n in totals.values())
+        if not count:
+            return None
+        score = sum(total for total, _ in totals.values()) / count
+    return score.quantize(SCORE_STEP, rounding=ROUND_HALF_UP)
+
+
+def scheme(course):
+    """({category id: weight}, {assignment name: category id}) for the course."""
+    weights = dict(GradeCategory.objects.filter(course=course).values_list('id', 'weight'))
+    categories = dict(Assignment.objects.filter(course=course, category__isnull=False)
+                      .values_list('name', 'category_id')) if weights else {}
+    return weights, categories
+
+
+def record_grade_changes(course, changes):
+    """
+    Keep the course's scores current after Grade rows changed. `changes` are
+    (enrollment id, assignment name, old score, new score) with None for a
+    score that didn't exist before or doesn't any more.
+    """
+    weights, categories = scheme(course)
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for enrollment_id, assignment, old, new in changes:
+        delta = deltas[enrollment_id, categories.get(assignment)]
+        if old is not None:
+            delta[0] -= old
+            delta[1] -= 1
+        if new is not None:
+            delta[0] += new
+            delta[1] += 1
+    if not deltas:
+        return
+
+    enrollment_ids = {enrollment_id for enrollment_id, _ in deltas}
+    with transaction.atomic(savepoint=False):
+        rows = {(row.enrollment_id, row.category_id): row for row in
+                CategoryScore.objects.select_for_update().filter(enrollment_id__in=enrollment_ids)}
+        new_rows, changed = [], []
+        for key, (total, count) in deltas.items():
+            if not total and not count:
+                continue
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = CategoryScore(enrollment_id=key[0], category_id=key[1])
+                new_rows.append(row)
+            else:
+                changed.append(row)
+            row.total += total
+            row.count = max(row.count + count, 0)
+        CategoryScore.objects.bulk_create(new_rows)
+        CategoryScore.objects.bulk_update(changed, ['total', 'count'])
+
+        totals = defaultdict(dict)
+        for (enrollment_id, category_id), row in rows.items():
+            totals[enrollment_id][category_id] = (row.total, row.count)
+        _set_scores({enrollment_id: final_score(totals[enrollment_id], weights)
+                     for enrollment_id in enrollment_ids})
+
+
+def recompute_course(course):
+    """Rebuild every enrollment's category totals and score in the course, e.g. after its weights changed."""
+    weights, categories = scheme(course)
+    enrollment_ids = list(Enrollment.objects.filter(course=course).order_by('id').values_list('id', flat=True))
+    grades = Grade.objects.filter(enrollment__course=course).values_list('enrollment_id', 'assignment_name', 'score')
+    totals = _course_totals(enrollment_ids, grades, categories)
+
+    with transaction.atomic():
+        CategoryScore.objects.filter(enrollment__course=course).delete()
+        CategoryScore.objects.bulk_create([
+            CategoryScore(enrollment_id=enrollment_id, category_id=category_id, total=total, count=count)
+            for enrollment_id, by_category in totals.items()
+            for category_id, (total, count) in by_category.items()
+        ], batch_size=1000)
+        _set_scores({enrollment_id: final_score(totals.get(enrollment_id, {}), weights)
+                     for enrollment_id in enrollment_ids})
+
+
+def _course_totals(enrollment_ids, grades, categories):
+    """{enrollment id: {category id: (total, count)}} for the enrollments that have grades."""
+    if np is None or not enrollment_ids:
+        totals = defaultdict(lambda: defaultdict(lambda: [Decimal(0), 0]))
+        for enrollment_id, assignment, score in grades:
+            cell = totals[enrollment_id][categories.get(assignment)]
+            cell[0] += score
+            cell[1] += 1
+        return {e: {c: tuple(cell) for c, cell in by_category.items()} for e, by_category in totals.items()}
+
+    rows = list(grades)
+    if not rows:
+        return {}
+    columns = [None] + sorted(set(categories.values()))
+    column_of = {category_id: i for i, category_id in enumerate(columns)}
+    ids = np.array(enrollment_ids, dtype=np.int64)
+    enrollment, assignment, score = zip(*rows)
+    names, name_index = np.unique(np.array(assignment, dtype=object), return_inverse=True)
+    name_column = np.array([column_of[categories.get(name)] for name in names], dtype=np.int64)
+    # scores have two decimal places, so summing them as integer cents is exact
+    cents = np.fromiter((int(s * 100) for s in score), dtype=np.int64, count=len(rows))
+    cell = np.searchsorted(ids, np.array(enrollment, dtype=np.int64)) * len(columns) + name_column[name_index]
+    size = len(ids) * len(columns)
+    sums = np.bincount(cell, weights=cents, minlength=size).round().astype(np.int64).reshape(len(ids), -1)
+    counts = np.bincount(cell, minlength=size).reshape(len(ids), -1)
+
+    totals = {}
+    for row, column in zip(*np.nonzero(counts)):
+        totals.setdefault(int(ids[row]), {})[columns[column]] = (
+            Decimal(int(sums[row, column])) / 100, int(counts[row, column]))
+    return totals
+
+
+def _set_scores(scores, enrollments=None):
+    """
+    Store {enrollment id: final score or None} and its letter, writing only
+    enrollments that changed. `enrollments` (default: the ones in `scores`)
+    may include others, which lose any score they had.
+    """
+    if enrollments is None:
+        enrollments = Enrollment.objects.filter(id__in=list(scores))
+    changed = []
+    for enrollment in enrollments.only('id', 'final_score', 'score_letter').iterator(chunk_size=5000):
+        score = scores.get(enrollment.id)
+        letter = letter_for(score)
+        if enrollment.final_score != score or enrollment.score_letter != letter:
+            enrollment.final_score, enrollment.score_letter = score, letter
+            changed.append(enrollment)
+    if not changed:
+        return
+    # one prepared UPDATE run for every changed row: with thousands of rows
+    # (rebuild_grades() on a new campus) bulk_update()'s CASE expressions
+    # take far longer to build than the writes themselves
+    table = connection.ops.quote_name(Enrollment._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'UPDATE {table} SET final_score = %s, score_letter = %s WHERE id = %s',
+                           [(e.final_score, e.score_letter, e.id) for e in changed])
+
+
+def post_final_grades(course):
+    """Make each scored enrollment's letter its official final grade (withdrawals stay 'W'); returns how many changed."""
+    enrollments = list(Enrollment.objects.filter(course=course).exclude(score_letter='').exclude(final_grade='W')
+                       .only('id', 'student_id', 'final_grade', 'score_letter'))
+    changed = [e for e in enrollments if e.final_grade != e.score_letter]
+    letters = [(e.student_id, e.final_grade, e.score_letter) for e in changed]
+    for enrollment in changed:
+        enrollment.final_grade = enrollment.score_letter
+    with transaction.atomic():
+        Enrollment.objects.bulk_update(changed, ['final_grade'], batch_size=1000)
+        record_letters(letters)
+    return len(changed)
+
+
+def record_letters(changes):
+    """
+    Keep the cached GPAs current: `changes` are (student id, old final_grade,
+    new final_grade); anything not in GRADE_POINTS ('n/a', 'W', None) doesn't count.
+    """
+    deltas = defaultdict(lambda: [Decimal(0), 0])
+    for student_id, old, new in changes:
+        if old in GRADE_POINTS:
+            deltas[student_id][0] -= GRADE_POINTS[old]
+            deltas[student_id][1] -= 1
+        if new in GRADE_POINTS:
+            deltas[student_id][0] += GRADE_POINTS[new]
+            deltas[student_id][1] += 1
+    deltas = {student_id: delta for student_id, delta in deltas.items() if delta[1] or delta[0]}
+    if not deltas:
+        return
+    with transaction.atomic(savepoint=False):
+        rows = StudentGPA.objects.select_for_update().in_bulk(list(deltas))
+        new_rows = []
+        for student_id, (points, courses) in deltas.items():
+            row = rows.get(student_id)
+            if row is None:
+                row = StudentGPA(student_id=student_id)
+                new_rows.append(row)
+            # never go below zero if the cache had already drifted
+            row.grade_points = max(row.grade_points + points, Decimal(0))
+            row.courses = max(row.courses + courses, 0)
+        StudentGPA.objects.bulk_create(new_rows)
+        StudentGPA.objects.bulk_update([rows[s] for s in deltas if s in rows], ['grade_points', 'courses'])
+
+
+def record_letter_removal(enrollments):
+    """Count an Enrollment queryset's final grades out of the GPAs; call before deleting it."""
+    record_letters((student_id, grade, None) for student_id, grade in
+                   enrollments.filter(final_grade__in=list(GRADE_POINTS)).values_list('student_id', 'final_grade'))
+
+
+def student_gpa(student):
+    row = StudentGPA.objects.filter(student=student).first()
+    return row.gpa if row else None
+
+
+def rebuild_gpa():
+    points, courses = defaultdict(Decimal), defaultdict(int)
+    # the database counts each student's letters, so this reads a few rows per student
+    for student_id, grade, count in Enrollment.objects.filter(final_grade__in=list(GRADE_POINTS)).order_by() \
+            .values_list('student_id', 'final_grade').annotate(count=Count('id')).iterator(chunk_size=5000):
+        points[student_id] += GRADE_POINTS[grade] * count
+        courses[student_id] += count
+    with transaction.atomic():
+        StudentGPA.objects.all().delete()
+        StudentGPA.objects.bulk_create([StudentGPA(student_id=student_id, grade_points=total,
+                                                   courses=courses[student_id])
+                                        for student_id, total in points.items()], batch_size=1000)
+
+
+def rebuild_grades():
+    """
+    Recompute every course's scores and every GPA (backfills, repairs after
+    cascades, seeded campuses). Gives what recompute_course() on each course
+    would, but reads the schemes and grades of all courses in three queries.
+    """
+    weights, categories = defaultdict(dict), defaultdict(dict)
+    for course_id, category_id, weight in GradeCategory.objects.values_list('course_id', 'id', 'weight'):
+        weights[course_id][category_id] = weight
+    for course_id, name, category_id in Assignment.objects.filter(category__isnull=False) \
+            .values_list('course_id', 'name', 'category_id'):
+        categories[course_id][name] = category_id
+    by_course = defaultdict(list)
+    for course_id, *grade in Grade.objects.order_by('enrollment_id') \
+            .values_list('enrollment__course_id', 'enrollment_id', 'assignment_name', 'score') \
+            .iterator(chunk_size=5000):
+        by_course[course_id].append(grade)
+
+    totals, scores = {}, {}
+    for course_id, grades in by_course.items():
+        course_weights = weights.get(course_id, {})
+        enrollment_ids = sorted({enrollment_id for enrollment_id, _, _ in grades})
+        course_totals = _course_totals(enrollment_ids, grades, categories[course_id] if course_weights else {})
+        totals.update(course_totals)
+        scores.update((enrollment_id, final_score(by_category, course_weights))
+                      for enrollment_id, by_category in course_totals.items())
+
+    with transaction.atomic():
+        CategoryScore.objects.all().delete()
+        CategoryScore.objects.bulk_create([
+            CategoryScore(enrollment_id=enrollment_id, category_id=category_id, total=total, count=count)
+            for enrollment_id, by_category in totals.items()
+            for category_id, (total, count) in by_category.items()
+        ], batch_size=1000)
+        # enrollments without grades only need writing if they still carry a score
+        _set_scores(scores, Enrollment.objects.filter(
+            Q(id__in=Grade.objects.values('enrollment_id')) | Q(final_score__isnull=False)))
+        rebuild_gpa()
+
+
+def scheme_rows(course):
+    """(categories, [(assignment name, category id or None)]) for the grading scheme page."""
+    categories = list(GradeCategory.objects.filter(course=course).order_by('name'))
+    mapped = dict(Assignment.objects.filter(course=course).values_list('name', 'category_id'))
+    graded = Grade.objects.filter(enrollment__course=course).values_list('assignment_name', flat=True).distinct()
+    names = sorted(set(mapped) | set(graded))
+    return categories, [(name, mapped.get(name)) for name in names]
+
+
+def save_scheme(course, categories, mapping):
+    """
+    Replace the course's grading scheme and recompute its scores. `categories`
+    are (id or None for a new one, name, weight text, delete) and `mapping` is
+    {assignment name: category id or None}. Returns a list of problems; with
+    any, nothing is saved.
+    """
+    existing = GradeCategory.objects.filter(course=course).in_bulk()
+    name_length = GradeCategory._meta.get_field('name').max_length
+    weight_field = GradeCategory._meta.get_field('weight')
+    max_weight = Decimal(10) ** (weight_field.max_digits - weight_field.decimal_places) - SCORE_STEP
+    problems, keep, names = [], [], set()
+    for category_id, name, weight, delete in categories:
+        if category_id is not None and category_id not in existing:
+            continue
+        name = name.strip()
+        if delete or (category_id is None and not name):
+            continue
+        if not name or len(name) > name_length:
+            problems.append(f"category names must be 1-{name_length} characters.")
+            continue
+        if name in names:
+            problems.append(f"there are two categories called {name}.")
+            continue
+        names.add(name)
+        try:
+            weight = Decimal(weight.strip())
+        except InvalidOperation:
+            weight = None
+        if weight is None or not weight.is_finite() or not 0 <= weight <= max_weight:
+            problems.append(f"the weight of {name} must be a number from 0 to {max_weight}.")
+            continue
+        keep.append((category_id, name, weight.quantize(SCORE_STEP)))
+    if problems:
+        return problems
+
+    kept_ids = {category_id for category_id, _, _ in keep if category_id is not None}
+    with transaction.atomic():
+        GradeCategory.objects.filter(id__in=set(existing) - kept_ids).delete()
+        changed = []
+        for category_id, name, weight in keep:
+            if category_id is not None:
+                category = existing[category_id]
+                category.name, category.weight = name, weight
+                changed.append(category)
+        # renames may swap two names, which the unique constraint would reject
+        # part way through one update, so park them on placeholders first
+        GradeCategory.objects.bulk_update([GradeCategory(id=c.id, name=f'#{c.id}') for c in changed], ['name'])
+        GradeCategory.objects.bulk_update(changed, ['name', 'weight'])
+        GradeCategory.objects.bulk_create([GradeCategory(course=course, name=name, weight=weight)
+                                           for category_id, name, weight in keep if category_id is None])
+
+        assignments = {a.name: a for a in Assignment.objects.filter(course=course, name__in=list(mapping))}
+        new_assignments, remapped = [], []
+        for name, category_id in mapping.items():
+            category_id = category_id if category_id in kept_ids else None
+            assignment = assignments.get(name)
+            if assignment is None:
+                new_assignments.append(Assignment(course=course, name=name, category_id=category_id))
+            elif assignment.category_id != category_id:
+                assignment.category_id = category_id
+                remapped.append(assignment)
+        Assignment.objects.bulk_create(new_assignments)
+        Assignment.objects.bulk_update(remapped, ['category'])
+        recompute_course(course)
+    return []
@@ -0,0 +1,87 @@
+from collections import namedtuple
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q
+
+from .admission import current_term_start
+from .grading import record_letters
+from .models import Enrollment
+from .stats import move_enrollments
+
+# A student's enrollment history as the administrator pages show it, and the
+# bulk edit path behind the edit-enrollments form. Edits are loaded with one
+# in_bulk query (together with the rest of the student's history), only the
+# rows whose values changed are written, with one bulk_update, and the page
+# is then rendered from the same fetched rows instead of querying again.
+
+EnrollmentEdits = namedtuple('EnrollmentEdits', ['enrollments', 'changed', 'errors'])
+
+
+def split_history(enrollments, cutoff=None):
+    """(current, past) lists: enrolled since the current term started, and before."""
+    cutoff = cutoff or current_term_start()
+    current, past = [], []
+    for enrollment in enrollments:
+        (current if enrollment.date_enrolled >= cutoff else past).append(enrollment)
+    return current, past
+
+
+def student_history(student):
+    return split_history(Enrollment.objects.filter(student=student).select_related('course__instructor')
+                         .order_by('id'))
+
+
+def edits_from_post(data):
+    """
+    {enrollment id: (final grade, date text)} from grade_<id> and date_<id>
+    fields; a field that wasn't submitted is None, meaning leave it alone.
+    """
+    edits = {}
+    for key in data:
+        prefix, _, enrollment_id = key.partition('_')
+        if prefix in ('grade', 'date') and enrollment_id.isdigit():
+            edits[int(enrollment_id)] = (data.get(f'grade_{enrollment_id}'), data.get(f'date_{enrollment_id}'))
+    return edits
+
+
+def apply_enrollment_edits(edits, student=None):
+    """
+    Apply edits from edits_from_post(). Returns the fetched enrollments (the
+    edited ones plus, with `student`, the rest of that student's history) by
+    id, the ones that changed, and a message for every date that didn't parse.
+    """
+    rows = Q(id__in=edits)
+    if student is not None:
+        rows |= Q(student=student)
+    enrollments = Enrollment.objects.filter(rows).select_related('course__instructor').order_by('id').in_bulk()
+
+    changed, moves, letters, errors = [], [], [], []
+    for enrollment_id, (grade, date_text) in edits.items():
+        enrollment = enrollments.get(enrollment_id)
+        if enrollment is None:
+            continue
+        dirty = False
+        if grade is not None and (grade or None) != enrollment.final_grade:
+            letters.append((enrollment.student_id, enrollment.final_grade, grade or None))
+            enrollment.final_grade = grade or None
+            dirty = True
+        if date_text:
+            try:
+                new_date = datetime.strptime(date_text, '%Y-%m-%d').date()
+            except ValueError:
+                errors.append(f"{enrollment.course.code}: {date_text} is not a date (YYYY-MM-DD).")
+                new_date = enrollment.date_enrolled
+            if new_date != enrollment.date_enrolled:
+                moves.append((enrollment, enrollment.date_enrolled))
+                enrollment.date_enrolled = new_date
+                dirty = True
+        if dirty:
+            changed.append(enrollment)
+
+    if changed:
+        with transaction.atomic():
+            Enrollment.objects.bulk_update(changed, ['final_grade', 'date_enrolled'], batch_size=500)
+            move_enrollments(moves, {e.course_id: e.course.instructor_id for e, _ in moves})
+            record_letters(letters)
+    return EnrollmentEdits(enrollments, changed, errors)
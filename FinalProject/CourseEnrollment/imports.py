@@ -0,0 +1,307 @@
+import csv
+import re
+from collections import Counter, namedtuple
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import prerequisites
+from .grading import record_letters
+from .models import MyUser, Course, Enrollment
+from .schedule import sync_meeting_blocks
+from .stats import apply_changes, month_of
+
+# Bulk CSV import of users, courses and enrollments (the admin import page and
+# `manage.py import_users|import_courses|import_enrollments`). The file is
+# read row by row with csv.DictReader; each row is validated on its own and
+# bad rows are reported by line number while the good ones are written with
+# bulk_create, BATCH_SIZE at a time, all inside one transaction. Names and
+# codes are resolved against dicts loaded once up front, not looked up per
+# row. bulk_create skips signals and the seat/statistics helpers, so each
+# importer updates the derived data (meeting blocks, prerequisite closure,
+# seat counters, enrollment statistics, GPAs) for what it wrote.
+
+BATCH_SIZE = 5000
+MAX_ERRORS = 1000  # errors kept for the report; the rest are only counted
+
+ROLES = ('student', 'instructor', 'administrator', 'advisor')
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+COLUMNS = {
+    'users': (('name', 'password', 'role'), ('full_name', 'email')),
+    'courses': (('code', 'title', 'seat_limit', 'instructor'),
+                ('syllabus', 'meeting_times', 'waitlist_enabled', 'prerequisites')),
+    'enrollments': (('student', 'course'), ('date_enrolled', 'final_grade')),
+}
+
+RowError = namedtuple('RowError', ['line', 'message'])
+
+
+class ImportResult:
+    """Rows written and rows rejected by one import."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(RowError(line, message))
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+def _rows(file, kind):
+    """(line number, row) for each data row, values stripped; ValueError if a required column is missing."""
+    required, optional = COLUMNS[kind]
+    reader = csv.DictReader(file)
+    missing = [column for column in required if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"The {kind} file is missing the column(s): {', '.join(missing)}.")
+    for row in reader:
+        yield reader.line_num, {column: (row.get(column) or '').strip() for column in required + optional}
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def run_import(kind, file, batch_size=BATCH_SIZE, dry_run=False):
+    """Import one CSV file of the given kind; with dry_run everything is validated and rolled back."""
+    importer = IMPORTERS[kind]
+    with transaction.atomic():
+        result = importer(_rows(file, kind), batch_size)
+        if dry_run:
+            transaction.set_rollback(True)
+    # rows are checked in several passes per batch; report them in file order
+    result.errors.sort()
+    return result
+
+
+def import_users(rows, batch_size=BATCH_SIZE):
+    result = ImportResult()
+    seen = set()
+    name_length = _max_length(MyUser, 'name')
+
+    def parse(row):
+        if not row['name'] or len(row['name']) > name_length:
+            return f"name must be 1-{name_length} characters."
+        if row['name'] in seen:
+            return f"{row['name']} appears earlier in the file."
+        if row['role'] not in ROLES:
+            return f"role must be one of {', '.join(ROLES)}."
+        if not row['password']:
+            return "password is required."
+        if row['email']:
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                return f"{row['email']} is not a valid email address."
+        return None
+
+    for batch in _batches(rows, batch_size):
+        accepted = []
+        for line, row in batch:
+            problem = parse(row)
+            if problem:
+                result.error(line, problem)
+                continue
+            seen.add(row['name'])
+            accepted.append((line, row))
+        taken = set(MyUser.objects.filter(name__in=[row['name'] for _, row in accepted])
+                    .values_list('name', flat=True))
+        users = []
+        for line, row in accepted:
+            if row['name'] in taken:
+                result.error(line, f"{row['name']} is already taken.")
+                continue
+            users.append(MyUser(name=row['name'], fullName=row['full_name'], email=row['email'],
+                                password=row['password'], role=row['role']))
+        MyUser.objects.bulk_create(users, batch_size=batch_size)
+        result.created += len(users)
+    return result
+
+
+def import_courses(rows, batch_size=BATCH_SIZE):
+    """
+    Courses with their instructor (by user name, created like the add-course
+    page does if unknown) and prerequisites (course codes separated by spaces,
+    commas or semicolons). A prerequisite must already exist or be a course
+    on an earlier line, which also keeps the imported graph acyclic.
+    """
+    result = ImportResult()
+    code_ids = dict(Course.objects.values_list('code', 'id'))
+    instructor_ids = dict(MyUser.objects.filter(role='instructor').values_list('name', 'id'))
+    requested = set()  # codes of rows accepted so far, before they have ids
+    code_length = _max_length(Course, 'code')
+    title_length = _max_length(Course, 'title')
+    created_ids = []
+
+    def parse(row):
+        if not row['code'] or len(row['code']) > code_length:
+            return f"code must be 1-{code_length} characters."
+        if row['code'] in code_ids or row['code'] in requested:
+            return f"{row['code']} is already in use."
+        if not row['title'] or len(row['title']) > title_length:
+            return f"title must be 1-{title_length} characters."
+        try:
+            row['seat_limit'] = int(row['seat_limit'])
+        except ValueError:
+            row['seat_limit'] = 0
+        if row['seat_limit'] <= 0:
+            return "seat_limit must be a whole number of one or more."
+        if not row['instructor']:
+            return "instructor is required."
+        waitlist = row['waitlist_enabled'].lower()
+        if waitlist and waitlist not in TRUE_VALUES | FALSE_VALUES:
+            return "waitlist_enabled must be yes or no."
+        row['waitlist_enabled'] = waitlist not in FALSE_VALUES
+        row['prerequisites'] = [code for code in dict.fromkeys(re.split(r'[\s,;]+', row['prerequisites'])) if code]
+        unknown = [code for code in row['prerequisites'] if code not in code_ids and code not in requested]
+        if unknown:
+            return f"unknown prerequisite(s) {', '.join(unknown)} (list prerequisites before the courses needing them)."
+        return None
+
+    for batch in _batches(rows, batch_size):
+        accepted = []
+        for line, row in batch:
+            problem = parse(row)
+            if problem:
+                result.error(line, problem)
+                continue
+            requested.add(row['code'])
+            accepted.append((line, row))
+
+        # instructors nobody has heard of are created; a name held by a non-instructor is an error
+        new_names = {row['instructor'] for _, row in accepted} - set(instructor_ids)
+        conflicts = set(MyUser.objects.filter(name__in=new_names).values_list('name', flat=True))
+        created = MyUser.objects.bulk_create(
+            [MyUser(name=name, password='pass', role='instructor') for name in sorted(new_names - conflicts)],
+            batch_size=batch_size)
+        instructor_ids.update((user.name, user.id) for user in created)
+
+        courses, edges, ok = [], [], set()
+        for line, row in accepted:
+            problem = None
+            if row['instructor'] in conflicts:
+                problem = f"{row['instructor']} is a user but not an instructor."
+            else:
+                missing = [code for code in row['prerequisites'] if code not in code_ids and code not in ok]
+                if missing:
+                    problem = f"prerequisite(s) {', '.join(missing)} could not be imported."
+            if problem:
+                requested.discard(row['code'])
+                result.error(line, problem)
+                continue
+            ok.add(row['code'])
+            courses.append(Course(code=row['code'], title=row['title'], syllabus=row['syllabus'],
+                                  meeting_times=row['meeting_times'], seat_limit=row['seat_limit'],
+                                  waitlist_enabled=row['waitlist_enabled'],
+                                  instructor_id=instructor_ids[row['instructor']]))
+            edges.extend((row['code'], code) for code in row['prerequisites'])
+        courses = Course.objects.bulk_create(courses, batch_size=batch_size)
+        for course in courses:
+            code_ids[course.code] = course.id
+            requested.discard(course.code)
+        Course.prerequisites.through.objects.bulk_create(
+            [Course.prerequisites.through(from_course_id=code_ids[course], to_course_id=code_ids[prerequisite])
+             for course, prerequisite in edges], batch_size=batch_size)
+        sync_meeting_blocks(courses)
+        created_ids.extend(course.id for course in courses)
+        result.created += len(courses)
+
+    # existing courses never gain prerequisites here, so only the new ones need a closure
+    prerequisites.recompute(created_ids)
+    return result
+
+
+def import_enrollments(rows, batch_size=BATCH_SIZE):
+    """
+    Enrollments by student user name and course code. Like
+    seats.create_enrollment() there are no seat, prerequisite or schedule
+    checks; the seat counters and statistics are updated once at the end.
+    """
+    result = ImportResult()
+    student_ids = dict(MyUser.objects.filter(role='student').values_list('name', 'id'))
+    courses = {code: (course_id, instructor_id)
+               for code, course_id, instructor_id in Course.objects.values_list('code', 'id', 'instructor_id')}
+    grade_length = _max_length(Enrollment, 'final_grade')
+    today = timezone.localdate()
+    seen = set()
+    seats, months = Counter(), Counter()
+    letters = []
+
+    def parse(row):
+        student_id = student_ids.get(row['student'])
+        if student_id is None:
+            return f"{row['student']} is not a student."
+        if row['course'] not in courses:
+            return f"there is no course {row['course']}."
+        row['student_id'], row['course_id'] = student_id, courses[row['course']][0]
+        if (student_id, row['course_id']) in seen:
+            return f"{row['student']} is already enrolled in {row['course']} earlier in the file."
+        try:
+            row['date_enrolled'] = parse_date(row['date_enrolled']) if row['date_enrolled'] else today
+        except ValueError:
+            row['date_enrolled'] = None
+        if row['date_enrolled'] is None:
+            return "date_enrolled must be a date (YYYY-MM-DD)."
+        if len(row['final_grade']) > grade_length:
+            return f"final_grade must be at most {grade_length} characters."
+        return None
+
+    for batch in _batches(rows, batch_size):
+        accepted = []
+        for line, row in batch:
+            problem = parse(row)
+            if problem:
+                result.error(line, problem)
+                continue
+            seen.add((row['student_id'], row['course_id']))
+            accepted.append((line, row))
+
+        existing = set(Enrollment.objects.filter(student_id__in={row['student_id'] for _, row in accepted},
+                                                 course_id__in={row['course_id'] for _, row in accepted})
+                       .values_list('student_id', 'course_id'))
+        enrollments = []
+        for line, row in accepted:
+            if (row['student_id'], row['course_id']) in existing:
+                result.error(line, f"{row['student']} is already enrolled in {row['course']}.")
+                continue
+            enrollments.append(Enrollment(student_id=row['student_id'], course_id=row['course_id'],
+                                          date_enrolled=row['date_enrolled'],
+                                          final_grade=row['final_grade'] or 'n/a'))
+            seats[row['course_id']] += 1
+            months[row['course_id'], month_of(row['date_enrolled'])] += 1
+            letters.append((row['student_id'], None, row['final_grade']))
+        Enrollment.objects.bulk_create(enrollments, batch_size=batch_size)
+        result.created += len(enrollments)
+
+    for course_id, taken in seats.items():
+        Course.objects.filter(id=course_id).update(enrolled_count=F('enrolled_count') + taken)
+    apply_changes(months, {course_id: instructor_id for course_id, instructor_id in courses.values()})
+    record_letters(letters)
+    return result
+
+
+IMPORTERS = {
+    'users': import_users,
+    'courses': import_courses,
+    'enrollments': import_enrollments,
+}
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Enrollment, EmailDelivery, EmailRecipient
+
+# Course email delivery. queue_course_email() records the message and its
+# recipients (read in one query) and returns straight away; deliver() then
+# sends one EmailMessage per student, BATCH_SIZE at a time, with one
+# send_messages() call per batch over a single mail connection. When a send
+# fails, the messages that went out before it are marked sent and only the
+# rest of the batch is retried with backoff, up to MAX_ATTEMPTS, so nobody
+# gets the same email twice. Every recipient row keeps its own status,
+# attempts and last error.
+# send_in_background() runs deliver() on a worker thread once the
+# request's transaction commits; `manage.py send_queued_email` picks up
+# anything a worker left behind (a crash, a restart, failed recipients).
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2  # seconds before the second attempt, doubled for each one after
+
+
+def queue_course_email(course, sender, subject, message):
+    """Record an email to everyone enrolled in the course; returns (delivery, recipient count)."""
+    emails = Enrollment.objects.filter(course=course).exclude(student__email='') \
+        .order_by('student_id').values_list('student__email', flat=True)
+    with transaction.atomic():
+        delivery = EmailDelivery.objects.create(course=course, sender=sender, subject=subject, message=message)
+        recipients = EmailRecipient.objects.bulk_create(
+            [EmailRecipient(delivery=delivery, email=email) for email in dict.fromkeys(emails)],
+            batch_size=500)
+    return delivery, len(recipients)
+
+
+def send_in_background(delivery):
+    """Deliver on a worker thread after commit, or right away with settings.EMAIL_IN_BACKGROUND off."""
+    if not getattr(settings, 'EMAIL_IN_BACKGROUND', True):
+        deliver(delivery.id)
+        return
+    transaction.on_commit(lambda: threading.Thread(
+        target=_worker, args=(delivery.id,), name=f'email-delivery-{delivery.id}', daemon=True).start())
+
+
+def _worker(delivery_id):
+    try:
+        deliver(delivery_id)
+    finally:
+        # the thread opened its own database connection
+        connections.close_all()
+
+
+def deliver(delivery_id, sleep=time.sleep):
+    """Send every pending recipient of a delivery; returns its final status."""
+    claimed = EmailDelivery.objects.filter(id=delivery_id, status__in=['queued', 'failed']) \
+        .update(status='sending', started_at=timezone.now())
+    if not claimed:
+        # already sent, or another worker has it
+        return None
+    delivery = EmailDelivery.objects.select_related('sender').get(id=delivery_id)
+    pending = delivery.recipients.filter(status='pending').order_by('id')
+
+    # one connection for every batch; if it can't open now, the first batch's retries reopen it
+    connection = get_connection()
+    last_id = 0
+    try:
+        try:
+            connection.open()
+        except OSError:
+            pass
+        while True:
+            batch = list(pending.filter(id__gt=last_id).values_list('id', 'email')[:BATCH_SIZE])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            _send_batch(connection, delivery, batch, sleep)
+    finally:
+        connection.close()
+
+    failed = delivery.recipients.filter(status='failed').exists()
+    delivery.status = 'failed' if failed else 'sent'
+    delivery.finished_at = timezone.now()
+    delivery.save(update_fields=['status', 'finished_at'])
+    return delivery.status
+
+
+def _send_batch(connection, delivery, batch, sleep):
+    reply_to = [delivery.sender.email] if delivery.sender.email else None
+    unsent = [(recipient_id, EmailMessage(delivery.subject, delivery.message, to=[email], reply_to=reply_to,
+                                          connection=connection)) for recipient_id, email in batch]
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        handed_over = []
+
+        def hand_over():
+            # backends send the messages in order, taking the next only once
+            # the previous one went out, so after a failure everything handed
+            # over before the last message was delivered
+            for recipient_id, message in unsent:
+                handed_over.append(recipient_id)
+                yield message
+
+        try:
+            connection.send_messages(hand_over())
+        except OSError as exc:  # smtplib.SMTPException is an OSError, as are socket errors
+            delivered = max(len(handed_over) - 1, 0)
+            _mark_sent(handed_over[:delivered], attempt)
+            unsent = unsent[delivered:]
+            if attempt == MAX_ATTEMPTS:
+                EmailRecipient.objects.filter(id__in=[recipient_id for recipient_id, _ in unsent]) \
+                    .update(status='failed', attempts=F('attempts') + attempt, error=str(exc))
+                return False
+            # retry the rest of the batch on a fresh connection
+            connection.close()
+            sleep(RETRY_DELAY * 2 ** (attempt - 1))
+        else:
+            _mark_sent(handed_over, attempt)
+            return True
+
+
+def _mark_sent(recipient_ids, attempt):
+    if recipient_ids:
+        EmailRecipient.objects.filter(id__in=recipient_ids) \
+            .update(status='sent', attempts=F('attempts') + attempt, error='', sent_at=timezone.now())
+
+
+def retry_failed(delivery_id):
+    """Put a delivery's failed recipients back in the queue and send again."""
+    EmailRecipient.objects.filter(delivery_id=delivery_id, status='failed').update(status='pending')
+    return deliver(delivery_id)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from CourseEnrollment.imports import BATCH_SIZE, run_import
+
+
+class ImportCommand(BaseCommand):
+    """Shared body of the import_* commands; subclasses set `kind`."""
+    kind = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help="path to the CSV file (UTF-8, header row first)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="validate every row, then roll back")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as file:
+                result = run_import(self.kind, file, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"line {error.line}: {error.message}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"... and {result.failed - len(result.errors)} more")
+        verb = "Validated" if options['dry_run'] else "Imported"
+        style = self.style.SUCCESS if not result.failed else self.style.WARNING
+        self.stdout.write(style(f"{verb} {result.created} {self.kind}, rejected {result.failed} row(s) "
+                                f"in {time.perf_counter() - started:.1f}s"))
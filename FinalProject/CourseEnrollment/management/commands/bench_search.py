@@ -0,0 +1,88 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from CourseEnrollment.admission import completed_course_ids, eligible_courses
+from CourseEnrollment.models import MyUser, Course, Enrollment
+from CourseEnrollment.search import search_courses, PAGE_SIZE
+
+
+class Command(BaseCommand):
+    help = ("Benchmark course search (full-text match + prerequisite eligibility) against a throwaway "
+            "test database seeded with a large catalog with deep prerequisite lists.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=10000)
+        parser.add_argument('--prerequisites', type=int, default=8, help="prerequisites per course")
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=361)
+        parser.add_argument('--compare', action='store_true',
+                            help="also time the old per-course prerequisite loop (slow)")
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            student = self.seed(options['courses'], options['prerequisites'], options['seed'])
+            for query in ('', 'intro', 'systems data'):
+                self.bench(student, query, options['repeat'], options['compare'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, num_courses, num_prereqs, seed):
+        rng = random.Random(seed)
+        words = ['Intro', 'Advanced', 'Data', 'Systems', 'Theory', 'Networks', 'Design', 'Analysis']
+        instructor = MyUser.objects.create(name='bench_prof', fullName='Bench Professor', role='instructor')
+        student = MyUser.objects.create(name='bench_student', role='student')
+        Course.objects.bulk_create([
+            Course(code=f'C{i:05d}', title=f'{rng.choice(words)} {rng.choice(words)} {i}',
+                   syllabus=' '.join(rng.choices(words, k=12)), seat_limit=30, instructor=instructor)
+            for i in range(num_courses)
+        ], batch_size=2000)
+        ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+
+        # prerequisites only point at lower-numbered courses, so the graph is a DAG
+        Through = Course.prerequisites.through
+        edges = []
+        for position, course_id in enumerate(ids[1:], start=1):
+            for prereq_id in rng.sample(ids[:position], min(num_prereqs, position)):
+                edges.append(Through(from_course_id=course_id, to_course_id=prereq_id))
+        Through.objects.bulk_create(edges, batch_size=5000)
+
+        # the student completed the first half of the catalog
+        long_ago = date.today() - timedelta(days=365)
+        Enrollment.objects.bulk_create([
+            Enrollment(student=student, course_id=course_id, date_enrolled=long_ago)
+            for course_id in ids[:num_courses // 2]
+        ], batch_size=2000)
+        self.stdout.write(f"Seeded {num_courses} courses, {len(edges)} prerequisite edges")
+        return student
+
+    def bench(self, student, query, repeat, compare):
+        with CaptureQueriesContext(connection) as ctx:
+            list(eligible_courses(student, search_courses(query))[:PAGE_SIZE])
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(eligible_courses(student, search_courses(query))[:PAGE_SIZE])
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        self.stdout.write(f"q={query!r:16} anti-join        queries={len(ctx.captured_queries):6} "
+                          f"median={timings[len(timings) // 2]:9.2f}ms")
+
+        if compare:
+            # the old SearchCoursesView: one prerequisite query per matching course
+            start = time.perf_counter()
+            completed = completed_course_ids(student)
+            matching = 0
+            eligible = []
+            for course in search_courses(query):
+                matching += 1
+                if not course.prerequisites.exclude(id__in=completed).exists():
+                    eligible.append(course)
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"q={query!r:16} per-course loop  queries={matching + 2:6} "
+                              f"once  ={elapsed:9.2f}ms")
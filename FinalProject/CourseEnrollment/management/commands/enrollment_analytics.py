@@ -0,0 +1,50 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from CourseEnrollment import analytics
+
+
+class Command(BaseCommand):
+    help = ("Cohort retention, course fill-rate curves, withdrawal rates, grade distributions and "
+            "week-over-week enrollment changes, computed with NumPy over the whole campus.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="print the full results as JSON")
+
+    def handle(self, *args, **options):
+        if not analytics.available():
+            raise CommandError("NumPy is not installed; `pip install numpy` to use analytics.")
+
+        started = time.perf_counter()
+        campus = analytics.load_campus()
+        loaded = time.perf_counter()
+        results = analytics.campus_analytics(campus)
+        finished = time.perf_counter()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write("Cohort retention (share enrolled N terms after starting):")
+        for row in results['retention']:
+            rates = '  '.join('   -' if rate is None else f'{rate:4.0%}' for rate in row['retention'])
+            self.stdout.write(f"  {row['cohort']:<12} {row['students']:>7}  {rates}")
+        self.stdout.write("Fullest courses this term:")
+        for row in results['fill_rates'][:10]:
+            self.stdout.write(f"  {row['course']:<10} {row['enrolled']:>4}/{row['seat_limit']:<4} "
+                              f"{row['curve'][-1]:4.0%}  waitlisted {row['waitlisted']}")
+        self.stdout.write("Highest withdrawal rates:")
+        for row in results['drop_rates'][:10]:
+            self.stdout.write(f"  {row['course']:<10} {row['withdrawn']:>4}/{row['enrollments']:<5} {row['rate']:.1%}")
+        self.stdout.write("Final grades: " + ', '.join(f"{row['grade']} {row['count']}"
+                                                       for row in results['grades']['letters']))
+        self.stdout.write("New enrollments by week:")
+        for row in results['weekly_trend']:
+            percent = '' if row['percent'] is None else f" ({row['percent']:+.1f}%)"
+            self.stdout.write(f"  {row['week']}  {row['enrollments']:>6}  {row['change']:+d}{percent}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Analyzed {results['enrollments']} enrollments: loaded in {loaded - started:.2f}s, "
+            f"computed in {finished - loaded:.2f}s."))
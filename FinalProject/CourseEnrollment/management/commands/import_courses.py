@@ -0,0 +1,8 @@
+from ._import import ImportCommand
+
+
+class Command(ImportCommand):
+    help = ("Bulk-import courses from a CSV file, reporting rejected rows by line number. "
+            "Columns: code, title, seat_limit, instructor (user name, created if unknown); optional syllabus, "
+            "meeting_times, waitlist_enabled (yes/no), prerequisites (codes of existing or earlier courses).")
+    kind = 'courses'
@@ -0,0 +1,7 @@
+from ._import import ImportCommand
+
+
+class Command(ImportCommand):
+    help = ("Bulk-import enrollments from a CSV file, reporting rejected rows by line number. "
+            "Columns: student (user name), course (code); optional date_enrolled (YYYY-MM-DD, default today), final_grade.")
+    kind = 'enrollments'
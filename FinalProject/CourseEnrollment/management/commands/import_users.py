@@ -0,0 +1,7 @@
+from ._import import ImportCommand
+
+
+class Command(ImportCommand):
+    help = ("Bulk-import users from a CSV file, reporting rejected rows by line number. "
+            "Columns: name, password, role (student, instructor, administrator or advisor); optional full_name, email.")
+    kind = 'users'
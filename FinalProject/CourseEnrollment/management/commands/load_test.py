@@ -0,0 +1,157 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import (CaptureQueriesContext, override_settings, setup_test_environment,
+                               teardown_test_environment)
+from django.urls import reverse
+
+from CourseEnrollment.campus import generate_campus
+from CourseEnrollment.models import MyUser, Course
+
+# settings.CACHES is a file cache shared with the dev server; the run gets a
+# private in-memory one so its users never land in (or clash with) the real cache.
+LOAD_TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+SEARCH_WORDS = ['intro', 'advanced', 'data', 'calculus', 'genetics', 'history', 'chemistry', 'theory']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Command(BaseCommand):
+    help = ("Registration-day load test: seed a synthetic campus in a throwaway test database, then drive "
+            "login, catalog, search, waitlist status and enroll/drop with concurrent clients. Reports "
+            "p50/p95/p99 latency, throughput and query counts per endpoint and writes them to a JSON file.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--courses', type=int, default=500)
+        parser.add_argument('--clients', type=int, default=16, help="concurrent client threads")
+        parser.add_argument('--sessions', type=int, default=None,
+                            help="student sessions to run (default: one per student)")
+        parser.add_argument('--seed', type=int, default=8)
+        parser.add_argument('--output', default='load_test_results.json')
+
+    def handle(self, *args, **options):
+        sessions = options['sessions'] or options['students']
+        setup_test_environment()
+        cache_override = override_settings(CACHES=LOAD_TEST_CACHES)
+        cache_override.enable()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            students = self.seed(options['students'], options['courses'], options['seed'])
+            course_ids = list(Course.objects.values_list('id', flat=True))
+            # each thread opens its own connection to the test database
+            connection.close()
+            samples, wall = self.run(students[:sessions], course_ids, options['clients'], options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            cache_override.disable()
+            teardown_test_environment()
+
+        report = self.report(samples, wall, options, sessions)
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def seed(self, num_students, num_courses, seed):
+        started = time.perf_counter()
+        generate_campus(students=num_students, instructors=max(1, num_courses // 5), courses=num_courses,
+                        seed=seed)
+        self.stdout.write(f"Seeded {num_students} students and {num_courses} courses "
+                          f"in {time.perf_counter() - started:.1f}s")
+        return list(MyUser.objects.filter(role='student').order_by('id'))
+
+    def run(self, students, course_ids, num_clients, seed):
+        work = list(enumerate(students))
+        lock = threading.Lock()
+        samples = []
+
+        def session(client, rng, student):
+            self.timed(samples, lock, 'login', lambda: client.post(
+                reverse('login'), {'name': student.name, 'password': 'pass'}))
+            self.timed(samples, lock, 'course_catalog', lambda: client.get(reverse('course_catalog')))
+            self.timed(samples, lock, 'search_courses', lambda: client.get(
+                reverse('search_courses'), {'q': rng.choice(SEARCH_WORDS)}))
+            course_id = rng.choice(course_ids)
+            self.timed(samples, lock, 'enroll', lambda: client.post(
+                reverse('course_catalog'), {'course_id': course_id}))
+            self.timed(samples, lock, 'waitlist_status', lambda: client.get(reverse('waitlist_status')))
+            if rng.random() < 0.3:
+                self.timed(samples, lock, 'drop', lambda: client.post(
+                    reverse('course_catalog'), {'course_id': course_id, 'action': 'drop'}))
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if not work:
+                            return
+                        index, student = work.pop()
+                    session(Client(), random.Random(seed + index), student)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(num_clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples, time.perf_counter() - started
+
+    def timed(self, samples, lock, endpoint, request):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            try:
+                status = request().status_code
+            except Exception:
+                status = None
+            elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            samples.append((endpoint, elapsed, len(ctx.captured_queries), status))
+
+    def report(self, samples, wall, options, sessions):
+        endpoints = {}
+        for endpoint in sorted({s[0] for s in samples}):
+            rows = [s for s in samples if s[0] == endpoint]
+            latencies = sorted(s[1] for s in rows)
+            queries = [s[2] for s in rows]
+            endpoints[endpoint] = {
+                'requests': len(rows),
+                'errors': sum(1 for s in rows if s[3] is None or s[3] >= 500),
+                'throughput_rps': round(len(rows) / wall, 2),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p95_ms': round(percentile(latencies, 95), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_queries': round(sum(queries) / len(queries), 2),
+                'max_queries': max(queries),
+            }
+            e = endpoints[endpoint]
+            self.stdout.write(f"{endpoint:16} n={e['requests']:6} err={e['errors']:4} rps={e['throughput_rps']:8.1f} "
+                              f"p50={e['p50_ms']:8.1f}ms p95={e['p95_ms']:8.1f}ms p99={e['p99_ms']:8.1f}ms "
+                              f"queries={e['mean_queries']:6.1f} (max {e['max_queries']})")
+        total = len(samples)
+        self.stdout.write(f"{total} requests in {wall:.1f}s ({total / wall:.1f} req/s)")
+        return {
+            'run_at': datetime.now(timezone.utc).isoformat(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'options': {k: options[k] for k in ('students', 'courses', 'clients', 'seed')} | {'sessions': sessions},
+            'wall_seconds': round(wall, 3),
+            'total_requests': total,
+            'throughput_rps': round(total / wall, 2),
+            'endpoints': endpoints,
+        }
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from CourseEnrollment.models import CourseEnrollmentStats, MonthlyEnrollmentStats
+from CourseEnrollment.stats import rebuild_enrollment_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-course, per-month and per-instructor enrollment statistics from the enrollment table."
+
+    def handle(self, *args, **options):
+        rebuild_enrollment_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Enrollment statistics rebuilt ({CourseEnrollmentStats.objects.count()} course(s), "
+            f"{MonthlyEnrollmentStats.objects.count()} month(s))."))
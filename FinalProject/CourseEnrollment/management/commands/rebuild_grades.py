@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from CourseEnrollment.grading import rebuild_grades
+from CourseEnrollment.models import Enrollment, StudentGPA
+
+
+class Command(BaseCommand):
+    help = "Recompute every enrollment's weighted course score and letter from its grades, and every student's GPA."
+
+    def handle(self, *args, **options):
+        rebuild_grades()
+        self.stdout.write(self.style.SUCCESS(
+            f"Grades rebuilt ({Enrollment.objects.filter(final_score__isnull=False).count()} scored enrollment(s), "
+            f"{StudentGPA.objects.count()} GPA(s))."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from CourseEnrollment.models import PrerequisiteClosure
+from CourseEnrollment.prerequisites import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = "Recompute the transitive prerequisite closure table from Course.prerequisites."
+
+    def handle(self, *args, **options):
+        rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f"Prerequisite closure rebuilt ({PrerequisiteClosure.objects.count()} rows)."))
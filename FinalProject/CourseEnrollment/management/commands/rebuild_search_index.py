@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from CourseEnrollment.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Repopulate the full-text course search index (SQLite FTS5)."
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS("Course search index rebuilt."))
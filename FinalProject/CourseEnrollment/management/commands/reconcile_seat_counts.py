@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from CourseEnrollment.office_hours import reconcile_booking_counts
+from CourseEnrollment.seats import reconcile_seat_counts
+
+
+class Command(BaseCommand):
+    help = ("Recompute Course.enrolled_count / waitlist_count from the enrollment and waitlist tables, "
+            "and OfficeHourSlot.booked_count from the bookings.")
+
+    def handle(self, *args, **options):
+        drifted = reconcile_seat_counts()
+        for course in drifted:
+            self.stdout.write(f"{course.code}: enrolled={course.enrolled_count} waitlisted={course.waitlist_count}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(drifted)} course(s)."))
+        slots = reconcile_booking_counts()
+        for slot in slots:
+            self.stdout.write(f"office hours {slot.id} ({slot.start_time:%Y-%m-%d %H:%M}): booked={slot.booked_count}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(slots)} office-hour slot(s)."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from CourseEnrollment.duplicate_users import duplicate_names, rename_duplicates
+
+
+class Command(BaseCommand):
+    help = ("Rename every account that shares its name with an older one to \"<name>-<id>\", "
+            "so migration 0013 can make user names unique. Prints each rename.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="List the shared names without renaming.")
+
+    def handle(self, *args, dry_run=False, **options):
+        if dry_run:
+            clashes = duplicate_names()
+            for clash in clashes:
+                self.stdout.write(f"{clash['name']}: user ids {', '.join(map(str, clash['ids']))}")
+            self.stdout.write(self.style.SUCCESS(f"{len(clashes)} shared name(s)."))
+            return
+        renamed = rename_duplicates()
+        for user_id, old_name, new_name in renamed:
+            self.stdout.write(f"user {user_id}: {old_name} -> {new_name}")
+        self.stdout.write(self.style.SUCCESS(f"Renamed {len(renamed)} user(s)."))
@@ -0,0 +1,48 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from CourseEnrollment.campus import generate_campus
+from CourseEnrollment.models import Course
+
+
+class Command(BaseCommand):
+    help = ("Bulk-generate a synthetic campus (users, courses with prerequisite DAGs and meeting times, "
+            "multi-year enrollment histories, waitlists, override requests, grades and office hours). "
+            "The same --seed and --today always produce the same data.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=5000)
+        parser.add_argument('--instructors', type=int, default=200)
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--courses', type=int, default=800)
+        parser.add_argument('--years', type=int, default=4, help="length of the enrollment history")
+        parser.add_argument('--courses-per-term', type=int, default=4)
+        parser.add_argument('--grades-per-enrollment', type=int, default=3,
+                            help="gradebook rows for each current enrollment")
+        parser.add_argument('--slots-per-instructor', type=int, default=4)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--today', type=date.fromisoformat, default=None,
+                            help="anchor date for the generated history (YYYY-MM-DD, default today)")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if Course.objects.exists():
+            raise CommandError("The database already has courses; run `manage.py flush` first.")
+
+        self.verbosity = options['verbosity']
+        started = time.perf_counter()
+        counts = generate_campus(
+            students=options['students'], instructors=options['instructors'], admins=options['admins'],
+            courses=options['courses'], years=options['years'], courses_per_term=options['courses_per_term'],
+            grades_per_enrollment=options['grades_per_enrollment'],
+            slots_per_instructor=options['slots_per_instructor'], seed=options['seed'], today=options['today'],
+            batch_size=options['batch_size'], log=self.log,
+        )
+        summary = ', '.join(f'{count} {model}' for model, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary} in {time.perf_counter() - started:.1f}s"))
+
+    def log(self, message):
+        if self.verbosity > 1:
+            self.stdout.write(message)
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from CourseEnrollment.mailer import retry_failed
+from CourseEnrollment.models import EmailDelivery
+
+
+class Command(BaseCommand):
+    help = ("Deliver course emails that are still queued or have failed recipients, "
+            "e.g. after a worker thread died with the server.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stuck-minutes', type=int, default=None,
+                            help="Also retry deliveries left 'sending' for longer than this.")
+
+    def handle(self, *args, **options):
+        if options['stuck_minutes'] is not None:
+            cutoff = timezone.now() - timedelta(minutes=options['stuck_minutes'])
+            # deliveries claimed before started_at existed only have created_at to go by
+            EmailDelivery.objects.filter(Q(started_at__lt=cutoff) | Q(started_at=None, created_at__lt=cutoff),
+                                         status='sending').update(status='queued')
+
+        results = {'sent': 0, 'failed': 0}
+        for delivery_id in EmailDelivery.objects.filter(status__in=['queued', 'failed']) \
+                .order_by('created_at').values_list('id', flat=True):
+            status = retry_failed(delivery_id)
+            if status in results:
+                results[status] += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"{results['sent']} delivery(ies) sent, {results['failed']} still failing."))
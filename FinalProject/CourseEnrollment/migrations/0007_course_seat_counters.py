@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:09
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model('CourseEnrollment', 'Course')
+    courses = Course.objects.annotate(
+        num_enrolled=Count('enrollments', distinct=True),
+        num_waitlisted=Count('waitlist_entries', distinct=True),
+    )
+    for course in courses:
+        Course.objects.filter(id=course.id).update(
+            enrolled_count=course.num_enrolled,
+            waitlist_count=course.num_waitlisted,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0006_alter_waitlistentry_course_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='waitlist_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:11
+
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    # Override approvals used to enroll without a duplicate check; keep the
+    # oldest row of every (student, course) pair and fix the course counters.
+    # Rows pointing at a dropped duplicate (grades) move to the kept row first,
+    # so the delete cannot cascade to them.
+    Course = apps.get_model('CourseEnrollment', 'Course')
+    for model_name, counter in (('Enrollment', 'enrolled_count'), ('WaitlistEntry', 'waitlist_count')):
+        model = apps.get_model('CourseEnrollment', model_name)
+        duplicates = list(
+            model.objects.values('student_id', 'course_id')
+            .annotate(keep=Min('id'), total=Count('id'))
+            .filter(total__gt=1)
+        )
+        children = [rel for rel in model._meta.related_objects if rel.one_to_many]
+        for dup in duplicates:
+            extra = model.objects.filter(student_id=dup['student_id'], course_id=dup['course_id']) \
+                .exclude(id=dup['keep'])
+            for rel in children:
+                rel.related_model.objects.filter(**{f'{rel.field.name}__in': extra}) \
+                    .update(**{rel.field.name: dup['keep']})
+            extra.delete()
+            Course.objects.filter(id=dup['course_id']).update(**{counter: F(counter) - (dup['total'] - 1)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0007_course_seat_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='enrollment',
+            constraint=models.UniqueConstraint(fields=('student', 'course'), name='unique_enrollment_per_course'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(fields=('student', 'course'), name='unique_waitlist_entry_per_course'),
+        ),
+    ]
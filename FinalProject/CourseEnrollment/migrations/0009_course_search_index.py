@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# SQLite only: an FTS5 index over code, title, syllabus and instructor name,
+# keyed by course id (rowid) and kept in sync by triggers so every write path,
+# including bulk_create and raw updates, updates the index. Code matches weigh
+# most, then title, instructor and syllabus. Postgres builds its tsvector at
+# query time instead (see search.py).
+FTS_TABLE = 'CourseEnrollment_course_fts'
+
+INDEX_ROW = """
+    SELECT c.id, c.code, c.title, c.syllabus, u.name || ' ' || u.fullName
+    FROM CourseEnrollment_course c JOIN CourseEnrollment_myuser u ON u.id = c.instructor_id
+"""
+
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        code, title, syllabus, instructor,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES('rank', 'bm25(10.0, 5.0, 1.0, 2.0)')",
+    f"INSERT INTO {FTS_TABLE}(rowid, code, title, syllabus, instructor) {INDEX_ROW}",
+    f"""CREATE TRIGGER course_fts_insert AFTER INSERT ON CourseEnrollment_course BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, code, title, syllabus, instructor) {INDEX_ROW} WHERE c.id = new.id;
+    END""",
+    f"""CREATE TRIGGER course_fts_update AFTER UPDATE OF code, title, syllabus, instructor_id
+        ON CourseEnrollment_course BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, code, title, syllabus, instructor) {INDEX_ROW} WHERE c.id = new.id;
+    END""",
+    f"""CREATE TRIGGER course_fts_delete AFTER DELETE ON CourseEnrollment_course BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER course_fts_instructor_update AFTER UPDATE OF name, fullName
+        ON CourseEnrollment_myuser BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT id FROM CourseEnrollment_course WHERE instructor_id = new.id);
+        INSERT INTO {FTS_TABLE}(rowid, code, title, syllabus, instructor) {INDEX_ROW} WHERE c.instructor_id = new.id;
+    END""",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS course_fts_insert",
+    "DROP TRIGGER IF EXISTS course_fts_update",
+    "DROP TRIGGER IF EXISTS course_fts_delete",
+    "DROP TRIGGER IF EXISTS course_fts_instructor_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0008_unique_enrollment_and_waitlist_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchIndex',
+            fields=[
+                ('course', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='CourseEnrollment.course')),
+                ('document', models.TextField(db_column='CourseEnrollment_course_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'CourseEnrollment_course_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_closure(apps, schema_editor):
+    Course = apps.get_model('CourseEnrollment', 'Course')
+    PrerequisiteClosure = apps.get_model('CourseEnrollment', 'PrerequisiteClosure')
+    direct = {}
+    for course_id, prereq_id in Course.prerequisites.through.objects.values_list('from_course_id', 'to_course_id'):
+        direct.setdefault(course_id, set()).add(prereq_id)
+
+    rows = []
+    for course_id in direct:
+        # walk the graph; `seen` also protects against any cycle already in the data
+        seen, stack = set(), list(direct[course_id])
+        while stack:
+            prereq_id = stack.pop()
+            if prereq_id in seen or prereq_id == course_id:
+                continue
+            seen.add(prereq_id)
+            stack.extend(direct.get(prereq_id, ()))
+        rows.extend(PrerequisiteClosure(course_id=course_id, prerequisite_id=p) for p in seen)
+    PrerequisiteClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0009_course_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrerequisiteClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prerequisite_closure', to='CourseEnrollment.course')),
+                ('prerequisite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='unlocks_closure', to='CourseEnrollment.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['prerequisite', 'course'], name='closure_unlocks_idx')],
+                'constraints': [models.UniqueConstraint(fields=('course', 'prerequisite'), name='unique_prerequisite_closure')],
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
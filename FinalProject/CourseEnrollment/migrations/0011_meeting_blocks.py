@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from CourseEnrollment.schedule import parse_meeting_times
+
+
+def backfill_blocks(apps, schema_editor):
+    Course = apps.get_model('CourseEnrollment', 'Course')
+    MeetingBlock = apps.get_model('CourseEnrollment', 'MeetingBlock')
+    MeetingBlock.objects.bulk_create([
+        MeetingBlock(course_id=course_id, day=day, start_time=start, end_time=end)
+        for course_id, meeting_times in Course.objects.values_list('id', 'meeting_times')
+        for day, start, end in parse_meeting_times(meeting_times)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0010_prerequisite_closure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meeting_blocks', to='CourseEnrollment.course')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'start_time', 'end_time'], name='meeting_block_interval_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_blocks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0011_meeting_blocks'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='waitlistentry',
+            index=models.Index(fields=['course', 'timestamp'], name='waitlist_course_order_idx'),
+        ),
+    ]
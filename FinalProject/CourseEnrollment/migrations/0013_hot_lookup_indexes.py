@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:56
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# Adding a unique constraint makes SQLite rebuild the user table, which fails
+# while the course search triggers from 0009 still point at it: set them aside
+# for the rebuild and put them back afterwards.
+fts = import_module('CourseEnrollment.migrations.0009_course_search_index')
+TRIGGERS = [statement for statement in fts.CREATE_SQL if statement.startswith('CREATE TRIGGER')]
+DROP_TRIGGERS = [statement for statement in fts.DROP_SQL if statement.startswith('DROP TRIGGER')]
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0012_waitlist_course_order_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['student', 'date_enrolled'], name='enrollment_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['date_enrolled'], name='enrollment_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='myuser',
+            index=models.Index(fields=['role', 'name'], name='user_role_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overriderequest',
+            index=models.Index(fields=['status', 'course'], name='override_status_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overriderequest',
+            index=models.Index(fields=['student', 'course'], name='override_student_course_idx'),
+        ),
+        migrations.RunPython(run_sqlite(DROP_TRIGGERS), run_sqlite(TRIGGERS)),
+        migrations.AddConstraint(
+            model_name='myuser',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_user_name'),
+        ),
+        migrations.RunPython(run_sqlite(TRIGGERS), run_sqlite(DROP_TRIGGERS)),
+    ]
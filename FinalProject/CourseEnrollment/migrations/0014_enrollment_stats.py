@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def backfill_stats(apps, schema_editor):
+    Enrollment = apps.get_model('CourseEnrollment', 'Enrollment')
+    CourseEnrollmentStats = apps.get_model('CourseEnrollment', 'CourseEnrollmentStats')
+    MonthlyEnrollmentStats = apps.get_model('CourseEnrollment', 'MonthlyEnrollmentStats')
+    InstructorEnrollmentStats = apps.get_model('CourseEnrollment', 'InstructorEnrollmentStats')
+    enrollments = Enrollment.objects.order_by()
+    CourseEnrollmentStats.objects.bulk_create([
+        CourseEnrollmentStats(course_id=course_id, enrollments=total)
+        for course_id, total in enrollments.values_list('course_id').annotate(total=Count('id'))
+    ], batch_size=1000)
+    MonthlyEnrollmentStats.objects.bulk_create([
+        MonthlyEnrollmentStats(month=month, enrollments=total)
+        for month, total in enrollments.annotate(month=TruncMonth('date_enrolled'))
+        .values_list('month').annotate(total=Count('id'))
+    ], batch_size=1000)
+    InstructorEnrollmentStats.objects.bulk_create([
+        InstructorEnrollmentStats(instructor_id=instructor_id, enrollments=total)
+        for instructor_id, total in enrollments.values_list('course__instructor_id').annotate(total=Count('id'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0013_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyEnrollmentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseEnrollmentStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='enrollment_stats', serialize=False, to='CourseEnrollment.course')),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-enrollments'], name='course_stats_rank_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InstructorEnrollmentStats',
+            fields=[
+                ('instructor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='enrollment_stats', serialize=False, to='CourseEnrollment.myuser')),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-enrollments'], name='instructor_stats_rank_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0014_enrollment_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='email_deliveries', to='CourseEnrollment.course')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_deliveries', to='CourseEnrollment.myuser')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EmailRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('delivery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='CourseEnrollment.emaildelivery')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='emaildelivery',
+            index=models.Index(fields=['status', 'created_at'], name='email_delivery_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailrecipient',
+            index=models.Index(fields=['delivery', 'status', 'id'], name='email_recipient_batch_idx'),
+        ),
+    ]
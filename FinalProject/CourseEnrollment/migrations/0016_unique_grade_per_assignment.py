@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:40
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicates(apps, schema_editor):
+    # Nothing stopped two rows for the same assignment before; keep the most
+    # recently written one, which is what the student has been shown.
+    Grade = apps.get_model('CourseEnrollment', 'Grade')
+    duplicates = list(
+        Grade.objects.values('enrollment_id', 'assignment_name')
+        .annotate(keep=Max('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates:
+        Grade.objects.filter(enrollment_id=dup['enrollment_id'], assignment_name=dup['assignment_name']) \
+            .exclude(id=dup['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0015_email_delivery'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='grade',
+            constraint=models.UniqueConstraint(fields=('enrollment', 'assignment_name'),
+                                               name='unique_grade_per_assignment'),
+        ),
+    ]
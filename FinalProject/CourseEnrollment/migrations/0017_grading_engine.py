@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:23
+
+from decimal import Decimal, ROUND_HALF_UP
+
+import django.db.models.deletion
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+# copies of grading.LETTER_CUTOFFS and grading.GRADE_POINTS as of this migration
+LETTER_CUTOFFS = [(93, 'A'), (90, 'A-'), (87, 'B+'), (83, 'B'), (80, 'B-'), (77, 'C+'), (73, 'C'), (70, 'C-'),
+                  (67, 'D+'), (63, 'D'), (60, 'D-'), (0, 'F')]
+GRADE_POINTS = {'A': '4.0', 'A-': '3.7', 'B+': '3.3', 'B': '3.0', 'B-': '2.7', 'C+': '2.3', 'C': '2.0',
+                'C-': '1.7', 'D+': '1.3', 'D': '1.0', 'D-': '0.7', 'F': '0.0'}
+
+
+def backfill_scores(apps, schema_editor):
+    # No course has categories yet, so every enrollment's scores form one
+    # uncategorized total and its final score is their plain mean.
+    Grade = apps.get_model('CourseEnrollment', 'Grade')
+    Enrollment = apps.get_model('CourseEnrollment', 'Enrollment')
+    CategoryScore = apps.get_model('CourseEnrollment', 'CategoryScore')
+    StudentGPA = apps.get_model('CourseEnrollment', 'StudentGPA')
+
+    sums = Grade.objects.order_by().values_list('enrollment_id').annotate(total=Sum('score'), count=Count('id'))
+    scores, updated = [], []
+    for enrollment_id, total, count in sums.iterator(chunk_size=2000):
+        scores.append(CategoryScore(enrollment_id=enrollment_id, category=None, total=total, count=count))
+        final = (Decimal(total) / count).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        letter = next(letter for cutoff, letter in LETTER_CUTOFFS if final >= cutoff)
+        updated.append(Enrollment(id=enrollment_id, final_score=final, score_letter=letter))
+    CategoryScore.objects.bulk_create(scores, batch_size=1000)
+    Enrollment.objects.bulk_update(updated, ['final_score', 'score_letter'], batch_size=1000)
+
+    points, courses = {}, {}
+    for student_id, grade in Enrollment.objects.filter(final_grade__in=list(GRADE_POINTS)) \
+            .values_list('student_id', 'final_grade').iterator(chunk_size=2000):
+        points[student_id] = points.get(student_id, Decimal(0)) + Decimal(GRADE_POINTS[grade])
+        courses[student_id] = courses.get(student_id, 0) + 1
+    StudentGPA.objects.bulk_create([StudentGPA(student_id=student_id, grade_points=total, courses=courses[student_id])
+                                    for student_id, total in points.items()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0016_unique_grade_per_assignment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentGPA',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='gpa', serialize=False, to='CourseEnrollment.myuser')),
+                ('grade_points', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('courses', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='final_score',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='score_letter',
+            field=models.CharField(blank=True, max_length=2),
+        ),
+        migrations.CreateModel(
+            name='GradeCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('weight', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_categories', to='CourseEnrollment.course')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CategoryScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_scores', to='CourseEnrollment.enrollment')),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='CourseEnrollment.gradecategory')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Assignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='CourseEnrollment.course')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assignments', to='CourseEnrollment.gradecategory')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='gradecategory',
+            constraint=models.UniqueConstraint(fields=('course', 'name'), name='unique_grade_category_per_course'),
+        ),
+        migrations.AddIndex(
+            model_name='categoryscore',
+            index=models.Index(fields=['enrollment', 'category'], name='category_score_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='assignment',
+            constraint=models.UniqueConstraint(fields=('course', 'name'), name='unique_assignment_per_course'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_bookings(apps, schema_editor):
+    # Nothing stopped a student booking the same slot twice before; keep the first booking.
+    OfficeHourBooking = apps.get_model('CourseEnrollment', 'OfficeHourBooking')
+    duplicates = list(
+        OfficeHourBooking.objects.values('slot_id', 'student_id')
+        .annotate(keep=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates:
+        OfficeHourBooking.objects.filter(slot_id=dup['slot_id'], student_id=dup['student_id']) \
+            .exclude(id=dup['keep']).delete()
+
+
+def count_bookings(apps, schema_editor):
+    # Existing slots never had a limit: a slot booked by more students than the
+    # default capacity keeps room for everyone already booked.
+    OfficeHourSlot = apps.get_model('CourseEnrollment', 'OfficeHourSlot')
+    OfficeHourBooking = apps.get_model('CourseEnrollment', 'OfficeHourBooking')
+    counts = OfficeHourBooking.objects.order_by().values_list('slot_id').annotate(total=Count('id'))
+    slots = [OfficeHourSlot(id=slot_id, booked_count=total, capacity=max(total, 1))
+             for slot_id, total in counts.iterator(chunk_size=2000)]
+    OfficeHourSlot.objects.bulk_update(slots, ['booked_count', 'capacity'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0017_grading_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='officehourslot',
+            name='booked_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='officehourslot',
+            name='capacity',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AlterField(
+            model_name='officehourbooking',
+            name='slot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='CourseEnrollment.officehourslot'),
+        ),
+        migrations.AddIndex(
+            model_name='officehourslot',
+            index=models.Index(fields=['instructor', 'start_time', 'end_time'], name='office_hour_overlap_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='officehourbooking',
+            constraint=models.UniqueConstraint(fields=('slot', 'student'), name='unique_booking_per_student'),
+        ),
+        migrations.RunPython(count_bookings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0018_office_hour_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaildelivery',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# Postgres only: the counterpart of 0009's FTS5 table. The same table name and
+# document column hold a stored, weighted tsvector per course (code A, title
+# B, instructor C, syllabus D) behind a GIN index, so search.py can query
+# CourseSearchIndex on both databases. Triggers keep it in sync on every write
+# path, as on SQLite; the foreign key removes a course's row with the course.
+FTS_TABLE = 'CourseEnrollment_course_fts'
+
+DOCUMENT = """
+    setweight(to_tsvector(coalesce(c.code, '')), 'A')
+    || setweight(to_tsvector(coalesce(c.title, '')), 'B')
+    || setweight(to_tsvector(coalesce(u.name, '') || ' ' || coalesce(u."fullName", '')), 'C')
+    || setweight(to_tsvector(coalesce(c.syllabus, '')), 'D')
+"""
+
+INDEX_ROW = f"""
+    SELECT c.id, {DOCUMENT}
+    FROM "CourseEnrollment_course" c JOIN "CourseEnrollment_myuser" u ON u.id = c.instructor_id
+"""
+
+UPSERT = f"""
+    INSERT INTO "{FTS_TABLE}" (rowid, "{FTS_TABLE}") {{index_row}}
+    ON CONFLICT (rowid) DO UPDATE SET "{FTS_TABLE}" = EXCLUDED."{FTS_TABLE}"
+"""
+
+CREATE_SQL = [
+    f"""CREATE TABLE "{FTS_TABLE}" (
+        rowid bigint PRIMARY KEY REFERENCES "CourseEnrollment_course" (id) ON DELETE CASCADE,
+        "{FTS_TABLE}" tsvector NOT NULL
+    )""",
+    f'CREATE INDEX course_fts_document_idx ON "{FTS_TABLE}" USING GIN ("{FTS_TABLE}")',
+    UPSERT.format(index_row=INDEX_ROW),
+    f"""CREATE FUNCTION course_fts_refresh() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'CourseEnrollment_myuser' THEN
+            {UPSERT.format(index_row=INDEX_ROW + ' WHERE c.instructor_id = NEW.id')};
+        ELSE
+            {UPSERT.format(index_row=INDEX_ROW + ' WHERE c.id = NEW.id')};
+        END IF;
+        RETURN NULL;
+    END
+    $$""",
+    """CREATE TRIGGER course_fts_update AFTER INSERT OR UPDATE OF code, title, syllabus, instructor_id
+        ON "CourseEnrollment_course" FOR EACH ROW EXECUTE FUNCTION course_fts_refresh()""",
+    """CREATE TRIGGER course_fts_instructor_update AFTER UPDATE OF name, "fullName"
+        ON "CourseEnrollment_myuser" FOR EACH ROW EXECUTE FUNCTION course_fts_refresh()""",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS course_fts_instructor_update ON "CourseEnrollment_myuser"',
+    'DROP TRIGGER IF EXISTS course_fts_update ON "CourseEnrollment_course"',
+    'DROP FUNCTION IF EXISTS course_fts_refresh()',
+    f'DROP TABLE IF EXISTS "{FTS_TABLE}"',
+]
+
+
+def create_tsvector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in CREATE_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_tsvector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CourseEnrollment', '0019_email_delivery_started_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_tsvector_index, drop_tsvector_index),
+    ]
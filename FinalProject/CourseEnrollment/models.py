@@ -1,4 +1,5 @@
 from datetime import date
+from decimal import Decimal
 from typing import Any
 
 from django.db import models
@@ -18,6 +19,16 @@ class MyUser(models.Model):
     # we need a model field that will handle the history enrollment of a students.
     # This model field will also include that courses a student is currently enrolled in.
 
+    class Meta:
+        # login and signup look users up by name; SignupView already rejects duplicates
+        constraints = [
+            models.UniqueConstraint(fields=['name'], name='unique_user_name'),
+        ]
+        indexes = [
+            # student lists and report counts, and instructor lookups by name
+            models.Index(fields=['role', 'name'], name='user_role_name_idx'),
+        ]
+
 
 class Course(models.Model):
     code = models.CharField(max_length=10, default = "0000", unique=True)
@@ -29,6 +40,10 @@ class Course(models.Model):
     # We also need a model field that will add prerequisites to the individual courses.
     prerequisites = models.ManyToManyField('self', symmetrical=False, blank=True, related_name='required_for')
     waitlist_enabled = models.BooleanField(default=True)
+    # Denormalized counters maintained by seats.py so seat checks don't have to
+    # count the enrollment table. `manage.py reconcile_seat_counts` repairs drift.
+    enrolled_count = models.PositiveIntegerField(default=0)
+    waitlist_count = models.PositiveIntegerField(default=0)
 
     @property
     def name(self):
@@ -38,12 +53,63 @@ class Course(models.Model):
         return f"{self.code}: {self.title}"
 
 
+# One weekly meeting of a course, parsed from Course.meeting_times by
+# schedule.py and kept in sync when the course is saved (see signals.py).
+class MeetingBlock(models.Model):
+    DAYS = [(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'),
+            (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')]
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='meeting_blocks')
+    day = models.PositiveSmallIntegerField(choices=DAYS)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'start_time', 'end_time'], name='meeting_block_interval_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course.code} {self.get_day_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+# Transitive closure of Course.prerequisites: one row for every course and every
+# course it requires directly or indirectly. Maintained by prerequisites.py.
+class PrerequisiteClosure(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='prerequisite_closure')
+    prerequisite = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='unlocks_closure')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'prerequisite'], name='unique_prerequisite_closure'),
+        ]
+        indexes = [
+            models.Index(fields=['prerequisite', 'course'], name='closure_unlocks_idx'),
+        ]
+
+
 # used this to look at which classes a student is enrolled in.
 class Enrollment(models.Model):
     student = models.ForeignKey(MyUser, on_delete=models.CASCADE, related_name='enrollments')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
     date_enrolled = models.DateField(default=timezone.now)
     final_grade = models.CharField(max_length=3, blank=True, null=True, default="n/a")  # e.g. A, B+, C, etc.
+    # running weighted score from the Grade rows and its letter, kept by grading.py;
+    # final_grade above stays the official grade until the instructor posts these
+    final_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    score_letter = models.CharField(max_length=2, blank=True)
+
+    class Meta:
+        # a student holds at most one enrollment per course; admission.admit() relies on this
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_enrollment_per_course'),
+        ]
+        indexes = [
+            # a student's current/past split and the prerequisite cutoff checks
+            models.Index(fields=['student', 'date_enrolled'], name='enrollment_student_date_idx'),
+            # term-wide scans and monthly reports
+            models.Index(fields=['date_enrolled'], name='enrollment_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.name} enrolled in {self.course.code}"
@@ -59,6 +125,14 @@ class OverrideRequest(models.Model):
         default='pending'
     )
 
+    class Meta:
+        indexes = [
+            # pending queues, for administrators and per course for instructors
+            models.Index(fields=['status', 'course'], name='override_status_course_idx'),
+            # "already requested?" check before a student files a request
+            models.Index(fields=['student', 'course'], name='override_student_course_idx'),
+        ]
+
     def __str__(self):
         return f"OverrideRequest by {self.student.name} for {self.course.code} [{self.status}]"
 
@@ -68,9 +142,47 @@ class WaitlistEntry(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='waitlist_entries')
     timestamp = models.DateTimeField(default = timezone.now)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_waitlist_entry_per_course'),
+        ]
+        indexes = [
+            # FIFO order within a course: waitlist positions and promotion
+            models.Index(fields=['course', 'timestamp'], name='waitlist_course_order_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.name} on waitlist for {self.course.code}"
 
+# Pre-aggregated enrollment counts for the report generator, kept current by
+# stats.py as enrollments are added, moved and removed, so the report never
+# aggregates the enrollment table. `manage.py rebuild_enrollment_stats` backfills.
+class CourseEnrollmentStats(models.Model):
+    course = models.OneToOneField(Course, primary_key=True, on_delete=models.CASCADE, related_name='enrollment_stats')
+    enrollments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-enrollments'], name='course_stats_rank_idx'),
+        ]
+
+
+class MonthlyEnrollmentStats(models.Model):
+    month = models.DateField(unique=True)  # first day of the month
+    enrollments = models.PositiveIntegerField(default=0)
+
+
+class InstructorEnrollmentStats(models.Model):
+    instructor = models.OneToOneField(MyUser, primary_key=True, on_delete=models.CASCADE,
+                                      related_name='enrollment_stats')
+    enrollments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-enrollments'], name='instructor_stats_rank_idx'),
+        ]
+
+
 class Grade(models.Model):
     enrollment      = models.ForeignKey(Enrollment, on_delete=models.CASCADE)
     assignment_name = models.CharField(max_length=100)
@@ -78,16 +190,163 @@ class Grade(models.Model):
     feedback        = models.TextField(blank=True)
     updated_at      = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # one score per student per assignment; the gradebook (gradebook.py) diffs against it
+        constraints = [
+            models.UniqueConstraint(fields=['enrollment', 'assignment_name'], name='unique_grade_per_assignment'),
+        ]
+
+# A course's grading scheme (see grading.py): categories with weights, and the
+# category each assignment name counts toward. Assignments without a category
+# only count when the course has no categories at all.
+class GradeCategory(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='grade_categories')
+    name = models.CharField(max_length=50)
+    weight = models.DecimalField(max_digits=5, decimal_places=2)  # share of the final score, any scale
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'name'], name='unique_grade_category_per_course'),
+        ]
+
+    def __str__(self):
+        return f"{self.course.code} {self.name} ({self.weight})"
+
+
+class Assignment(models.Model):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='assignments')
+    name = models.CharField(max_length=100)  # matches Grade.assignment_name
+    category = models.ForeignKey(GradeCategory, null=True, blank=True, on_delete=models.SET_NULL,
+                                 related_name='assignments')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'name'], name='unique_assignment_per_course'),
+        ]
+
+
+# Running sum and count of one enrollment's scores in one category (NULL: the
+# course has no categories, or the assignment has none), so a changed Grade
+# adjusts one row instead of re-reading the course's grades.
+class CategoryScore(models.Model):
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='category_scores')
+    category = models.ForeignKey(GradeCategory, null=True, on_delete=models.CASCADE, related_name='scores')
+    total = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['enrollment', 'category'], name='category_score_lookup_idx'),
+        ]
+
+
+# Grade points and graded courses per student from Enrollment.final_grade, for
+# transcripts; kept by grading.record_letters(), `manage.py rebuild_grades` repairs.
+class StudentGPA(models.Model):
+    student = models.OneToOneField(MyUser, primary_key=True, on_delete=models.CASCADE, related_name='gpa')
+    grade_points = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    courses = models.PositiveIntegerField(default=0)
+
+    @property
+    def gpa(self):
+        if not self.courses:
+            return None
+        return (self.grade_points / self.courses).quantize(Decimal('0.01'))
+
+
 class OfficeHourSlot(models.Model):
     instructor = models.ForeignKey(MyUser,
                                    limit_choices_to={'role':'instructor'},
                                    on_delete=models.CASCADE)
     start_time = models.DateTimeField()
     end_time   = models.DateTimeField()
+    capacity = models.PositiveIntegerField(default=1)
+    # kept in step with the bookings by office_hours.py, like Course.enrolled_count
+    booked_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # an instructor's slots overlapping [start, end): start_time < end AND end_time > start
+            models.Index(fields=['instructor', 'start_time', 'end_time'], name='office_hour_overlap_idx'),
+        ]
+
+    @property
+    def is_full(self):
+        return self.booked_count >= self.capacity
 
 class OfficeHourBooking(models.Model):
-    slot    = models.ForeignKey(OfficeHourSlot, on_delete=models.CASCADE)
+    slot    = models.ForeignKey(OfficeHourSlot, on_delete=models.CASCADE, related_name='bookings')
     student = models.ForeignKey(MyUser,
                                 limit_choices_to={'role':'student'},
                                 on_delete=models.CASCADE)
     booked_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['slot', 'student'], name='unique_booking_per_student'),
+        ]
+
+
+
+# Course emails queued by an instructor and delivered off the request thread
+# by mailer.py: one EmailDelivery per send, one EmailRecipient per address,
+# each recipient carrying its own status so failed batches can be retried.
+class EmailDelivery(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    course = models.ForeignKey(Course, null=True, on_delete=models.SET_NULL, related_name='email_deliveries')
+    sender = models.ForeignKey(MyUser, on_delete=models.CASCADE, related_name='email_deliveries')
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)  # when deliver() last claimed it
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='email_delivery_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} from {self.sender.name} [{self.status}]"
+
+
+class EmailRecipient(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    delivery = models.ForeignKey(EmailDelivery, on_delete=models.CASCADE, related_name='recipients')
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the next batch to send for a delivery
+            models.Index(fields=['delivery', 'status', 'id'], name='email_recipient_batch_idx'),
+        ]
+
+
+# Read-only view of the table behind course search (see search.py): an FTS5
+# table on SQLite (migration 0009), a GIN-indexed tsvector on Postgres (0020),
+# each kept in sync with Course and MyUser by triggers. Django never writes
+# to it, and `rank` only exists on SQLite.
+class CourseSearchIndex(models.Model):
+    course = models.OneToOneField(Course, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING,
+                                  related_name='search_index')
+    # FTS5 exposes a hidden column named after the table; MATCH runs against it
+    document = models.TextField(db_column='CourseEnrollment_course_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'CourseEnrollment_course_fts'
@@ -0,0 +1,181 @@
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import MyUser, OfficeHourSlot, OfficeHourBooking
+
+# Office-hour slots and bookings. A slot holds `capacity` students and
+# OfficeHourSlot.booked_count counts its bookings; book_slot() takes a place
+# with a single conditional UPDATE (booked_count < capacity), so students
+# racing for the last place can't both get it, and the unique (slot, student)
+# constraint stops a double submit from booking twice. An instructor's slots
+# may not overlap; overlap checks are range queries on
+# (instructor, start_time, end_time), which office_hour_overlap_idx answers.
+# Recurring office hours ("TTh 2-4pm" from one date to another, in 15-minute
+# slots) are expanded here and written with one bulk_create, after a single
+# overlap query over the whole date range.
+
+# Outcomes of book_slot()
+BOOKED = 'booked'
+ALREADY_BOOKED = 'already_booked'
+SLOT_FULL = 'slot_full'
+TIME_CONFLICT = 'time_conflict'
+
+Booking = namedtuple('Booking', ['status', 'booking', 'conflicts'], defaults=((),))
+
+SLOT_MINUTES = 15
+MAX_RECURRING_SLOTS = 5000
+WINDOW_DAYS = 7  # the slot list shows one week at a time
+
+# what create_recurring_slots() wrote, and the (start, end) times it left out
+# because they overlap office hours the instructor already has
+RecurringSlots = namedtuple('RecurringSlots', ['created', 'skipped'])
+
+
+def overlapping_slots(instructor, start, end):
+    """The instructor's slots sharing any time with [start, end); back-to-back slots don't overlap."""
+    return OfficeHourSlot.objects.filter(instructor=instructor, start_time__lt=end, end_time__gt=start) \
+        .order_by('start_time')
+
+
+def create_slot(instructor, start, end, capacity=1):
+    """
+    Publish a slot unless it overlaps one the instructor already has. Returns
+    (slot, []) or (None, the overlapping slots).
+    """
+    with transaction.atomic():
+        # serialize slot creation per instructor so two requests can't both pass the overlap check
+        MyUser.objects.select_for_update().filter(id=instructor.id).exists()
+        conflicts = list(overlapping_slots(instructor, start, end))
+        if conflicts:
+            return None, conflicts
+        slot = OfficeHourSlot.objects.create(instructor=instructor, start_time=start, end_time=end,
+                                             capacity=capacity)
+    return slot, []
+
+
+def expand_recurrence(blocks, first_day, last_day, slot_minutes=SLOT_MINUTES, skip_dates=()):
+    """
+    (start, end) of every slot_minutes-long slot in the weekly (day, start,
+    end) blocks (as schedule.parse_meeting_times() returns them) on each date
+    from first_day through last_day, except skip_dates, in time order. Times
+    are read in the current time zone; a block's leftover minutes are dropped.
+    ValueError if that comes to more than MAX_RECURRING_SLOTS slots.
+    """
+    by_day = {}
+    for day, start, end in blocks:
+        by_day.setdefault(day, []).append((start, end))
+    length = timedelta(minutes=slot_minutes)
+    skip = set(skip_dates)
+    slots = []
+    date = first_day
+    while date <= last_day:
+        if date not in skip:
+            for start, end in by_day.get(date.weekday(), ()):
+                slot_start = timezone.make_aware(datetime.combine(date, start))
+                block_end = timezone.make_aware(datetime.combine(date, end))
+                while slot_start + length <= block_end:
+                    slots.append((slot_start, slot_start + length))
+                    slot_start += length
+        if len(slots) > MAX_RECURRING_SLOTS:
+            raise ValueError(f"That would make more than {MAX_RECURRING_SLOTS} slots; choose a shorter date range.")
+        date += timedelta(days=1)
+    return sorted(slots)
+
+
+def create_recurring_slots(instructor, times, capacity=1):
+    """
+    Publish every (start, end) in `times` (from expand_recurrence()) that
+    doesn't overlap the instructor's existing slots or an earlier time in
+    the list. The existing slots in the whole range are read with one
+    query and the new ones written with bulk_create.
+    """
+    if not times:
+        return RecurringSlots([], [])
+    with transaction.atomic():
+        MyUser.objects.select_for_update().filter(id=instructor.id).exists()
+        existing = list(overlapping_slots(instructor, min(s for s, _ in times), max(e for _, e in times))
+                        .values_list('start_time', 'end_time'))
+        # existing slots sorted by start, with the latest end so far: a time
+        # (s, e) overlaps one of them if any slot starting before e ends after s
+        starts = [start for start, _ in existing]
+        latest_end = list(accumulate((end for _, end in existing), max))
+        new, skipped = [], []
+        for start, end in sorted(times):
+            before = bisect_left(starts, end)
+            if (before and latest_end[before - 1] > start) or (new and new[-1].end_time > start):
+                skipped.append((start, end))
+                continue
+            new.append(OfficeHourSlot(instructor=instructor, start_time=start, end_time=end, capacity=capacity))
+        created = OfficeHourSlot.objects.bulk_create(new, batch_size=500)
+    return RecurringSlots(created, skipped)
+
+
+def slot_window(instructor, first_day, days=WINDOW_DAYS):
+    """The instructor's slots starting on first_day or in the `days` days after it, by start time."""
+    start = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+    return OfficeHourSlot.objects.filter(instructor=instructor, start_time__gte=start,
+                                         start_time__lt=start + timedelta(days=days)).order_by('start_time')
+
+
+def claim_place(slot):
+    """Take one place in the slot with a conditional UPDATE; True if one was free."""
+    return OfficeHourSlot.objects.filter(id=slot.id, booked_count__lt=F('capacity')) \
+        .update(booked_count=F('booked_count') + 1) == 1
+
+
+def book_slot(student, slot):
+    with transaction.atomic():
+        if OfficeHourBooking.objects.filter(slot=slot, student=student).exists():
+            return Booking(ALREADY_BOOKED, None)
+        conflicts = list(OfficeHourSlot.objects.filter(
+            bookings__student=student, start_time__lt=slot.end_time, end_time__gt=slot.start_time))
+        if conflicts:
+            return Booking(TIME_CONFLICT, None, conflicts)
+        try:
+            with transaction.atomic():
+                if not claim_place(slot):
+                    return Booking(SLOT_FULL, None)
+                booking = OfficeHourBooking.objects.create(slot=slot, student=student)
+        except IntegrityError:
+            return Booking(ALREADY_BOOKED, None)
+    return Booking(BOOKED, booking)
+
+
+def booking_message(booking, slot):
+    """Student-facing message for the outcome of book_slot()."""
+    when = f"{slot.start_time:%b %d %H:%M}-{slot.end_time:%H:%M}"
+    if booking.status == BOOKED:
+        return f"You are booked for office hours on {when}."
+    if booking.status == ALREADY_BOOKED:
+        return f"You already have a place in the office hours on {when}."
+    if booking.status == TIME_CONFLICT:
+        others = ", ".join(f"{other.start_time:%b %d %H:%M}" for other in booking.conflicts)
+        return f"The office hours on {when} overlap office hours you already booked ({others})."
+    return f"The office hours on {when} are fully booked."
+
+
+def reconcile_booking_counts(slots=None):
+    """
+    Recompute booked_count from the bookings table and fix any slot whose
+    stored value has drifted (e.g. bookings removed by a cascade). Returns
+    the list of slots that were corrected.
+    """
+    if slots is None:
+        slots = OfficeHourSlot.objects.all()
+    booked = OfficeHourBooking.objects.filter(slot=OuterRef('pk')).order_by().values('slot') \
+        .annotate(total=Count('id')).values('total')
+
+    drifted = []
+    for slot in slots.annotate(actual_booked=Coalesce(Subquery(booked), Value(0))):
+        if slot.booked_count != slot.actual_booked:
+            slot.booked_count = slot.actual_booked
+            drifted.append(slot)
+    OfficeHourSlot.objects.bulk_update(drifted, ['booked_count'], batch_size=500)
+    return drifted
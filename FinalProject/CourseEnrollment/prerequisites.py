@@ -0,0 +1,139 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Course, PrerequisiteClosure
+
+# Prerequisite graph service. PrerequisiteClosure holds the transitive closure
+# of Course.prerequisites, so "everything X requires" and "everything Y
+# unlocks" are a single indexed query each. The closure is kept up to date
+# incrementally by the signal handlers in signals.py.
+
+Prerequisite = Course.prerequisites.through
+
+
+def all_prerequisites(course):
+    """Every course `course` requires, directly or through other prerequisites."""
+    return Course.objects.filter(unlocks_closure__course=course)
+
+
+def unlocked_by(course):
+    """Every course that requires `course`, directly or indirectly."""
+    return Course.objects.filter(prerequisite_closure__prerequisite=course)
+
+
+def creates_cycle(course_id, prerequisite_ids):
+    """
+    True if making `prerequisite_ids` prerequisites of the course would make the
+    graph cyclic: the course would require itself, or one of the new
+    prerequisites already (transitively) requires the course.
+    """
+    prerequisite_ids = {int(p) for p in prerequisite_ids}
+    if course_id in prerequisite_ids:
+        return True
+    return PrerequisiteClosure.objects.filter(course_id__in=prerequisite_ids, prerequisite_id=course_id).exists()
+
+
+def check_no_cycle(course_id, prerequisite_ids):
+    if creates_cycle(course_id, prerequisite_ids):
+        raise ValidationError("These prerequisites would create a cycle: a course cannot (indirectly) require itself.")
+
+
+def add_edges(edges):
+    """
+    Extend the closure after (course, prerequisite) edges were added: every
+    course that requires `course` (and `course` itself) now also requires the
+    prerequisite and everything the prerequisite requires.
+    """
+    rows = []
+    for course_id, prerequisite_id in edges:
+        dependents = {course_id} | set(
+            PrerequisiteClosure.objects.filter(prerequisite_id=course_id).values_list('course_id', flat=True))
+        requirements = {prerequisite_id} | set(
+            PrerequisiteClosure.objects.filter(course_id=prerequisite_id).values_list('prerequisite_id', flat=True))
+        rows.extend(PrerequisiteClosure(course_id=d, prerequisite_id=r) for d in dependents for r in requirements)
+    PrerequisiteClosure.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+def dependents_of(course_ids):
+    """The given courses plus every course that (transitively) requires one of them."""
+    return set(course_ids) | set(
+        PrerequisiteClosure.objects.filter(prerequisite_id__in=course_ids).values_list('course_id', flat=True))
+
+
+def recompute(course_ids):
+    """
+    Rebuild the closure rows of `course_ids` from the direct prerequisite
+    edges. Used after edges are removed; callers pass the affected course and
+    all of its dependents (see dependents_of), whose closures may have shrunk.
+    Courses outside that set keep their closure, so we reuse it.
+    """
+    course_ids = set(course_ids)
+    if not course_ids:
+        return
+    direct = {}
+    for course_id, prerequisite_id in Prerequisite.objects.filter(from_course_id__in=course_ids) \
+            .values_list('from_course_id', 'to_course_id'):
+        direct.setdefault(course_id, set()).add(prerequisite_id)
+
+    outside = {p for prereqs in direct.values() for p in prereqs} - course_ids
+    known = {}
+    for course_id, prerequisite_id in PrerequisiteClosure.objects.filter(course_id__in=outside) \
+            .values_list('course_id', 'prerequisite_id'):
+        known.setdefault(course_id, set()).add(prerequisite_id)
+
+    _walk(course_ids, direct, known)
+
+    with transaction.atomic():
+        PrerequisiteClosure.objects.filter(course_id__in=course_ids).delete()
+        PrerequisiteClosure.objects.bulk_create(
+            [PrerequisiteClosure(course_id=c, prerequisite_id=p)
+             for c in course_ids for p in known[c] if p != c],
+            batch_size=1000,
+        )
+
+
+def rebuild_closure():
+    """Recompute the whole closure, e.g. after prerequisites were bulk-inserted."""
+    direct = {}
+    for course_id, prerequisite_id in Prerequisite.objects.values_list('from_course_id', 'to_course_id'):
+        direct.setdefault(course_id, set()).add(prerequisite_id)
+    known = {}
+    _walk(set(direct), direct, known)
+
+    with transaction.atomic():
+        PrerequisiteClosure.objects.all().delete()
+        PrerequisiteClosure.objects.bulk_create(
+            (PrerequisiteClosure(course_id=c, prerequisite_id=p) for c in direct for p in known[c] if p != c),
+            batch_size=1000,
+        )
+
+
+def _walk(course_ids, direct, known):
+    """
+    Fill `known[c]` with the full set of prerequisites of every c in
+    `course_ids`, given the direct edges of those courses and the already
+    known closures of any prerequisite outside the set.
+    """
+    # iterative depth-first walk so long prerequisite chains don't hit the recursion limit
+    on_stack = set()
+    for root in course_ids:
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if node in known:
+                stack.pop()
+                continue
+            on_stack.add(node)
+            pending = [p for p in direct.get(node, ())
+                       if p in course_ids and p not in known and p not in on_stack]
+            if pending:
+                stack.extend(pending)
+                continue
+            result = set()
+            for prerequisite_id in direct.get(node, ()):
+                result.add(prerequisite_id)
+                result |= known.get(prerequisite_id, set())
+            known[node] = result
+            on_stack.discard(node)
+            stack.pop()
+
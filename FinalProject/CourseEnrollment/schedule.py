@@ -0,0 +1,198 @@
+import re
+from datetime import time
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Course, Enrollment, MeetingBlock
+
+# Parsing of the free-text Course.meeting_times field ("MWF 9-10AM",
+# "TTh 1-2:30PM", "Tuesday 2pm-3:15pm") into (day, start, end) blocks, which
+# are stored as MeetingBlock rows so schedules can be searched and compared
+# with indexed range queries. Days are numbered like date.weekday().
+
+MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY, SATURDAY, SUNDAY = range(7)
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# longest spellings first so "th" wins over "t" and "sat" over "s"
+DAY_TOKENS = [
+    ('monday', MONDAY), ('tuesday', TUESDAY), ('wednesday', WEDNESDAY), ('thursday', THURSDAY),
+    ('friday', FRIDAY), ('saturday', SATURDAY), ('sunday', SUNDAY),
+    ('thurs', THURSDAY), ('thur', THURSDAY), ('tues', TUESDAY),
+    ('mon', MONDAY), ('tue', TUESDAY), ('wed', WEDNESDAY), ('thu', THURSDAY), ('fri', FRIDAY),
+    ('sat', SATURDAY), ('sun', SUNDAY),
+    ('th', THURSDAY), ('tu', TUESDAY), ('sa', SATURDAY), ('su', SUNDAY),
+    ('m', MONDAY), ('t', TUESDAY), ('w', WEDNESDAY), ('r', THURSDAY), ('f', FRIDAY), ('s', SATURDAY),
+    ('u', SUNDAY),
+]
+DAY_LOOKUP = dict(DAY_TOKENS)
+DAY_RE = '|'.join(token for token, _ in DAY_TOKENS)
+DAYS_RE = rf'(?:(?:{DAY_RE})[\s/,&-]*)+'
+
+CLOCK_RE = r'(\d{1,2})(?::(\d{2}))?\s*([ap])?\.?m?\.?'
+BLOCK_RE = re.compile(rf'(?P<days>{DAYS_RE})\s*{CLOCK_RE}\s*(?:-|–|to)\s*{CLOCK_RE}', re.IGNORECASE)
+DAY_TOKEN_RE = re.compile(DAY_RE)
+DAY_WORD_RE = re.compile(rf'(?:{DAY_RE})+')
+
+# named parts of the day for schedule search ("Tuesday afternoon")
+DAY_PARTS = {
+    'morning': (time(6, 0), time(12, 0)),
+    'afternoon': (time(12, 0), time(17, 0)),
+    'evening': (time(17, 0), time(23, 59)),
+}
+
+
+def parse_days(text):
+    """Days named in `text`; only words made up entirely of day names count ("MWF", "TTh", "tues")."""
+    days = set()
+    for word in re.findall(r'[a-z]+', text.lower()):
+        if DAY_WORD_RE.fullmatch(word):
+            days.update(DAY_LOOKUP[token] for token in DAY_TOKEN_RE.findall(word))
+    return sorted(days)
+
+
+def _to_24h(hour, meridiem):
+    hour = hour % 12
+    return hour + 12 if meridiem == 'p' else hour
+
+
+def _guess_hour(hour):
+    # no am/pm given: 8-11 are mornings, 12-7 are afternoons/evenings
+    return hour if 8 <= hour <= 11 else _to_24h(hour, 'p')
+
+
+def resolve_range(start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem):
+    """Turn "1-2:30PM" style clock readings into a (start, end) pair of times."""
+    start_meridiem = start_meridiem and start_meridiem.lower()
+    end_meridiem = end_meridiem and end_meridiem.lower()
+
+    if end_meridiem:
+        end = _to_24h(end_hour, end_meridiem)
+    elif start_meridiem:
+        end = _to_24h(end_hour, start_meridiem)
+    else:
+        end = _guess_hour(end_hour)
+
+    if start_meridiem:
+        start = _to_24h(start_hour, start_meridiem)
+    elif end_meridiem:
+        # "11-12PM" means 11am to noon, "1-2:30PM" means 1pm to 2:30pm
+        start = _to_24h(start_hour, end_meridiem)
+        if (start, start_minute) > (end, end_minute):
+            start = _to_24h(start_hour, 'a')
+    else:
+        start = _guess_hour(start_hour)
+
+    if start_minute > 59 or end_minute > 59:
+        return None
+    if (end, end_minute) <= (start, start_minute) and end < 12:
+        end += 12
+    if not (0 <= start < 24 and 0 <= end < 24) or (end, end_minute) <= (start, start_minute):
+        return None
+    return time(start, start_minute), time(end, end_minute)
+
+
+def _clock_groups(match, offset):
+    hour, minute, meridiem = match.group(offset, offset + 1, offset + 2)
+    return int(hour), int(minute or 0), meridiem
+
+
+def parse_meeting_times(text):
+    """
+    All (day, start, end) blocks described by a meeting_times string, e.g.
+    "MWF 9-10AM" -> three blocks 09:00-10:00 on Monday, Wednesday and Friday.
+    Parts that can't be understood are ignored.
+    """
+    blocks = []
+    for match in BLOCK_RE.finditer(text or ''):
+        times = resolve_range(*_clock_groups(match, 2), *_clock_groups(match, 5))
+        if times is None:
+            continue
+        for day in parse_days(match.group('days')):
+            blocks.append((day, times[0], times[1]))
+    return sorted(set(blocks))
+
+
+def parse_schedule_filter(text):
+    """
+    Turn the search page's schedule box into (days, start, end) for a range
+    query, or None if it can't be understood. Examples:
+      "Tuesday afternoon" -> ([1], 12:00, 17:00)
+      "T 12-5PM"          -> ([1], 12:00, 17:00)
+      "TR 2:00"           -> ([1, 3], 14:00, None)   starts at 2pm
+      "MWF"               -> ([0, 2, 4], None, None) any time on those days
+    Days may be empty when only a time is given.
+    """
+    text = (text or '').strip()
+    if not text:
+        return None
+    lowered = text.lower()
+    for part, (start, end) in DAY_PARTS.items():
+        if part in lowered:
+            return parse_days(lowered), start, end
+
+    clock = re.search(rf'{CLOCK_RE}(?:\s*(?:-|–|to)\s*{CLOCK_RE})?', text, re.IGNORECASE)
+    days = parse_days(text[:clock.start()] if clock else text)
+    if clock is None:
+        return (days, None, None) if days else None
+    if clock.group(4) is not None:
+        times = resolve_range(*_clock_groups(clock, 1), *_clock_groups(clock, 4))
+        return (days, times[0], times[1]) if times else None
+    hour, minute, meridiem = _clock_groups(clock, 1)
+    hour = _to_24h(hour, meridiem.lower()) if meridiem else _guess_hour(hour)
+    if hour > 23 or minute > 59:
+        return None
+    return days, time(hour, minute), None
+
+
+def sync_meeting_blocks(courses):
+    """Replace the MeetingBlock rows of `courses` with what their meeting_times say."""
+    courses = list(courses)
+    with transaction.atomic():
+        for i in range(0, len(courses), 500):
+            batch = courses[i:i + 500]
+            MeetingBlock.objects.filter(course_id__in=[c.id for c in batch]).delete()
+            MeetingBlock.objects.bulk_create([
+                MeetingBlock(course_id=c.id, day=day, start_time=start, end_time=end)
+                for c in batch
+                for day, start, end in parse_meeting_times(c.meeting_times)
+            ])
+
+
+def overlapping(blocks):
+    """Q matching MeetingBlock rows that overlap any of `blocks`."""
+    overlap = Q(pk__in=[])
+    for block in blocks:
+        overlap |= Q(day=block.day, start_time__lt=block.end_time, end_time__gt=block.start_time)
+    return overlap
+
+
+def schedule_conflicts(student, course, since):
+    """
+    Courses the student is currently taking (enrolled on or after `since`)
+    that meet at the same time as `course`.
+    """
+    blocks = list(course.meeting_blocks.all())
+    if not blocks:
+        return []
+    current = Enrollment.objects.filter(student=student, date_enrolled__gte=since).values('course_id')
+    clashing = MeetingBlock.objects.filter(overlapping(blocks), course_id__in=current) \
+        .exclude(course_id=course.id).values('course_id')
+    return list(Course.objects.filter(id__in=clashing))
+
+
+def courses_meeting(courses, days, start, end):
+    """
+    Narrow `courses` to those with a meeting on one of `days` (any day if
+    empty) inside [start, end], or starting exactly at `start` when there is
+    no end. Served by the (day, start_time, end_time) index.
+    """
+    blocks = MeetingBlock.objects.all()
+    if days:
+        blocks = blocks.filter(day__in=days)
+    if start and end:
+        blocks = blocks.filter(start_time__gte=start, end_time__lte=end)
+    elif start:
+        blocks = blocks.filter(start_time=start)
+    return courses.filter(id__in=blocks.values('course_id'))
@@ -0,0 +1,93 @@
+import re
+
+from django.db import connection
+from django.db.models import F, Lookup, Q
+
+from .models import Course, CourseSearchIndex
+
+PAGE_SIZE = 25
+
+
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+    def as_postgresql(self, compiler, connection):
+        # the document is a tsvector there (migration 0020) and the rhs a SearchQuery
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} @@ {rhs}', lhs_params + rhs_params
+
+
+CourseSearchIndex._meta.get_field('document').register_lookup(Match)
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search_courses(query, courses=None):
+    """
+    Courses matching every word of `query` as a prefix of a word in the code,
+    title, syllabus or instructor name, best matches first.
+
+    On SQLite this is an FTS5 MATCH against CourseSearchIndex ranked by bm25,
+    on Postgres a prefix tsquery against CourseSearchIndex's stored,
+    GIN-indexed tsvector ranked by ts_rank. Other databases fall back to
+    icontains so the page still works, just without an index.
+    """
+    if courses is None:
+        courses = Course.objects.all()
+    terms = search_terms(query)
+    if not terms:
+        return courses.order_by('id')
+
+    if connection.vendor == 'sqlite':
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        return courses.filter(search_index__document__match=fts_query).order_by('search_index__rank', 'code')
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        ts_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw')
+        return (
+            courses.filter(search_index__document__match=ts_query)
+            .annotate(search_rank=SearchRank(F('search_index__document'), ts_query))
+            .order_by('-search_rank', 'code')
+        )
+
+    matches = Q()
+    for term in terms:
+        matches &= (Q(code__icontains=term) | Q(title__icontains=term) | Q(syllabus__icontains=term)
+                    | Q(instructor__name__icontains=term) | Q(instructor__fullName__icontains=term))
+    return courses.filter(matches).order_by('code')
+
+
+def rebuild_search_index():
+    """Repopulate the search index from scratch, e.g. after restoring a backup."""
+    table = CourseSearchIndex._meta.db_table
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE "{table}"')
+            cursor.execute(
+                f'INSERT INTO "{table}" (rowid, "{table}") '
+                f"SELECT c.id, setweight(to_tsvector(coalesce(c.code, '')), 'A') "
+                f"|| setweight(to_tsvector(coalesce(c.title, '')), 'B') "
+                f"|| setweight(to_tsvector(coalesce(u.name, '') || ' ' || coalesce(u.\"fullName\", '')), 'C') "
+                f"|| setweight(to_tsvector(coalesce(c.syllabus, '')), 'D') "
+                f'FROM "CourseEnrollment_course" c JOIN "CourseEnrollment_myuser" u ON u.id = c.instructor_id'
+            )
+        return
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(
+            f"INSERT INTO {table}(rowid, code, title, syllabus, instructor) "
+            f"SELECT c.id, c.code, c.title, c.syllabus, u.name || ' ' || u.fullName "
+            f"FROM CourseEnrollment_course c JOIN CourseEnrollment_myuser u ON u.id = c.instructor_id"
+        )
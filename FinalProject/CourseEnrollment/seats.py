@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .grading import record_letter_removal
+from .models import Course, Enrollment, WaitlistEntry
+from .stats import record_enrollments, record_removal
+
+
+# Course.enrolled_count and Course.waitlist_count are kept in step with the
+# Enrollment / WaitlistEntry tables by the helpers below. Every view that adds
+# or removes one of those rows should go through here so seat checks can read
+# the counter on the course row instead of counting the enrollments table.
+# The enrollment helpers also keep the report statistics (stats.py) and the
+# cached GPAs (grading.py) current.
+
+def claim_seat(course, enforce_limit=True):
+    """
+    Take one seat in the course. With enforce_limit the increment only happens
+    while enrolled_count < seat_limit, as a single conditional UPDATE, so the
+    database decides who gets the last seat. Returns True if a seat was taken.
+    """
+    seats = Course.objects.filter(id=course.id)
+    if enforce_limit:
+        seats = seats.filter(enrolled_count__lt=F('seat_limit'))
+    return seats.update(enrolled_count=F('enrolled_count') + 1) == 1
+
+
+def create_enrollment(student, course, **fields):
+    """Enroll without any checks; use admission.admit() for student-facing paths."""
+    with transaction.atomic():
+        claim_seat(course, enforce_limit=False)
+        enrollment = Enrollment.objects.create(student=student, course=course, **fields)
+        record_enrollments([enrollment], instructors={course.id: course.instructor_id})
+    return enrollment
+
+
+def drop_enrollments(enrollments):
+    """Delete the given Enrollment queryset and release the seats it held."""
+    with transaction.atomic():
+        record_removal(enrollments)
+        record_letter_removal(enrollments)
+        return _delete_and_decrement(enrollments, 'enrolled_count')
+
+
+def add_to_waitlist(student, course):
+    with transaction.atomic():
+        entry = WaitlistEntry.objects.create(student=student, course=course)
+        Course.objects.filter(id=course.id).update(waitlist_count=F('waitlist_count') + 1)
+    return entry
+
+
+def remove_from_waitlist(entries):
+    """Delete the given WaitlistEntry queryset and shrink the waitlist counters."""
+    return _delete_and_decrement(entries, 'waitlist_count')
+
+
+def _delete_and_decrement(queryset, counter):
+    with transaction.atomic():
+        per_course = list(
+            queryset.order_by().values('course_id').annotate(total=Count('id')).values_list('course_id', 'total')
+        )
+        if not per_course:
+            return 0
+        queryset.delete()
+        for course_id, total in per_course:
+            # never go below zero if the counter had already drifted
+            Course.objects.filter(id=course_id).update(**{counter: Greatest(F(counter) - total, Value(0))})
+    return sum(total for _, total in per_course)
+
+
+def reconcile_seat_counts(courses=None):
+    """
+    Recompute the counters from the enrollment and waitlist tables and fix any
+    course whose stored value has drifted (e.g. rows removed by a cascade).
+    Returns the list of courses that were corrected.
+    """
+    if courses is None:
+        courses = Course.objects.all()
+
+    enrolled = Enrollment.objects.filter(course=OuterRef('pk')).order_by().values('course') \
+        .annotate(total=Count('id')).values('total')
+    waitlisted = WaitlistEntry.objects.filter(course=OuterRef('pk')).order_by().values('course') \
+        .annotate(total=Count('id')).values('total')
+    courses = courses.annotate(
+        actual_enrolled=Coalesce(Subquery(enrolled), Value(0)),
+        actual_waitlisted=Coalesce(Subquery(waitlisted), Value(0)),
+    )
+
+    drifted = []
+    for course in courses:
+        if course.enrolled_count != course.actual_enrolled or course.waitlist_count != course.actual_waitlisted:
+            course.enrolled_count = course.actual_enrolled
+            course.waitlist_count = course.actual_waitlisted
+            drifted.append(course)
+    Course.objects.bulk_update(drifted, ['enrolled_count', 'waitlist_count'], batch_size=500)
+    return drifted
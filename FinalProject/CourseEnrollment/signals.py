@@ -0,0 +1,56 @@
+from django.db.models.signals import m2m_changed, pre_delete, post_delete, post_save
+from django.dispatch import receiver
+
+from . import prerequisites
+from .current_user import forget_user
+from .models import Course, MyUser
+from .schedule import sync_meeting_blocks
+
+
+@receiver(post_save, sender=Course)
+def update_meeting_blocks(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'meeting_times' in update_fields:
+        sync_meeting_blocks([instance])
+
+
+@receiver(m2m_changed, sender=Course.prerequisites.through)
+def prerequisites_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse=True means the change was made from the other side, e.g.
+    # intro.required_for.add(advanced): `instance` is the prerequisite.
+    if action == 'pre_add':
+        if reverse:
+            for course_id in pk_set:
+                prerequisites.check_no_cycle(course_id, [instance.id])
+        else:
+            prerequisites.check_no_cycle(instance.id, pk_set)
+    elif action == 'post_add':
+        if reverse:
+            prerequisites.add_edges([(course_id, instance.id) for course_id in pk_set])
+        else:
+            prerequisites.add_edges([(instance.id, prereq_id) for prereq_id in pk_set])
+    elif action in ('post_remove', 'post_clear'):
+        if reverse:
+            # instance stopped being a prerequisite of pk_set (or of everything on clear)
+            affected = pk_set if pk_set is not None else \
+                prerequisites.dependents_of([instance.id]) - {instance.id}
+            prerequisites.recompute(prerequisites.dependents_of(affected))
+        else:
+            prerequisites.recompute(prerequisites.dependents_of([instance.id]))
+
+
+@receiver(pre_delete, sender=Course)
+def remember_dependents(sender, instance, **kwargs):
+    instance._closure_dependents = prerequisites.dependents_of([instance.id]) - {instance.id}
+
+
+@receiver(post_delete, sender=Course)
+def repair_closure_after_delete(sender, instance, **kwargs):
+    # the deleted course may have been the link between its dependents and its own prerequisites
+    prerequisites.recompute(getattr(instance, '_closure_dependents', set()))
+
+
+@receiver(post_save, sender=MyUser)
+@receiver(post_delete, sender=MyUser)
+def drop_cached_user(sender, instance, **kwargs):
+    # e.g. AdminStudentEditView renaming a student or changing their password
+    forget_user(instance.id)
@@ -0,0 +1,208 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest, TruncDay, TruncMonth, TruncWeek
+
+from .models import (MyUser, Course, Enrollment, CourseEnrollmentStats, MonthlyEnrollmentStats,
+                     InstructorEnrollmentStats)
+
+# Enrollment counts per course, per month and per instructor, maintained as
+# enrollments change so the report generator reads a handful of rows instead
+# of aggregating the whole enrollment table. Like the seat counters, they are
+# updated by the write helpers (seats.py, admission.py, waitlist.py) and by the
+# views that move an enrollment or a course; rows removed by cascades drift
+# until `manage.py rebuild_enrollment_stats` recomputes everything.
+
+REPORT_ROWS = 25
+
+# Trend buckets. Weeks start on Monday; terms are spring (January-April),
+# summer (May-August) and fall (September-December), named by first month.
+GRANULARITIES = ('day', 'week', 'month', 'term')
+TERM_NAMES = {1: 'Spring', 5: 'Summer', 9: 'Fall'}
+
+_date_enrolled = Enrollment._meta.get_field('date_enrolled')
+
+
+def month_of(day):
+    # an unsaved Enrollment still holds the timezone.now() default as a datetime
+    return _date_enrolled.to_python(day).replace(day=1)
+
+
+def record_enrollments(enrollments, delta=1, instructors=None):
+    """Count the given Enrollment objects in (delta=1) or out of (delta=-1) the statistics."""
+    changes = Counter()
+    for enrollment in enrollments:
+        changes[enrollment.course_id, month_of(enrollment.date_enrolled)] += delta
+    apply_changes(changes, instructors)
+
+
+def record_removal(enrollments):
+    """Count an Enrollment queryset out of the statistics; call before deleting it."""
+    changes, instructors = Counter(), {}
+    grouped = enrollments.order_by().annotate(month=TruncMonth('date_enrolled')) \
+        .values_list('course_id', 'course__instructor_id', 'month').annotate(total=Count('id'))
+    for course_id, instructor_id, month, total in grouped:
+        changes[course_id, month] -= total
+        instructors[course_id] = instructor_id
+    apply_changes(changes, instructors)
+
+
+def move_enrollments(moves, instructors=None):
+    """
+    Enrollments whose dates were edited, as (enrollment, old_date) pairs; each
+    may now count for another month. Course totals don't change, so
+    `instructors` (as in apply_changes) only saves the course lookup.
+    """
+    changes = Counter()
+    for enrollment, old_date in moves:
+        changes[enrollment.course_id, month_of(old_date)] -= 1
+        changes[enrollment.course_id, month_of(enrollment.date_enrolled)] += 1
+    apply_changes(changes, instructors)
+
+
+def apply_changes(changes, instructors=None):
+    """
+    Apply a Counter of (course_id, month) -> change in enrollments. The
+    instructor of each course is looked up unless `instructors` maps every
+    course id to it already.
+    """
+    by_course, by_month = Counter(), Counter()
+    for (course_id, month), delta in changes.items():
+        by_course[course_id] += delta
+        by_month[month] += delta
+    if not any(by_course.values()) and not any(by_month.values()):
+        return
+    if instructors is None:
+        instructors = dict(Course.objects.filter(id__in=by_course).values_list('id', 'instructor_id'))
+    by_instructor = Counter()
+    for course_id, delta in by_course.items():
+        if course_id in instructors:
+            by_instructor[instructors[course_id]] += delta
+
+    with transaction.atomic(savepoint=False):
+        _add(CourseEnrollmentStats, 'course_id', by_course)
+        _add(MonthlyEnrollmentStats, 'month', by_month)
+        _add(InstructorEnrollmentStats, 'instructor_id', by_instructor)
+
+
+def _add(model, key, deltas):
+    for value, delta in deltas.items():
+        if not delta:
+            continue
+        rows = model.objects.filter(**{key: value})
+        # never go below zero if the statistics had already drifted
+        if rows.update(enrollments=Greatest(F('enrollments') + delta, Value(0))) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                model.objects.create(**{key: value, 'enrollments': delta})
+        except IntegrityError:
+            # another request created the row first
+            rows.update(enrollments=F('enrollments') + delta)
+
+
+def move_course(course_id, old_instructor_id, new_instructor_id):
+    """A course changed hands: its enrollments now count for the new instructor."""
+    stats = CourseEnrollmentStats.objects.filter(course_id=course_id).first()
+    if stats is None or not stats.enrollments:
+        return
+    with transaction.atomic(savepoint=False):
+        _add(InstructorEnrollmentStats, 'instructor_id', Counter({
+            old_instructor_id: -stats.enrollments,
+            new_instructor_id: stats.enrollments,
+        }))
+
+
+def rebuild_enrollment_stats():
+    """Recompute all three tables from the enrollment table (backfills, repairs)."""
+    enrollments = Enrollment.objects.order_by()
+    with transaction.atomic():
+        CourseEnrollmentStats.objects.all().delete()
+        MonthlyEnrollmentStats.objects.all().delete()
+        InstructorEnrollmentStats.objects.all().delete()
+        CourseEnrollmentStats.objects.bulk_create([
+            CourseEnrollmentStats(course_id=course_id, enrollments=total)
+            for course_id, total in enrollments.values_list('course_id').annotate(total=Count('id'))
+        ], batch_size=1000)
+        MonthlyEnrollmentStats.objects.bulk_create([
+            MonthlyEnrollmentStats(month=month, enrollments=total)
+            for month, total in enrollments.annotate(month=TruncMonth('date_enrolled'))
+            .values_list('month').annotate(total=Count('id'))
+        ], batch_size=1000)
+        InstructorEnrollmentStats.objects.bulk_create([
+            InstructorEnrollmentStats(instructor_id=instructor_id, enrollments=total)
+            for instructor_id, total in enrollments.values_list('course__instructor_id').annotate(total=Count('id'))
+        ], batch_size=1000)
+
+
+def term_of(day):
+    """First day of the term the date falls in."""
+    return day.replace(month=max(m for m in TERM_NAMES if m <= day.month), day=1)
+
+
+def period_label(period, granularity):
+    if granularity == 'term':
+        return f'{TERM_NAMES[period.month]} {period.year}'
+    if granularity == 'month':
+        return period.strftime('%Y-%m')
+    if granularity == 'week':
+        return f'Week of {period:%Y-%m-%d}'
+    return period.strftime('%Y-%m-%d')
+
+
+def enrollment_trend(granularity='month', start=None, end=None):
+    """
+    Enrollments per day, week, month or term with date_enrolled between start
+    and end (both inclusive, either may be None), oldest first, as a list of
+    {'period', 'label', 'total'} dicts.
+
+    Whole months come from the monthly statistics table. Anything finer, or a
+    range that cuts through a month, is grouped on the enrollment table with
+    Django's Trunc functions, which every backend supports (unlike strftime),
+    over a range filter that the date_enrolled index serves.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'unknown granularity {granularity!r}')
+    whole_months = (start is None or start.day == 1) and (end is None or (end + timedelta(days=1)).day == 1)
+    if granularity in ('month', 'term') and whole_months:
+        months = MonthlyEnrollmentStats.objects.filter(enrollments__gt=0)
+        if start is not None:
+            months = months.filter(month__gte=start)
+        if end is not None:
+            months = months.filter(month__lte=end)
+        counts = months.values_list('month', 'enrollments')
+    else:
+        enrollments = Enrollment.objects.order_by()
+        if start is not None:
+            enrollments = enrollments.filter(date_enrolled__gte=start)
+        if end is not None:
+            enrollments = enrollments.filter(date_enrolled__lte=end)
+        trunc = {'day': TruncDay, 'week': TruncWeek}.get(granularity, TruncMonth)
+        counts = enrollments.annotate(period=trunc('date_enrolled')).values_list('period') \
+            .annotate(total=Count('id'))
+
+    totals = Counter()
+    for period, total in counts:
+        # terms are folded from months here rather than in SQL, which keeps
+        # the query identical on every backend
+        totals[term_of(period) if granularity == 'term' else period] += total
+    return [{'period': period, 'label': period_label(period, granularity), 'total': totals[period]}
+            for period in sorted(totals)]
+
+
+def enrollment_report():
+    """Context for the enrollment report page, read from the statistics tables."""
+    courses = list(CourseEnrollmentStats.objects.filter(enrollments__gt=0).select_related('course')
+                   .order_by('-enrollments', 'course_id')[:REPORT_ROWS])
+    instructors = list(InstructorEnrollmentStats.objects.filter(enrollments__gt=0).select_related('instructor')
+                       .order_by('-enrollments', 'instructor_id')[:REPORT_ROWS])
+    total = MonthlyEnrollmentStats.objects.aggregate(total=Sum('enrollments'))['total']
+    return {
+        'total_enrollments': total or 0,
+        'total_students': MyUser.objects.filter(role='student').count(),
+        'top_course': courses[0].course if courses else None,
+        'enrollments_by_course': courses,
+        'enrollments_by_instructor': instructors,
+    }
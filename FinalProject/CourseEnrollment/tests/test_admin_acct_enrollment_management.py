@@ -3,9 +3,19 @@ from django.urls import reverse
 from ..models import MyUser, Course, Enrollment
 from datetime import date
 
+
+def log_in_as_administrator(client):
+    MyUser.objects.create(name='testadmin', password='pass', role='administrator')
+    session = client.session
+    session['name'] = 'testadmin'
+    session['role'] = 'administrator'
+    session.save()
+
+
 class AdminEditEnrollmentTests(TestCase):
     def setUp(self):
         self.client = Client()
+        log_in_as_administrator(self.client)
 
         # Create instructor user
         self.instructor = MyUser.objects.create(
@@ -73,6 +83,7 @@ class AdminEditEnrollmentTests(TestCase):
 class AdminStudentEditViewTests(TestCase):
     def setUp(self):
         self.client = Client()
+        log_in_as_administrator(self.client)
         self.student = MyUser.objects.create(
             fullName='Old Full Name',
             name='Old Name',
@@ -109,4 +120,16 @@ class AdminStudentEditViewTests(TestCase):
         })
         self.assertEqual(response.status_code, 302)
 
+    def test_rename_to_a_taken_name(self):
+        MyUser.objects.create(name='Taken', password='pass', role='instructor')
+        response = self.client.post(reverse('admin_student_acct_edit'), {
+            'student_id': self.student.id,
+            'name': 'Taken',
+            'email': 'new@example.com',
+            'password': 'newpass'
+        })
+        self.assertContains(response, 'That username is already taken.')
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.name, 'Old Name')
+
 
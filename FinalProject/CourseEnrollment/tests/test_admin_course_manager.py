@@ -5,11 +5,21 @@ from django.urls import reverse
 
 from ..models import Course, MyUser
 
+
+def log_in_as_administrator(client):
+    MyUser.objects.create(name='testadmin', password='pass', role='administrator')
+    session = client.session
+    session['name'] = 'testadmin'
+    session['role'] = 'administrator'
+    session.save()
+
+
 # Code cannot be edited and should not be edited under no circumstances.
 # We can test modifying all other parts of the Course though.
 class AdminCourseEditTest(TestCase):
     def setUp(self):
         self.client = Client()
+        log_in_as_administrator(self.client)
         self.course = Course.objects.create(
             code='CS101',
             title='Intro to CS',
@@ -116,9 +126,25 @@ class AdminCourseEditTest(TestCase):
         # check if role matches for the newly created object for instructor
         self.assertEqual(self.course.instructor.role, new_instructor.role)
 
+    def test_edit_instructor_name_of_a_student(self):
+        MyUser.objects.create(name='Sam', password='pass', role='student')
+        response = self.client.post('/admin_edit_course/', {
+            'course_code': 'CS101',
+            'title': 'Intro to CS',
+            'syllabus': 'Old syllabus',
+            'meeting_times': 'MWF 10-11',
+            'seat_limit': 30,
+            'instructor_name': 'Sam'
+        })
+        self.assertContains(response, 'Sam is a user but not an instructor.')
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.instructor.name, 'John')
+
+
 class AdminCourseAddTest(TestCase):
     def setUp(self):
         self.client = Client()
+        log_in_as_administrator(self.client)
         self.course = Course.objects.create(
             code='CS101',
             title='Intro to CS',
@@ -266,6 +292,19 @@ class AdminCourseAddTest(TestCase):
         #check if object wasn't accidentally created with invalid instructor.
         self.assertFalse(MyUser.objects.filter(name=' ', role = 'instructor').exists())
 
+    def test_add_instructor_name_of_a_student(self):
+        MyUser.objects.create(name='Sam', password='pass', role='student')
+        response = self.client.post('/admin_add_course/', {
+            'course_code': 'CS102',
+            'title': 'Intermediate Computer Programming',
+            'syllabus': 'Syllabus',
+            'meeting_times': 'MW 10 - 11:15 AM',
+            'instructor_name': 'Sam',
+            'seat_limit': 30
+        })
+        self.assertContains(response, 'Sam is a user but not an instructor.')
+        self.assertFalse(Course.objects.filter(code='CS102').exists())
+
     def test_add_invalid_seat_limit(self):
         response = self.client.post('/admin_add_course/', {
             'course_code': 'CS102',
@@ -312,6 +351,7 @@ class AdminCourseAddTest(TestCase):
 class AdminCourseDeleteTest(TestCase):
     def setUp(self):
         self.client = Client()
+        log_in_as_administrator(self.client)
 
         new_instructor = MyUser.objects.create(
             name='Test Instructor',
@@ -341,6 +381,7 @@ class AdminCourseDeleteTest(TestCase):
 class AdminPrerequisiteEditingTest(TestCase):
     def setUp(self):
         self.client = Client()
+        log_in_as_administrator(self.client)
 
         # Create an instructor
         self.instructor = MyUser.objects.create(name='Dr. Smith', password='pass', role='instructor')
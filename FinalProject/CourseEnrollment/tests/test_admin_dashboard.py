@@ -8,6 +8,7 @@ class AdminDashboardTest(TestCase):
         client = Client()
         # self.user = MyUser.objects.create(name='testuser', password='testpass', role='admin')
         response = client.post('/', {'name': 'testuser', 'password': 'testpass'}, follow=True)
+        MyUser.objects.create(name='testuser', password='testpass', role='administrator')
         # Simulate a session with admin credentials
         session = self.client.session
         session['name'] = 'testuser'
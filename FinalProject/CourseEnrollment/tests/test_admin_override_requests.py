@@ -6,9 +6,19 @@ from django.urls import reverse
 from ..models import Course, MyUser, OverrideRequest
 
 
+def log_in_as_administrator(client):
+    MyUser.objects.create(name='testadmin', password='pass', role='administrator')
+    session = client.session
+    session['name'] = 'testadmin'
+    session['role'] = 'administrator'
+    session.save()
+
+
+
 class AdminOverrideRequestsTest(TestCase):
     def setUp(self):
         self.client = Client()
+        log_in_as_administrator(self.client)
 
         # Create test users and course
         self.student = MyUser.objects.create(fullName= "Alice Wonderland",name='Alice', password='pass', role='student')
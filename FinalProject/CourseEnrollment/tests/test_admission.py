@@ -0,0 +1,120 @@
+import threading
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client
+from django.urls import reverse
+
+from ..admission import (
+    admit, ENROLLED, ALREADY_ENROLLED, MISSING_PREREQUISITES, WAITLISTED, ALREADY_WAITLISTED, FULL,
+)
+from ..models import MyUser, Course, Enrollment, WaitlistEntry
+from ..seats import create_enrollment
+
+
+class AdmissionTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='adminstr', password='pass', role='instructor')
+        self.student = MyUser.objects.create(name='adstudent', password='pass', role='student')
+        self.other = MyUser.objects.create(name='adother', password='pass', role='student')
+        self.course = Course.objects.create(code='CS400', title='Compilers', seat_limit=1,
+                                            instructor=self.instructor)
+
+    def test_enrolls_when_seat_free(self):
+        result = admit(self.student, self.course)
+        self.assertEqual(result.status, ENROLLED)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 1)
+
+    def test_duplicate(self):
+        admit(self.student, self.course)
+        self.assertEqual(admit(self.student, self.course).status, ALREADY_ENROLLED)
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 1)
+
+    def test_missing_prerequisite(self):
+        intro = Course.objects.create(code='CS100', title='Intro', seat_limit=5, instructor=self.instructor)
+        self.course.prerequisites.add(intro)
+        result = admit(self.student, self.course)
+        self.assertEqual(result.status, MISSING_PREREQUISITES)
+        self.assertEqual(result.missing_prerequisites, [intro])
+
+        create_enrollment(self.student, intro, date_enrolled=date.today() - timedelta(days=200))
+        self.assertEqual(admit(self.student, self.course).status, ENROLLED)
+
+    def test_full_course_waitlists_once(self):
+        admit(self.other, self.course)
+        self.assertEqual(admit(self.student, self.course).status, WAITLISTED)
+        self.assertEqual(admit(self.student, self.course).status, ALREADY_WAITLISTED)
+        self.assertEqual(WaitlistEntry.objects.filter(course=self.course).count(), 1)
+
+    def test_full_course_without_waitlist(self):
+        self.course.waitlist_enabled = False
+        self.course.save()
+        admit(self.other, self.course)
+        self.assertEqual(admit(self.student, self.course).status, FULL)
+
+    def test_override_ignores_seat_limit(self):
+        admit(self.other, self.course)
+        result = admit(self.student, self.course, check_prerequisites=False, enforce_seat_limit=False)
+        self.assertEqual(result.status, ENROLLED)
+
+    def test_enroll_view_checks_seats(self):
+        admit(self.other, self.course)
+        client = Client()
+        session = client.session
+        session['name'] = self.student.name
+        session['role'] = self.student.role
+        session.save()
+        response = client.get(reverse('enroll_course', args=[self.course.id]))
+        self.assertContains(response, 'You have been added to the waitlist')
+        self.assertFalse(Enrollment.objects.filter(student=self.student, course=self.course).exists())
+
+
+class ConcurrentAdmissionTests(TransactionTestCase):
+    SEATS = 5
+    STUDENTS = 40
+
+    def setUp(self):
+        instructor = MyUser.objects.create(name='rushinstr', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS500', title='Rush', seat_limit=self.SEATS,
+                                            instructor=instructor)
+        self.students = [MyUser.objects.create(name=f'rush{i}', password='pass', role='student')
+                         for i in range(self.STUDENTS)]
+
+    def run_concurrently(self, targets):
+        barrier = threading.Barrier(len(targets))
+        results, errors = [], []
+
+        def worker(student):
+            try:
+                barrier.wait()
+                results.append(admit(student, Course.objects.get(id=self.course.id)).status)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in targets]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_no_overbooking_under_concurrent_enrollment(self):
+        results = self.run_concurrently(self.students)
+
+        self.course.refresh_from_db()
+        self.assertEqual(results.count(ENROLLED), self.SEATS)
+        self.assertEqual(results.count(WAITLISTED), self.STUDENTS - self.SEATS)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), self.SEATS)
+        self.assertEqual(self.course.enrolled_count, self.SEATS)
+        self.assertEqual(self.course.waitlist_count, self.STUDENTS - self.SEATS)
+
+    def test_double_submit_enrolls_once(self):
+        results = self.run_concurrently([self.students[0]] * 8)
+
+        self.assertEqual(results.count(ENROLLED), 1)
+        self.assertEqual(results.count(ALREADY_ENROLLED), 7)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 1)
@@ -0,0 +1,99 @@
+import json
+from datetime import date, timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import analytics
+from ..campus import generate_campus
+from ..models import MyUser, Course, Grade, WaitlistEntry
+from ..seats import create_enrollment
+
+
+@skipUnless(analytics.available(), 'NumPy is not installed')
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='numprof', password='pass', role='instructor')
+        self.big = Course.objects.create(code='CS800', title='Big', seat_limit=4, instructor=self.instructor)
+        self.small = Course.objects.create(code='CS801', title='Small', seat_limit=10, instructor=self.instructor)
+        self.students = [MyUser.objects.create(name=f'numstudent{i}', password='pass', role='student')
+                         for i in range(4)]
+
+    def enroll(self, student, course, day, grade='n/a'):
+        return create_enrollment(student, course, date_enrolled=day, final_grade=grade)
+
+    def test_cohort_retention(self):
+        a, b, c, _ = self.students
+        # a and b start in Spring 2024; only a comes back in the fall; c starts in Fall 2024
+        self.enroll(a, self.big, date(2024, 1, 10))
+        self.enroll(a, self.small, date(2024, 2, 1))
+        self.enroll(b, self.big, date(2024, 1, 12))
+        later = Course.objects.create(code='CS802', title='Later', seat_limit=10, instructor=self.instructor)
+        self.enroll(a, later, date(2024, 9, 5))
+        self.enroll(c, self.big, date(2024, 9, 6))
+        retention = analytics.cohort_retention(analytics.load_campus(), terms=3)
+        self.assertEqual(retention, [
+            {'cohort': 'Spring 2024', 'students': 2, 'retention': [1.0, 0.0, 0.5]},
+            {'cohort': 'Fall 2024', 'students': 1, 'retention': [1.0, None, None]},
+        ])
+
+    def test_fill_rates_drops_and_grades(self):
+        opened = date(2024, 9, 1)
+        for i, student in enumerate(self.students):
+            self.enroll(student, self.big, opened + timedelta(days=7 * i), grade=['A', 'B', 'W', 'n/a'][i])
+        self.enroll(self.students[0], self.small, opened, grade='C')
+        WaitlistEntry.objects.create(student=self.students[1], course=self.small)
+        Grade.objects.create(enrollment=self.big.enrollments.first(), assignment_name='Quiz', score='100.00')
+        campus = analytics.load_campus()
+
+        fill = analytics.fill_rates(campus, weeks=4, since=opened)
+        self.assertEqual(fill[0], {'course': 'CS800', 'seat_limit': 4, 'enrolled': 4, 'waitlisted': 0,
+                                   'curve': [0.25, 0.5, 0.75, 1.0]})
+        self.assertEqual(fill[1]['waitlisted'], 1)
+
+        drops = analytics.drop_rates(campus, min_enrollments=2)
+        self.assertEqual(drops, [{'course': 'CS800', 'enrollments': 4, 'withdrawn': 1, 'rate': 0.25}])
+
+        grades = analytics.grade_distribution(campus)
+        letters = {row['grade']: row['count'] for row in grades['letters']}
+        self.assertEqual((letters['A'], letters['B'], letters['C'], letters['W']), (1, 1, 1, 1))
+        self.assertEqual(grades['scores'][-1], {'band': '90-100', 'count': 1})
+        # W and ungraded enrollments don't count toward grade points
+        self.assertEqual(grades['courses'], [{'course': 'CS800', 'graded': 2, 'gpa': 3.5},
+                                             {'course': 'CS801', 'graded': 1, 'gpa': 2.0}])
+
+    def test_weekly_trend(self):
+        monday = date(2024, 9, 2)
+        self.enroll(self.students[0], self.big, monday)
+        self.enroll(self.students[1], self.big, monday + timedelta(days=6))
+        self.enroll(self.students[2], self.big, monday + timedelta(days=14))
+        trend = analytics.weekly_trend(analytics.load_campus(), weeks=3)
+        self.assertEqual([(row['week'], row['enrollments'], row['change'], row['percent']) for row in trend], [
+            (monday, 2, 2, None),
+            (monday + timedelta(weeks=1), 0, -2, -100.0),
+            (monday + timedelta(weeks=2), 1, 1, None),
+        ])
+
+    def test_empty_campus(self):
+        results = analytics.campus_analytics()
+        self.assertEqual(results['enrollments'], 0)
+        self.assertEqual(results['retention'], [])
+        self.assertEqual(results['weekly_trend'], [])
+
+    def test_page_and_command_on_generated_campus(self):
+        generate_campus(students=60, instructors=4, admins=1, courses=20, seed=3, batch_size=100)
+        client = Client()
+        session = client.session
+        session['name'] = 'admin000'
+        session['role'] = 'administrator'
+        session.save()
+        response = client.get(reverse('report_analytics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Cohort Retention')
+
+        out = StringIO()
+        call_command('enrollment_analytics', '--json', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['enrollments'], response.context['enrollments'])
@@ -0,0 +1,59 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Q
+from django.test import TestCase
+
+from ..campus import generate_campus
+from ..models import MyUser, Course, Enrollment, WaitlistEntry, MeetingBlock, PrerequisiteClosure
+
+TODAY = date(2026, 9, 1)
+TERM_START = date(2026, 8, 2)
+
+
+class CampusGeneratorTests(TestCase):
+    def generate(self, seed=7):
+        return generate_campus(students=120, instructors=6, admins=2, courses=40, seed=seed, today=TODAY,
+                               batch_size=100)
+
+    def snapshot(self):
+        return sorted(Enrollment.objects.values_list('student__name', 'course__code', 'date_enrolled',
+                                                     'final_grade'))
+
+    def test_counts_and_derived_tables(self):
+        counts = self.generate()
+        self.assertEqual(MyUser.objects.filter(role='student').count(), 120)
+        self.assertEqual(MyUser.objects.filter(role='administrator').count(), 2)
+        self.assertEqual(Course.objects.count(), 40)
+        self.assertEqual(Enrollment.objects.count(), counts['Enrollment'])
+        self.assertTrue(MeetingBlock.objects.exists())
+        self.assertTrue(PrerequisiteClosure.objects.exists())
+
+        actual = dict(Enrollment.objects.values('course').annotate(n=Count('id')).values_list('course', 'n'))
+        for course in Course.objects.all():
+            self.assertEqual(course.enrolled_count, actual.get(course.id, 0))
+        self.assertEqual(sum(Course.objects.values_list('waitlist_count', flat=True)), WaitlistEntry.objects.count())
+
+    def test_current_term_respects_seat_limits(self):
+        self.generate()
+        current = Course.objects.annotate(current=Count('enrollments', filter=Q(enrollments__date_enrolled__gte=TERM_START)))
+        for course in current:
+            self.assertLessEqual(course.current, course.seat_limit)
+
+    def test_same_seed_same_data(self):
+        self.generate()
+        first = self.snapshot()
+        MyUser.objects.all().delete()
+        self.generate()
+        self.assertEqual(self.snapshot(), first)
+
+        MyUser.objects.all().delete()
+        self.generate(seed=8)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_command_refuses_to_seed_twice(self):
+        call_command('seed_campus', students=10, instructors=2, courses=8, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed_campus', students=10, instructors=2, courses=8, stdout=StringIO())
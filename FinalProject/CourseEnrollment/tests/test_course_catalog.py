@@ -0,0 +1,74 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import MyUser, Course, Enrollment
+from ..seats import create_enrollment
+
+
+class CourseCatalogQueryTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.student = MyUser.objects.create(name='catstudent', password='pass', role='student')
+        self.instructor = MyUser.objects.create(name='catinstructor', password='pass', role='instructor')
+        self.base = Course.objects.create(code='CS100', title='Intro', seat_limit=5, instructor=self.instructor)
+
+        session = self.client.session
+        session['name'] = self.student.name
+        session['role'] = self.student.role
+        session.save()
+        # the first request looks up and caches the logged-in user
+        self.client.get(reverse('course_catalog'))
+
+        self.next_code = 200
+
+    def add_courses(self, count):
+        # every new course has its own instructor, a prerequisite and an enrollment
+        for _ in range(count):
+            instructor = MyUser.objects.create(name=f'inst{self.next_code}', password='pass', role='instructor')
+            course = Course.objects.create(code=f'CS{self.next_code}', title=f'Course {self.next_code}',
+                                           seat_limit=10, instructor=instructor)
+            course.prerequisites.add(self.base)
+            Enrollment.objects.create(student=self.student, course=course, date_enrolled=date(2024, 1, 1))
+            self.next_code += 1
+
+    def count_catalog_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('course_catalog'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_catalog_renders_course_details(self):
+        self.add_courses(1)
+        response = self.client.get(reverse('course_catalog'))
+        self.assertContains(response, 'Course 200')
+        self.assertContains(response, 'CS100 - Intro')
+        self.assertContains(response, 'inst200')
+
+    def test_query_count_constant_as_catalog_grows(self):
+        self.add_courses(2)
+        small = self.count_catalog_queries()
+        self.add_courses(20)
+        large = self.count_catalog_queries()
+        self.assertEqual(small, large)
+
+    def test_post_rerender_query_count_constant(self):
+        self.add_courses(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(reverse('course_catalog'), {'course_id': self.base.id, 'action': 'drop'})
+        self.add_courses(20)
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(reverse('course_catalog'), {'course_id': self.base.id, 'action': 'drop'})
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_enrolled_count_displayed(self):
+        other = MyUser.objects.create(name='other', password='pass', role='student')
+        create_enrollment(other, self.base)
+        create_enrollment(self.student, self.base)
+        response = self.client.get(reverse('course_catalog'))
+        course = next(c for c in response.context['courses'] if c.id == self.base.id)
+        self.assertEqual(course.enrolled_count, 2)
+        self.assertEqual(response.context['enrollments'][0].course.enrolled_count, 2)
@@ -0,0 +1,88 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..current_user import _cache_key, forget_user, resolve_current_user
+from ..models import MyUser
+
+
+class CurrentUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.student = MyUser.objects.create(name='cachedstudent', fullName='Cached Student',
+                                             password='pass', role='student')
+        self.admin = MyUser.objects.create(name='cacheadmin', password='pass', role='administrator')
+
+    def login(self, user):
+        self.client.post(reverse('login'), {'name': user.name, 'password': user.password})
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in ctx.captured_queries
+                          if 'courseenrollment_myuser' in q['sql'].lower()]
+
+    def test_user_is_cached_between_requests(self):
+        self.login(self.student)
+        self.client.get(reverse('student_dashboard'))
+        response, queries = self.user_queries(reverse('student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_wrong_role_redirects_without_lookup(self):
+        self.login(self.student)
+        response, queries = self.user_queries(reverse('admin_dashboard'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertEqual(queries, [])
+
+    def test_admin_edit_invalidates_cached_user(self):
+        self.login(self.student)
+        self.client.get(reverse('student_dashboard'))
+
+        admin = Client()
+        admin.post(reverse('login'), {'name': self.admin.name, 'password': self.admin.password})
+        admin.post(reverse('admin_student_acct_edit'), {
+            'student_id': self.student.id, 'name': 'renamedstudent',
+            'email': 'renamed@example.com', 'password': 'pass',
+        })
+
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session['name'], 'renamedstudent')
+
+    def test_deleted_user_is_logged_out(self):
+        self.login(self.student)
+        self.client.get(reverse('student_dashboard'))
+        self.student.delete()
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+
+    def test_name_only_session_for_a_missing_user_is_logged_out(self):
+        session = self.client.session
+        session['name'] = 'nosuchstudent'
+        session['role'] = 'student'
+        session.save()
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+
+    def test_edit_from_another_process_invalidates_cached_user(self):
+        self.login(self.student)
+        self.client.get(reverse('student_dashboard'))
+        cached = cache.get(_cache_key(self.student.id))
+        self.assertEqual(cached['name'], 'cachedstudent')
+        self.assertNotIn('password', cached)
+        self.assertIn(str(connection.settings_dict['NAME']), _cache_key(self.student.id))
+
+        # what another worker's save does to the shared cache
+        MyUser.objects.filter(id=self.student.id).update(fullName='Renamed Student')
+        forget_user(self.student.id)
+        response = self.client.get(reverse('student_dashboard'))
+        self.assertEqual(response.wsgi_request.current_user.fullName, 'Renamed Student')
+
+        # a cached user comes back without the fields that aren't cached
+        user = resolve_current_user(response.wsgi_request)
+        self.assertEqual((user.id, user.name, user.role), (self.student.id, 'cachedstudent', 'student'))
+        self.assertEqual(user.get_deferred_fields(), {'password'})
@@ -1,6 +1,7 @@
 from django.test import TestCase, Client
 from django.urls import reverse
-from ..models import MyUser, Course, Enrollment
+from ..models import MyUser, Course
+from ..seats import create_enrollment
 from datetime import date
 
 class EnrollmentReportTests(TestCase):
@@ -27,10 +28,11 @@ class EnrollmentReportTests(TestCase):
             seat_limit=30
         )
 
-        Enrollment.objects.create(student=self.student1, course=self.course1, date_enrolled=date(2024, 1, 10))
-        Enrollment.objects.create(student=self.student1, course=self.course2, date_enrolled=date(2024, 2, 5))
-        Enrollment.objects.create(student=self.student2, course=self.course1, date_enrolled=date(2024, 2, 15))
+        create_enrollment(self.student1, self.course1, date_enrolled=date(2024, 1, 10))
+        create_enrollment(self.student1, self.course2, date_enrolled=date(2024, 2, 5))
+        create_enrollment(self.student2, self.course1, date_enrolled=date(2024, 2, 15))
         # log in administrator
+        MyUser.objects.create(name='Josh', password='pass', role='administrator')
         session = self.client.session
         session['name'] = 'Josh'
         session['role'] = 'administrator'
@@ -0,0 +1,152 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admission import admit
+from ..models import (MyUser, Course, WaitlistEntry, CourseEnrollmentStats, MonthlyEnrollmentStats,
+                      InstructorEnrollmentStats)
+from ..seats import create_enrollment, drop_enrollments
+from ..stats import move_course, rebuild_enrollment_stats, enrollment_trend
+from ..waitlist import promote_from_waitlist
+
+
+class EnrollmentStatsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.students = [MyUser.objects.create(name=f'statstudent{i}', password='pass', role='student')
+                         for i in range(3)]
+        self.instructor = MyUser.objects.create(name='statprof', password='pass', role='instructor')
+        self.other_instructor = MyUser.objects.create(name='otherprof', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS500', title='Compilers', seat_limit=2,
+                                            instructor=self.instructor)
+        self.other = Course.objects.create(code='CS501', title='Networks', seat_limit=5,
+                                           instructor=self.other_instructor)
+
+    def snapshot(self):
+        return (
+            dict(CourseEnrollmentStats.objects.filter(enrollments__gt=0).values_list('course_id', 'enrollments')),
+            dict(MonthlyEnrollmentStats.objects.filter(enrollments__gt=0).values_list('month', 'enrollments')),
+            dict(InstructorEnrollmentStats.objects.filter(enrollments__gt=0)
+                 .values_list('instructor_id', 'enrollments')),
+        )
+
+    def assertMatchesRebuild(self):
+        maintained = self.snapshot()
+        rebuild_enrollment_stats()
+        self.assertEqual(maintained, self.snapshot())
+
+    def test_enroll_drop_and_promote_keep_stats_current(self):
+        create_enrollment(self.students[0], self.course, date_enrolled=date(2024, 1, 10))
+        create_enrollment(self.students[0], self.other, date_enrolled=date(2024, 2, 5))
+        admit(self.students[1], self.course)
+        WaitlistEntry.objects.create(student=self.students[2], course=self.course)
+        self.assertMatchesRebuild()
+
+        drop_enrollments(self.course.enrollments.filter(student=self.students[0]))
+        promote_from_waitlist(self.course)
+        self.assertEqual(self.snapshot()[0], {self.course.id: 2, self.other.id: 1})
+        self.assertMatchesRebuild()
+
+    def test_date_edit_moves_month(self):
+        enrollment = create_enrollment(self.students[0], self.course, date_enrolled=date(2024, 1, 10))
+        MyUser.objects.create(name='admin', password='pass', role='administrator')
+        session = self.client.session
+        session['name'] = 'admin'
+        session['role'] = 'administrator'
+        session.save()
+        self.client.post(reverse('admin_edit_enrollment'), {
+            'student_id': self.students[0].id,
+            f'grade_{enrollment.id}': 'A',
+            f'date_{enrollment.id}': '2024-03-02',
+        })
+        self.assertEqual(self.snapshot()[1], {date(2024, 3, 1): 1})
+        self.assertMatchesRebuild()
+
+    def test_course_changing_hands_moves_instructor_totals(self):
+        create_enrollment(self.students[0], self.course)
+        create_enrollment(self.students[1], self.course)
+        Course.objects.filter(id=self.course.id).update(instructor=self.other_instructor)
+        move_course(self.course.id, self.instructor.id, self.other_instructor.id)
+        self.assertEqual(self.snapshot()[2], {self.other_instructor.id: 2})
+        self.assertMatchesRebuild()
+
+    def test_rebuild_command_repairs_cascade_drift(self):
+        create_enrollment(self.students[0], self.course)
+        create_enrollment(self.students[1], self.course)
+        self.students[0].delete()
+        self.assertEqual(self.snapshot()[0], {self.course.id: 2})
+        out = StringIO()
+        call_command('rebuild_enrollment_stats', stdout=out)
+        self.assertIn('1 course(s), 1 month(s)', out.getvalue())
+        self.assertEqual(self.snapshot()[0], {self.course.id: 1})
+
+    def test_report_reads_stats_not_enrollments(self):
+        for student in self.students:
+            create_enrollment(student, self.other, date_enrolled=date(2024, 5, 1))
+        MyUser.objects.create(name='admin', password='pass', role='administrator')
+        session = self.client.session
+        session['name'] = 'admin'
+        session['role'] = 'administrator'
+        session.save()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('enrollment_report_generator'))
+        self.assertEqual(response.context['total_enrollments'], 3)
+        self.assertEqual(response.context['top_course'], self.other)
+        self.assertContains(response, '2024-05')
+        self.assertFalse(any('courseenrollment_enrollment' in q['sql'].lower() for q in ctx.captured_queries))
+
+
+class EnrollmentTrendTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='trendprof', password='pass', role='instructor')
+        course = Course.objects.create(code='CS600', title='Theory', seat_limit=50, instructor=self.instructor)
+        days = [date(2024, 1, 8), date(2024, 1, 10), date(2024, 1, 29), date(2024, 4, 30),
+                date(2024, 5, 1), date(2024, 9, 3), date(2025, 1, 2)]
+        for i, day in enumerate(days):
+            student = MyUser.objects.create(name=f'trendstudent{i}', password='pass', role='student')
+            create_enrollment(student, course, date_enrolled=day)
+
+    def totals(self, *args):
+        return [(row['label'], row['total']) for row in enrollment_trend(*args)]
+
+    def test_granularities(self):
+        self.assertEqual(self.totals('day')[:2], [('2024-01-08', 1), ('2024-01-10', 1)])
+        self.assertEqual(self.totals('week')[:2], [('Week of 2024-01-08', 2), ('Week of 2024-01-29', 1)])
+        self.assertEqual(self.totals('month'), [('2024-01', 3), ('2024-04', 1), ('2024-05', 1), ('2024-09', 1),
+                                                ('2025-01', 1)])
+        self.assertEqual(self.totals('term'), [('Spring 2024', 4), ('Summer 2024', 1), ('Fall 2024', 1),
+                                               ('Spring 2025', 1)])
+
+    def test_partial_months_match_the_rollup(self):
+        # whole months come from the statistics table, anything else from the enrollment table
+        self.assertEqual(self.totals('month', date(2024, 1, 1), date(2024, 4, 30)), [('2024-01', 3), ('2024-04', 1)])
+        self.assertEqual(self.totals('month', date(2024, 1, 9), date(2024, 4, 30)), [('2024-01', 2), ('2024-04', 1)])
+        self.assertEqual(self.totals('term', date(2024, 4, 30), date(2024, 5, 1)),
+                         [('Spring 2024', 1), ('Summer 2024', 1)])
+
+    def test_range_query_is_portable(self):
+        with CaptureQueriesContext(connection) as ctx:
+            enrollment_trend('week', date(2024, 1, 1), date(2024, 12, 31))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('strftime', ctx.captured_queries[0]['sql'].lower())
+
+    def test_unknown_granularity(self):
+        with self.assertRaises(ValueError):
+            enrollment_trend('year')
+
+    def test_report_page_filters(self):
+        MyUser.objects.create(name='admin', password='pass', role='administrator')
+        session = self.client.session
+        session['name'] = 'admin'
+        session['role'] = 'administrator'
+        session.save()
+        response = self.client.get(reverse('enrollment_report_generator'),
+                                   {'granularity': 'term', 'start': '2024-01-01', 'end': 'not a date'})
+        self.assertEqual(response.context['granularity'], 'term')
+        self.assertEqual(response.context['end'], None)
+        self.assertContains(response, 'Fall 2024')
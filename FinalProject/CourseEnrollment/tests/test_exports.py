@@ -0,0 +1,89 @@
+import csv
+import json
+from datetime import date, timedelta
+from io import StringIO
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import exports
+from ..exports import export_lines
+from ..models import MyUser, Course, Grade, WaitlistEntry
+from ..seats import create_enrollment
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.instructor = MyUser.objects.create(name='exportprof', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS700', title='Exports', seat_limit=50, instructor=self.instructor)
+        self.other = Course.objects.create(code='CS701', title='Others', seat_limit=50, instructor=self.instructor)
+        self.students = [MyUser.objects.create(name=f'exporter{i}', fullName=f'Exporter {i}', password='pass',
+                                               role='student', email=f'e{i}@example.com') for i in range(5)]
+        for i, student in enumerate(self.students):
+            enrollment = create_enrollment(student, self.course, date_enrolled=date(2024, 1, 1) + timedelta(days=i))
+            Grade.objects.create(enrollment=enrollment, assignment_name='Quiz', score='91.50')
+        create_enrollment(self.students[0], self.other, date_enrolled=date(2024, 3, 1))
+        for i, student in enumerate(self.students[:2]):
+            WaitlistEntry.objects.create(student=student, course=self.other,
+                                         timestamp=timezone.now() + timedelta(minutes=i))
+
+        MyUser.objects.create(name='admin', password='pass', role='administrator')
+        session = self.client.session
+        session['name'] = 'admin'
+        session['role'] = 'administrator'
+        session.save()
+
+    def download(self, dataset, **params):
+        response = self.client.get(reverse('report_export', args=[dataset]), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_enrollments_csv_with_date_range(self):
+        rows = list(csv.DictReader(StringIO(self.download('enrollments', start='2024-01-02', end='2024-01-04'))))
+        self.assertEqual([row['student'] for row in rows], ['exporter1', 'exporter2', 'exporter3'])
+        self.assertEqual(rows[0]['date_enrolled'], '2024-01-02')
+
+    def test_roster_jsonl(self):
+        lines = self.download('roster', format='jsonl', course='CS701').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{
+            'student': 'exporter0', 'student_name': 'Exporter 0', 'email': 'e0@example.com',
+            'date_enrolled': '2024-03-01', 'final_grade': 'n/a',
+        }])
+
+    def test_grades_and_waitlist(self):
+        grades = list(csv.DictReader(StringIO(self.download('grades', course='CS700'))))
+        self.assertEqual(len(grades), 5)
+        self.assertEqual(grades[0]['score'], '91.50')
+        waitlist = [json.loads(line) for line in self.download('waitlist', format='jsonl').splitlines()]
+        self.assertEqual([(row['student'], row['position']) for row in waitlist], [('exporter0', 1), ('exporter1', 2)])
+
+    def test_rows_are_fetched_in_chunks(self):
+        original = exports.CHUNK_SIZE
+        exports.CHUNK_SIZE = 2
+        try:
+            lines = export_lines('enrollments', 'csv')
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertTrue(next(lines).startswith('id,student'))
+            self.assertEqual(len(ctx.captured_queries), 0)  # the header goes out before any query
+            self.assertEqual(len(list(lines)), 6)
+        finally:
+            exports.CHUNK_SIZE = original
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(reverse('report_export', args=['roster'])).status_code, 400)
+        self.assertEqual(self.client.get(reverse('report_export', args=['enrollments']),
+                                         {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('report_export', args=['passwords'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('report_export', args=['roster']),
+                                         {'course': 'NOPE'}).status_code, 404)
+
+    def test_requires_administrator(self):
+        session = self.client.session
+        session['role'] = 'student'
+        session.save()
+        response = self.client.get(reverse('report_export', args=['enrollments']))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
@@ -0,0 +1,98 @@
+from decimal import Decimal
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..gradebook import Cell, save_grades
+from ..models import MyUser, Course, Enrollment, Grade
+
+
+class GradebookTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='gradeprof', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS800', title='Grading', seat_limit=500,
+                                            instructor=self.instructor)
+        students = MyUser.objects.bulk_create([MyUser(name=f'gradestudent{i:03d}', password='pass', role='student')
+                                               for i in range(300)])
+        self.enrollments = Enrollment.objects.bulk_create([Enrollment(student=s, course=self.course)
+                                                           for s in students])
+        self.client = Client()
+        session = self.client.session
+        session['name'] = 'gradeprof'
+        session['role'] = 'instructor'
+        session.save()
+        self.url = reverse('gradebook', args=[self.course.id])
+
+    def column(self, scores):
+        data = {'assignment': 'Midterm'}
+        for enrollment, score in zip(self.enrollments, scores):
+            data[f'score_{enrollment.id}'] = score
+            data[f'feedback_{enrollment.id}'] = ''
+        return data
+
+    def test_whole_column_in_one_request(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, self.column(['85'] * 300))
+        self.assertContains(response, 'Saved: 300 new, 0 changed, 0 unchanged.')
+        self.assertEqual(Grade.objects.filter(assignment_name='Midterm', score=85).count(), 300)
+        # the grades, then the category totals and final scores (SQLite splits the bigger writes)
+        self.assertLess(len(ctx.captured_queries), 25)
+
+        # only the changed cells are written the second time
+        scores = ['85'] * 300
+        scores[0], scores[1] = '90', ''
+        response = self.client.post(self.url, self.column(scores))
+        self.assertContains(response, 'Saved: 0 new, 1 changed, 298 unchanged.')
+        self.assertEqual(Grade.objects.get(enrollment=self.enrollments[0]).score, Decimal('90.00'))
+        self.assertEqual(Grade.objects.get(enrollment=self.enrollments[1]).score, Decimal('85.00'))
+
+    def test_invalid_cells_are_reported_and_the_rest_saved(self):
+        response = self.client.post(self.url, self.column(['abc', '-1', '1000', '77.5']))
+        self.assertContains(response, 'Saved: 1 new, 0 changed, 0 unchanged.')
+        self.assertEqual(len(response.context['result'].errors), 3)
+        self.assertContains(response, 'gradestudent000')
+        self.assertEqual(Grade.objects.get().score, Decimal('77.50'))
+
+    def test_csv_upload(self):
+        Grade.objects.create(enrollment=self.enrollments[0], assignment_name='Quiz', score=50, feedback='Late')
+        upload = SimpleUploadedFile('grades.csv', (
+            'student,assignment,score,feedback\n'
+            'gradestudent000,Quiz,60,Regraded\n'
+            'gradestudent001,Quiz,70,\n'
+            'gradestudent001,Homework,95,Nice\n'
+            'nobody,Quiz,80,\n'
+            'gradestudent002,Quiz,80,\n'
+            'gradestudent002,Quiz,81,\n'
+        ).encode(), content_type='text/csv')
+        response = self.client.post(self.url, {'csv_file': upload})
+        result = response.context['result']
+        self.assertEqual((result.created, result.updated), (3, 1))
+        self.assertEqual([error.row for error in result.errors], [5, 7])
+        self.assertEqual(Grade.objects.get(enrollment=self.enrollments[0]).feedback, 'Regraded')
+
+    def test_csv_without_assignment(self):
+        upload = SimpleUploadedFile('grades.csv', b'student,score\ngradestudent000,60\n', content_type='text/csv')
+        response = self.client.post(self.url, {'csv_file': upload})
+        self.assertContains(response, 'missing the column(s): assignment')
+        self.assertFalse(Grade.objects.exists())
+
+    def test_feedback_left_alone_when_not_given(self):
+        Grade.objects.create(enrollment=self.enrollments[0], assignment_name='Quiz', score=50, feedback='Keep me')
+        result = save_grades(self.course, [Cell(None, self.enrollments[0].id, None, 'Quiz', '55', None)])
+        self.assertEqual(result.updated, 1)
+        grade = Grade.objects.get()
+        self.assertEqual((grade.score, grade.feedback), (Decimal('55.00'), 'Keep me'))
+
+    def test_other_instructors_course(self):
+        other = MyUser.objects.create(name='otherprof', password='pass', role='instructor')
+        Course.objects.filter(id=self.course.id).update(instructor=other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_column_page(self):
+        Grade.objects.create(enrollment=self.enrollments[0], assignment_name='Quiz', score=42)
+        response = self.client.get(self.url, {'assignment': 'Quiz'})
+        self.assertContains(response, 'value="42.00"')
+        self.assertEqual(response.context['assignments'], ['Quiz'])
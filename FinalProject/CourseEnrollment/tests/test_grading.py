@@ -0,0 +1,241 @@
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import grading
+from ..gradebook import Cell, save_grades
+from ..history import apply_enrollment_edits
+from ..models import MyUser, Course, Enrollment, Grade, GradeCategory, CategoryScore, StudentGPA
+from ..seats import drop_enrollments
+
+
+class GradingTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='gradingprof', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS810', title='Weights', seat_limit=50, instructor=self.instructor)
+        self.students = MyUser.objects.bulk_create([MyUser(name=f'scored{i}', password='pass', role='student')
+                                                    for i in range(3)])
+        self.enrollments = Enrollment.objects.bulk_create([Enrollment(student=s, course=self.course)
+                                                           for s in self.students])
+
+    def grade(self, enrollment, assignment, score):
+        return save_grades(self.course, [Cell(None, enrollment.id, None, assignment, str(score), None)])
+
+    def score(self, enrollment):
+        enrollment.refresh_from_db()
+        return enrollment.final_score, enrollment.score_letter
+
+    def weighted_scheme(self):
+        """Homework 40, Exams 60."""
+        grading.save_scheme(self.course, [(None, 'Homework', '40', False), (None, 'Exams', '60', False)], {})
+        categories = dict(GradeCategory.objects.values_list('name', 'id'))
+        grading.save_scheme(self.course, [(categories['Homework'], 'Homework', '40', False),
+                                          (categories['Exams'], 'Exams', '60', False)],
+                            {'HW1': categories['Homework'], 'HW2': categories['Homework'],
+                             'Midterm': categories['Exams']})
+        return categories
+
+    def test_plain_mean_without_categories(self):
+        first = self.enrollments[0]
+        self.grade(first, 'Quiz', 90)
+        self.assertEqual(self.score(first), (Decimal('90.00'), 'A-'))
+        self.grade(first, 'Essay', 75)
+        self.assertEqual(self.score(first), (Decimal('82.50'), 'B-'))
+        self.grade(first, 'Essay', 96)
+        self.assertEqual(self.score(first), (Decimal('93.00'), 'A'))
+        self.assertEqual(self.score(self.enrollments[1]), (None, ''))
+
+    def test_weighted_categories(self):
+        self.weighted_scheme()
+        first = self.enrollments[0]
+        self.grade(first, 'HW1', 100)
+        # only homework so far: the weights are renormalized over the graded categories
+        self.assertEqual(self.score(first), (Decimal('100.00'), 'A'))
+        self.grade(first, 'HW2', 80)
+        self.grade(first, 'Midterm', 70)
+        # 0.4 * 90 + 0.6 * 70
+        self.assertEqual(self.score(first), (Decimal('78.00'), 'C+'))
+
+    def test_a_grade_change_only_touches_its_enrollment(self):
+        self.weighted_scheme()
+        for enrollment in self.enrollments:
+            self.grade(enrollment, 'HW1', 80)
+        second = self.enrollments[1]
+        with CaptureQueriesContext(connection) as ctx:
+            self.grade(self.enrollments[0], 'HW1', 95)
+        self.assertFalse(any('"CourseEnrollment_grade"."score"' in q['sql'] and 'SUM' in q['sql']
+                             for q in ctx.captured_queries))
+        self.assertEqual(self.score(self.enrollments[0]), (Decimal('95.00'), 'A'))
+        self.assertEqual(self.score(second), (Decimal('80.00'), 'B-'))
+
+    def test_incremental_matches_recompute(self):
+        self.weighted_scheme()
+        scores = [('HW1', 71.5), ('HW2', 88), ('Midterm', 64.25), ('Extra', 100), ('HW1', 90)]
+        for i, enrollment in enumerate(self.enrollments):
+            for assignment, score in scores[i:]:
+                self.grade(enrollment, assignment, score)
+        incremental = {e.id: self.score(e) for e in self.enrollments}
+        totals = set(CategoryScore.objects.values_list('enrollment_id', 'category_id', 'total', 'count'))
+
+        grading.recompute_course(self.course)
+        self.assertEqual({e.id: self.score(e) for e in self.enrollments}, incremental)
+        self.assertEqual(set(CategoryScore.objects.values_list('enrollment_id', 'category_id', 'total', 'count')),
+                         {row for row in totals if row[3]})
+
+        with mock.patch.object(grading, 'np', None):
+            grading.recompute_course(self.course)
+        self.assertEqual({e.id: self.score(e) for e in self.enrollments}, incremental)
+
+    @skipIf(grading.np is None, "NumPy is not installed")
+    def test_numpy_totals_match_the_loop(self):
+        categories = self.weighted_scheme()
+        grades = [(e.id, name, Decimal(score)) for e in self.enrollments
+                  for name, score in [('HW1', '10.01'), ('HW2', '99.99'), ('Midterm', '55.55'), ('Other', '1')]]
+        ids = [e.id for e in self.enrollments]
+        mapping = {'HW1': categories['Homework'], 'HW2': categories['Homework'], 'Midterm': categories['Exams']}
+        vectorized = grading._course_totals(ids, grades, mapping)
+        with mock.patch.object(grading, 'np', None):
+            self.assertEqual(grading._course_totals(ids, grades, mapping), vectorized)
+
+    def test_changing_weights_recomputes_the_course(self):
+        categories = self.weighted_scheme()
+        first = self.enrollments[0]
+        self.grade(first, 'HW1', 100)
+        self.grade(first, 'Midterm', 50)
+        self.assertEqual(self.score(first), (Decimal('70.00'), 'C-'))
+        problems = grading.save_scheme(self.course, [(categories['Homework'], 'Homework', '50', False),
+                                                     (categories['Exams'], 'Exams', '50', False)], {})
+        self.assertEqual(problems, [])
+        self.assertEqual(self.score(first), (Decimal('75.00'), 'C'))
+
+        # dropping the exam category leaves only homework counting
+        grading.save_scheme(self.course, [(categories['Homework'], 'Homework', '50', False),
+                                          (categories['Exams'], 'Exams', '50', True)], {})
+        self.assertEqual(self.score(first), (Decimal('100.00'), 'A'))
+
+    def test_invalid_scheme_saves_nothing(self):
+        problems = grading.save_scheme(self.course, [(None, 'Labs', 'lots', False), (None, 'Quizzes', '10', False)],
+                                       {})
+        self.assertEqual(len(problems), 1)
+        self.assertFalse(GradeCategory.objects.exists())
+
+    def test_swapping_category_names(self):
+        categories = self.weighted_scheme()
+        grading.save_scheme(self.course, [(categories['Homework'], 'Exams', '60', False),
+                                          (categories['Exams'], 'Homework', '40', False)], {})
+        self.assertEqual(dict(GradeCategory.objects.values_list('id', 'name')),
+                         {categories['Homework']: 'Exams', categories['Exams']: 'Homework'})
+
+    def test_post_final_grades_and_gpa(self):
+        first, second, third = self.enrollments
+        self.grade(first, 'Quiz', 95)
+        self.grade(second, 'Quiz', 81)
+        Enrollment.objects.filter(id=third.id).update(final_grade='W')
+        self.grade(third, 'Quiz', 50)
+
+        self.assertEqual(grading.post_final_grades(self.course), 2)
+        self.assertEqual(list(Enrollment.objects.order_by('id').values_list('final_grade', flat=True)),
+                         ['A', 'B-', 'W'])
+        self.assertEqual(grading.student_gpa(self.students[0]), Decimal('4.00'))
+        self.assertIsNone(grading.student_gpa(self.students[2]))
+
+        other = Course.objects.create(code='CS811', title='Other', seat_limit=5, instructor=self.instructor)
+        extra = Enrollment.objects.create(student=self.students[0], course=other)
+        apply_enrollment_edits({extra.id: ('C', None)})
+        self.assertEqual(grading.student_gpa(self.students[0]), Decimal('3.00'))
+
+        drop_enrollments(Enrollment.objects.filter(id=extra.id))
+        self.assertEqual(grading.student_gpa(self.students[0]), Decimal('4.00'))
+
+        StudentGPA.objects.update(grade_points=0, courses=0)
+        call_command('rebuild_grades', stdout=mock.Mock())
+        self.assertEqual(grading.student_gpa(self.students[0]), Decimal('4.00'))
+        self.assertEqual(grading.student_gpa(self.students[1]), Decimal('2.70'))
+
+    def test_rebuild_repairs_scores(self):
+        self.grade(self.enrollments[0], 'Quiz', 88)
+        Grade.objects.filter(enrollment=self.enrollments[0]).update(score=60)
+        grading.rebuild_grades()
+        self.assertEqual(self.score(self.enrollments[0]), (Decimal('60.00'), 'D-'))
+
+    def test_rebuild_matches_recompute_course(self):
+        self.weighted_scheme()
+        other = Course.objects.create(code='CS812', title='Plain', seat_limit=5, instructor=self.instructor)
+        extra = Enrollment.objects.create(student=self.students[0], course=other)
+        save_grades(other, [Cell(None, extra.id, None, 'Quiz', '77', None)])
+        for enrollment, score in zip(self.enrollments, [55, 81.5, 99]):
+            self.grade(enrollment, 'HW1', score)
+            self.grade(enrollment, 'Midterm', score - 10)
+        for course in (self.course, other):
+            grading.recompute_course(course)
+        expected = set(Enrollment.objects.values_list('id', 'final_score', 'score_letter'))
+        rows = set(CategoryScore.objects.values_list('enrollment_id', 'category_id', 'total', 'count'))
+
+        # stale scores everywhere, and one on an enrollment whose grades are gone
+        Grade.objects.filter(enrollment=self.enrollments[2]).delete()
+        Enrollment.objects.update(final_score=1, score_letter='F')
+        CategoryScore.objects.all().delete()
+        # the same handful of queries however many courses there are
+        with self.assertNumQueries(13):
+            grading.rebuild_grades()
+        expected = {row if row[0] != self.enrollments[2].id else (row[0], None, '') for row in expected}
+        self.assertEqual(set(Enrollment.objects.values_list('id', 'final_score', 'score_letter')), expected)
+        self.assertEqual(set(CategoryScore.objects.values_list('enrollment_id', 'category_id', 'total', 'count')),
+                         {row for row in rows if row[0] != self.enrollments[2].id})
+
+
+class GradingSchemePageTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='schemeprof', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS820', title='Scheme', seat_limit=5, instructor=self.instructor)
+        student = MyUser.objects.create(name='schemestudent', password='pass', role='student')
+        self.enrollment = Enrollment.objects.create(student=student, course=self.course)
+        save_grades(self.course, [Cell(None, self.enrollment.id, None, 'Lab', '90', None),
+                                  Cell(None, self.enrollment.id, None, 'Final', '70', None)])
+        self.client = Client()
+        session = self.client.session
+        session['name'] = 'schemeprof'
+        session['role'] = 'instructor'
+        session.save()
+        self.url = reverse('grading-scheme', args=[self.course.id])
+
+    def test_edit_scheme_and_post(self):
+        self.assertContains(self.client.get(self.url), '80.00')
+        self.client.post(self.url, {'action': 'save', 'category_id': [''], 'category_name': ['Labs'],
+                                    'category_weight': ['25']})
+        labs = GradeCategory.objects.get()
+        response = self.client.post(self.url, {
+            'action': 'save',
+            'category_id': [labs.id, ''], 'category_name': ['Labs', 'Exams'], 'category_weight': ['25', ''],
+            'assignment_name': ['Final', 'Lab'], 'assignment_category': ['', labs.id],
+        })
+        self.assertContains(response, 'must be a number')
+
+        self.client.post(self.url, {
+            'action': 'save',
+            'category_id': [labs.id, ''], 'category_name': ['Labs', 'Exams'], 'category_weight': ['25', '75'],
+            'assignment_name': ['Final', 'Lab'], 'assignment_category': ['', labs.id],
+        })
+        exams = GradeCategory.objects.get(name='Exams')
+        self.client.post(self.url, {
+            'action': 'save',
+            'category_id': [labs.id, exams.id], 'category_name': ['Labs', 'Exams'], 'category_weight': ['25', '75'],
+            'assignment_name': ['Final', 'Lab'], 'assignment_category': [exams.id, labs.id],
+        })
+        self.enrollment.refresh_from_db()
+        self.assertEqual((self.enrollment.final_score, self.enrollment.score_letter), (Decimal('75.00'), 'C'))
+
+        response = self.client.post(self.url, {'action': 'post'})
+        self.assertContains(response, 'Posted 1 final grade(s).')
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.final_grade, 'C')
+
+    def test_other_instructors_course(self):
+        other = MyUser.objects.create(name='otherschemeprof', password='pass', role='instructor')
+        Course.objects.filter(id=self.course.id).update(instructor=other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..history import apply_enrollment_edits, edits_from_post
+from ..models import MyUser, Course, Enrollment, MonthlyEnrollmentStats
+from ..seats import create_enrollment
+from ..stats import rebuild_enrollment_stats
+
+
+class EnrollmentEditTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='histprof', password='pass', role='instructor')
+        self.student = MyUser.objects.create(name='histstudent', password='pass', role='student')
+        self.other = MyUser.objects.create(name='otherstudent', password='pass', role='student')
+        self.courses = [Course.objects.create(code=f'HS{i:03d}', title=f'History {i}', seat_limit=5,
+                                              instructor=self.instructor) for i in range(40)]
+        old = date.today() - timedelta(days=400)
+        self.enrollments = [create_enrollment(self.student, course, date_enrolled=old, final_grade='B')
+                            for course in self.courses]
+        self.client = Client()
+        admin = MyUser.objects.create(name='historyadmin', password='pass', role='administrator')
+        session = self.client.session
+        session['user_id'] = admin.id  # as the login view sets it, so requests don't write the session
+        session['name'] = 'historyadmin'
+        session['role'] = 'administrator'
+        session.save()
+
+    def post(self, data):
+        return self.client.post(reverse('admin_edit_enrollment'), dict(data, student_id=self.student.id))
+
+    def form(self, enrollments):
+        return {key: value for e in enrollments
+                for key, value in ((f'grade_{e.id}', e.final_grade), (f'date_{e.id}', e.date_enrolled.isoformat()))}
+
+    def test_only_changed_rows_are_written(self):
+        data = self.form(self.enrollments)
+        data[f'grade_{self.enrollments[3].id}'] = 'A'
+        data[f'grade_{self.enrollments[7].id}'] = 'C+'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post(data)
+        self.assertEqual(len(response.context['past_enrollments']), 40)
+        self.assertEqual(dict(Enrollment.objects.exclude(final_grade='B').values_list('id', 'final_grade')),
+                         {self.enrollments[3].id: 'A', self.enrollments[7].id: 'C+'})
+        enrollment_reads = [q for q in ctx.captured_queries
+                            if q['sql'].startswith('SELECT') and 'courseenrollment_enrollment' in q['sql'].lower()]
+        self.assertEqual(len(enrollment_reads), 1)
+        updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+
+    def test_nothing_changed_writes_nothing(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.post(self.form(self.enrollments))
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')])
+
+    def test_date_moves_current_and_past_and_the_statistics(self):
+        today = date.today()
+        data = {f'date_{self.enrollments[0].id}': today.isoformat()}
+        response = self.post(data)
+        self.assertEqual([e.id for e in response.context['current_enrollments']], [self.enrollments[0].id])
+        # a date without its grade field leaves the grade alone
+        self.assertEqual(Enrollment.objects.get(id=self.enrollments[0].id).final_grade, 'B')
+        maintained = dict(MonthlyEnrollmentStats.objects.filter(enrollments__gt=0)
+                          .values_list('month', 'enrollments'))
+        rebuild_enrollment_stats()
+        self.assertEqual(maintained, dict(MonthlyEnrollmentStats.objects.filter(enrollments__gt=0)
+                                          .values_list('month', 'enrollments')))
+        self.assertEqual(maintained[today.replace(day=1)], 1)
+
+    def test_several_students_at_once(self):
+        theirs = create_enrollment(self.other, self.courses[0], final_grade='B')
+        result = apply_enrollment_edits(edits_from_post({
+            f'grade_{self.enrollments[0].id}': 'A',
+            f'grade_{theirs.id}': 'A-',
+            f'date_{theirs.id}': 'next tuesday',
+        }))
+        self.assertEqual(len(result.changed), 2)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(Enrollment.objects.get(id=theirs.id).final_grade, 'A-')
+
+    def test_blank_grade_clears_it(self):
+        self.post({f'grade_{self.enrollments[0].id}': ''})
+        self.assertIsNone(Enrollment.objects.get(id=self.enrollments[0].id).final_grade)
@@ -0,0 +1,170 @@
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..imports import run_import
+from ..models import (MyUser, Course, Enrollment, MeetingBlock, CourseEnrollmentStats, MonthlyEnrollmentStats,
+                      InstructorEnrollmentStats)
+from ..prerequisites import all_prerequisites
+from ..stats import rebuild_enrollment_stats
+
+
+def csv_file(*lines):
+    return StringIO('\n'.join(lines) + '\n')
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='importprof', password='pass', role='instructor')
+        self.student = MyUser.objects.create(name='importstudent', password='pass', role='student')
+        self.course = Course.objects.create(code='CS100', title='Intro', seat_limit=10, instructor=self.instructor)
+
+    def test_users_with_row_errors(self):
+        result = run_import('users', csv_file(
+            'name,password,role,full_name,email',
+            'ada,secret,student,Ada Lovelace,ada@example.com',
+            'importstudent,secret,student,,',
+            'ada,secret,student,,',
+            'grace,secret,janitor,,',
+            'alan,,student,,',
+            'edsger,secret,instructor,,not-an-email',
+            'barbara,secret,instructor,Barbara Liskov,',
+        ))
+        self.assertEqual(result.created, 2)
+        self.assertEqual([error.line for error in result.errors], [3, 4, 5, 6, 7])
+        self.assertIn('already taken', result.errors[0].message)
+        self.assertEqual(MyUser.objects.get(name='ada').fullName, 'Ada Lovelace')
+        self.assertEqual(MyUser.objects.get(name='barbara').role, 'instructor')
+
+    def test_missing_column(self):
+        with self.assertRaisesMessage(ValueError, 'role'):
+            run_import('users', csv_file('name,password', 'ada,secret'))
+
+    def test_courses_resolve_instructors_and_prerequisites(self):
+        result = run_import('courses', csv_file(
+            'code,title,seat_limit,instructor,meeting_times,waitlist_enabled,prerequisites',
+            'CS200,Data Structures,30,importprof,MWF 9-10AM,yes,CS100',
+            'CS300,Algorithms,25,newprof,TTh 11-12:15PM,no,CS200; CS100',
+            'CS400,Theory,20,newprof,,,CS500',
+            'CS500,Logic,20,importstudent,,,',
+            'CS600,Compilers,0,importprof,,,',
+            'CS100,Duplicate,20,importprof,,,',
+        ), batch_size=2)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([error.line for error in result.errors], [4, 5, 6, 7])
+        self.assertIn('unknown prerequisite', result.errors[0].message)
+        self.assertIn('not an instructor', result.errors[1].message)
+
+        newprof = MyUser.objects.get(name='newprof')
+        self.assertEqual(newprof.role, 'instructor')
+        algorithms = Course.objects.get(code='CS300')
+        self.assertEqual(algorithms.instructor, newprof)
+        self.assertFalse(algorithms.waitlist_enabled)
+        self.assertEqual(set(all_prerequisites(algorithms).values_list('code', flat=True)), {'CS100', 'CS200'})
+        self.assertEqual(MeetingBlock.objects.filter(course=algorithms).count(), 2)
+
+    def test_enrollments_update_counters_and_stats(self):
+        other = Course.objects.create(code='CS101', title='Intro II', seat_limit=10, instructor=self.instructor)
+        MyUser.objects.bulk_create([MyUser(name=f'bulkstudent{i}', password='pass', role='student')
+                                    for i in range(5)])
+        result = run_import('enrollments', csv_file(
+            'student,course,date_enrolled,final_grade',
+            'bulkstudent0,CS100,2024-01-15,A',
+            'bulkstudent1,CS100,2024-02-01,',
+            'bulkstudent2,CS101,,',
+            'bulkstudent0,CS100,2024-01-15,B',
+            'importprof,CS100,,',
+            'bulkstudent3,CS999,,',
+            'bulkstudent4,CS100,yesterday,',
+        ))
+        self.assertEqual(result.created, 3)
+        self.assertEqual([error.line for error in result.errors], [5, 6, 7, 8])
+        self.assertEqual(Enrollment.objects.get(student__name='bulkstudent1').final_grade, 'n/a')
+
+        self.course.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.course.enrolled_count, other.enrolled_count), (2, 1))
+        maintained = self.stats()
+        rebuild_enrollment_stats()
+        self.assertEqual(maintained, self.stats())
+        self.assertEqual(maintained[1][date(2024, 1, 1)], 1)
+
+    def stats(self):
+        return (dict(CourseEnrollmentStats.objects.values_list('course_id', 'enrollments')),
+                dict(MonthlyEnrollmentStats.objects.values_list('month', 'enrollments')),
+                dict(InstructorEnrollmentStats.objects.values_list('instructor_id', 'enrollments')))
+
+    def test_existing_enrollment_is_rejected(self):
+        Enrollment.objects.create(student=self.student, course=self.course)
+        result = run_import('enrollments', csv_file('student,course', 'importstudent,CS100'))
+        self.assertEqual((result.created, result.failed), (0, 1))
+        self.assertIn('already enrolled', result.errors[0].message)
+
+    def test_dry_run_writes_nothing(self):
+        result = run_import('users', csv_file('name,password,role', 'ada,secret,student'), dry_run=True)
+        self.assertEqual(result.created, 1)
+        self.assertFalse(MyUser.objects.filter(name='ada').exists())
+
+    def test_queries_do_not_grow_with_rows(self):
+        MyUser.objects.bulk_create([MyUser(name=f'bulkstudent{i}', password='pass', role='student')
+                                    for i in range(400)])
+
+        def queries(count):
+            rows = ['student,course,date_enrolled'] + [f'bulkstudent{i},CS100,2024-03-0{1 + i % 5}'
+                                                      for i in range(count)]
+            Enrollment.objects.all().delete()
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(run_import('enrollments', csv_file(*rows)).created, count)
+            # the INSERTs themselves are split by the backend's limit on query parameters
+            return len([q for q in ctx.captured_queries if not q['sql'].startswith('INSERT')])
+
+        queries(40)  # the first import also creates the statistics rows
+        self.assertEqual(queries(40), queries(400))
+
+
+class ImportCommandTests(TestCase):
+    def test_command_reports_rejected_rows(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write('name,password,role\nada,secret,student\n,secret,student\n')
+        self.addCleanup(os.remove, file.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_users', file.name, stdout=out, stderr=err)
+        self.assertIn('Imported 1 users, rejected 1 row(s)', out.getvalue())
+        self.assertIn('line 3: name must be', err.getvalue())
+
+    def test_command_rejects_bad_file(self):
+        with self.assertRaises(CommandError):
+            call_command('import_courses', '/nonexistent/courses.csv')
+
+
+class AdminImportViewTests(TestCase):
+    def setUp(self):
+        MyUser.objects.create(name='admin', password='pass', role='administrator')
+        self.client = Client()
+        session = self.client.session
+        session['name'] = 'admin'
+        session['role'] = 'administrator'
+        session.save()
+
+    def test_upload(self):
+        upload = SimpleUploadedFile('users.csv', b'\xef\xbb\xbfname,password,role\nada,secret,student\n'
+                                                 b'grace,secret,nobody\n', content_type='text/csv')
+        response = self.client.post(reverse('admin_import'), {'kind': 'users', 'csv_file': upload})
+        self.assertContains(response, 'Imported 1 users, rejected 1 row')
+        self.assertContains(response, 'role must be one of')
+        self.assertTrue(MyUser.objects.filter(name='ada').exists())
+
+    def test_upload_without_required_columns(self):
+        upload = SimpleUploadedFile('courses.csv', b'code,title\nCS1,Intro\n', content_type='text/csv')
+        response = self.client.post(reverse('admin_import'), {'kind': 'courses', 'csv_file': upload})
+        self.assertContains(response, 'missing the column(s): seat_limit, instructor')
+        self.assertFalse(Course.objects.exists())
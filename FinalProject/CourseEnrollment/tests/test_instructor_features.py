@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.core import mail
 from ..models import (
@@ -44,6 +44,29 @@ class InstructorFeaturesTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertFalse(Enrollment.objects.filter(id=self.enrollment.id).exists())
 
+    def test_other_instructors_course_is_off_limits(self):
+        other = MyUser.objects.create(name='instr2', password='pass', role='instructor')
+        Course.objects.filter(id=self.course.id).update(instructor=other)
+        response = self.client.post(reverse('instructor_enrollments'), {
+            'enrollment_id': self.enrollment.id, 'action': 'remove'
+        })
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse('instructor_requests'), {
+            'request_id': self.override_request.id, 'action': 'approve'
+        })
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Enrollment.objects.filter(id=self.enrollment.id).exists())
+        self.override_request.refresh_from_db()
+        self.assertEqual(self.override_request.status, 'pending')
+
+    def test_posts_require_login(self):
+        client = Client()
+        for url, data in [(reverse('instructor_enrollments'), {'enrollment_id': self.enrollment.id, 'action': 'remove'}),
+                          (reverse('instructor_requests'), {'request_id': self.override_request.id, 'action': 'approve'}),
+                          (reverse('admin_student_acct_edit'), {'student_id': self.student.id, 'name': 'x', 'email': ''})]:
+            self.assertRedirects(client.post(url, data), reverse('login'), fetch_redirect_response=False)
+        self.assertTrue(Enrollment.objects.filter(id=self.enrollment.id).exists())
+
     def test_manage_override_requests_view(self):
         response = self.client.get(reverse('instructor_requests'))
         self.assertEqual(response.status_code, 200)
@@ -67,6 +90,7 @@ class InstructorFeaturesTests(TestCase):
         req = OverrideRequest.objects.get(id=self.override_request.id)
         self.assertEqual(req.status, 'denied')
 
+    @override_settings(EMAIL_IN_BACKGROUND=False)
     def test_send_email(self):
         response = self.client.post(reverse('instructor_email'), {
             'course_id': self.course.id,
@@ -137,6 +161,16 @@ class InstructorFeaturesTests(TestCase):
         self.assertEqual(str(grade.score), '88.00')
         self.assertEqual(grade.feedback, 'Improved')
 
+    def test_grade_entry_post_without_a_student(self):
+        url = reverse('grade-entry', args=[self.course.id])
+        for enrollment_id in (None, 'abc'):
+            data = {'assignment': 'Midterm', 'score': '90'}
+            if enrollment_id is not None:
+                data['enrollment_id'] = enrollment_id
+            response = self.client.post(url, data)
+            self.assertContains(response, 'Choose a student from the roster.')
+        self.assertFalse(Grade.objects.exists())
+
     # new tests for Feature 6: Office‑hour slots & booking
     def test_office_hour_slot_create(self):
         url = reverse('office-hours-create')
@@ -164,7 +198,8 @@ class InstructorFeaturesTests(TestCase):
             end_time='2025-06-02T13:00'
         )
         url = reverse('office-hours')
-        response = self.client.get(url)
+        # the list shows a week at a time, from the given day
+        response = self.client.get(url, {'start': '2025-06-02'})
         self.assertEqual(response.status_code, 200)
         # ensure the slot appears in the context
         self.assertIn(slot, response.context['slots'])
@@ -0,0 +1,158 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import mailer
+from ..models import MyUser, Course, Enrollment, EmailDelivery
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """
+    locmem backend that counts connections and send_messages() calls, and
+    fails `failures` sends once `fail_after` more messages have gone out.
+    """
+    opened = 0
+    calls = 0
+    failures = 0
+    fail_after = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        FlakyBackend.calls += 1
+        sent = 0
+        for message in messages:
+            if FlakyBackend.fail_after:
+                FlakyBackend.fail_after -= 1
+            elif FlakyBackend.failures:
+                FlakyBackend.failures -= 1
+                raise ConnectionRefusedError('mail server unavailable')
+            sent += super().send_messages([message])
+        return sent
+
+
+@override_settings(EMAIL_BACKEND='CourseEnrollment.tests.test_mailer.FlakyBackend', EMAIL_IN_BACKGROUND=False)
+class MailerTests(TestCase):
+    def setUp(self):
+        FlakyBackend.opened = FlakyBackend.calls = FlakyBackend.failures = FlakyBackend.fail_after = 0
+        self.instructor = MyUser.objects.create(name='mailprof', password='pass', role='instructor',
+                                                email='prof@example.com')
+        self.course = Course.objects.create(code='CS700', title='Lecture', seat_limit=500, instructor=self.instructor)
+        students = MyUser.objects.bulk_create([
+            MyUser(name=f'mailstudent{i}', password='pass', role='student',
+                   email=f'student{i}@example.com' if i % 50 else '')
+            for i in range(250)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(student=s, course=self.course) for s in students])
+        self.sleeps = []
+
+    def queue(self):
+        return mailer.queue_course_email(self.course, self.instructor, 'Exam moved', 'Now on Friday.')
+
+    def test_recipients_read_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            delivery, count = self.queue()
+        self.assertEqual(count, 245)  # five students have no address
+        reads = [q for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(delivery.recipients.count(), 245)
+
+    def test_batches_share_one_connection(self):
+        delivery, _ = self.queue()
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(mailer.deliver(delivery.id, sleep=self.sleeps.append), 'sent')
+        self.assertEqual(len(mail.outbox), 245)
+        self.assertEqual(FlakyBackend.opened, 1)
+        # one send and one status update per batch
+        self.assertEqual(FlakyBackend.calls, 3)
+        self.assertEqual(len([q for q in ctx.captured_queries
+                              if q['sql'].startswith('UPDATE "CourseEnrollment_emailrecipient"')]), 3)
+        # one message per student, so nobody sees the rest of the class
+        self.assertEqual({len(message.to) for message in mail.outbox}, {1})
+        self.assertEqual(mail.outbox[0].reply_to, ['prof@example.com'])
+        self.assertFalse(delivery.recipients.exclude(status='sent').exists())
+
+    def test_failed_batch_is_retried(self):
+        delivery, _ = self.queue()
+        FlakyBackend.failures = 1
+        self.assertEqual(mailer.deliver(delivery.id, sleep=self.sleeps.append), 'sent')
+        self.assertEqual(self.sleeps, [mailer.RETRY_DELAY])
+        self.assertEqual(len(mail.outbox), 245)
+        # only the first batch needed a second attempt
+        self.assertEqual(delivery.recipients.filter(attempts=2).count(), mailer.BATCH_SIZE)
+
+    def test_failure_mid_batch_resends_nothing(self):
+        delivery, _ = self.queue()
+        FlakyBackend.fail_after, FlakyBackend.failures = 30, 1
+        self.assertEqual(mailer.deliver(delivery.id, sleep=self.sleeps.append), 'sent')
+        recipients = [message.to[0] for message in mail.outbox]
+        self.assertEqual(len(recipients), 245)
+        self.assertEqual(len(set(recipients)), 245)
+        self.assertEqual(delivery.recipients.filter(attempts=1).count(), 245 - mailer.BATCH_SIZE + 30)
+
+    def test_exhausted_retries_are_recorded_and_can_be_resent(self):
+        delivery, _ = self.queue()
+        FlakyBackend.failures = mailer.MAX_ATTEMPTS
+        self.assertEqual(mailer.deliver(delivery.id, sleep=self.sleeps.append), 'failed')
+        failed = delivery.recipients.filter(status='failed')
+        self.assertEqual(failed.count(), mailer.BATCH_SIZE)
+        self.assertEqual(failed.first().error, 'mail server unavailable')
+        self.assertEqual(len(mail.outbox), 245 - mailer.BATCH_SIZE)
+
+        self.assertEqual(mailer.retry_failed(delivery.id), 'sent')
+        self.assertEqual(len(mail.outbox), 245)
+        self.assertEqual(delivery.recipients.order_by('id').first().attempts, mailer.MAX_ATTEMPTS + 1)
+
+    def test_delivery_is_claimed_once(self):
+        delivery, _ = self.queue()
+        mailer.deliver(delivery.id, sleep=self.sleeps.append)
+        self.assertIsNone(mailer.deliver(delivery.id, sleep=self.sleeps.append))
+        self.assertEqual(len(mail.outbox), 245)
+
+    def test_stuck_deliveries_go_by_when_they_were_claimed(self):
+        delivery, _ = self.queue()
+        long_ago = timezone.now() - timedelta(hours=2)
+        # queued long ago but only just picked up by a worker: not stuck
+        EmailDelivery.objects.filter(id=delivery.id).update(status='sending', created_at=long_ago,
+                                                             started_at=timezone.now())
+        call_command('send_queued_email', stuck_minutes=30, stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+
+        EmailDelivery.objects.filter(id=delivery.id).update(started_at=long_ago)
+        out = StringIO()
+        call_command('send_queued_email', stuck_minutes=30, stdout=out)
+        self.assertIn('1 delivery(ies) sent', out.getvalue())
+        self.assertEqual(len(mail.outbox), 245)
+
+
+class BackgroundDeliveryTests(TransactionTestCase):
+    def test_request_returns_before_delivery(self):
+        instructor = MyUser.objects.create(name='bgprof', password='pass', role='instructor')
+        student = MyUser.objects.create(name='bgstudent', password='pass', role='student', email='bg@example.com')
+        course = Course.objects.create(code='CS701', title='Seminar', seat_limit=5, instructor=instructor)
+        Enrollment.objects.create(student=student, course=course)
+        client = Client()
+        session = client.session
+        session['name'] = 'bgprof'
+        session['role'] = 'instructor'
+        session.save()
+
+        response = client.post(reverse('instructor_email'),
+                               {'course_id': course.id, 'subject': 'Hi', 'message': 'Welcome'})
+        self.assertContains(response, '1 student in CS701')
+        for worker in threading.enumerate():
+            if worker.name.startswith('email-delivery-'):
+                worker.join(timeout=10)
+        self.assertEqual(EmailDelivery.objects.get().status, 'sent')
+        self.assertEqual(mail.outbox[0].to, ['bg@example.com'])
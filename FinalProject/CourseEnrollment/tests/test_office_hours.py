@@ -0,0 +1,226 @@
+import threading
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import MyUser, OfficeHourSlot, OfficeHourBooking
+from ..office_hours import (
+    book_slot, create_recurring_slots, create_slot, expand_recurrence, reconcile_booking_counts, slot_window,
+    BOOKED, ALREADY_BOOKED, SLOT_FULL, TIME_CONFLICT,
+)
+from ..schedule import parse_meeting_times, TUESDAY
+
+START = timezone.make_aware(datetime(2030, 3, 4, 14, 0))
+
+
+def hours(start, end):
+    return START + timedelta(hours=start), START + timedelta(hours=end)
+
+
+class OfficeHourTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='ohprof', password='pass', role='instructor')
+        self.other_instructor = MyUser.objects.create(name='ohprof2', password='pass', role='instructor')
+        self.students = [MyUser.objects.create(name=f'ohstudent{i}', password='pass', role='student')
+                         for i in range(3)]
+
+    def test_overlapping_slots_are_rejected(self):
+        slot, conflicts = create_slot(self.instructor, *hours(0, 1))
+        self.assertIsNotNone(slot)
+        for start, end in [(0.5, 1.5), (-0.5, 0.5), (0.25, 0.75), (-1, 2)]:
+            rejected, conflicts = create_slot(self.instructor, *hours(start, end))
+            self.assertIsNone(rejected)
+            self.assertEqual(conflicts, [slot])
+        # back to back is fine, and so is another instructor at the same time
+        self.assertIsNotNone(create_slot(self.instructor, *hours(1, 2))[0])
+        self.assertIsNotNone(create_slot(self.other_instructor, *hours(0, 1))[0])
+
+    def test_capacity(self):
+        slot, _ = create_slot(self.instructor, *hours(0, 1), capacity=2)
+        statuses = [book_slot(student, slot).status for student in self.students]
+        self.assertEqual(statuses, [BOOKED, BOOKED, SLOT_FULL])
+        slot.refresh_from_db()
+        self.assertEqual(slot.booked_count, 2)
+        self.assertTrue(slot.is_full)
+
+    def test_double_booking(self):
+        slot, _ = create_slot(self.instructor, *hours(0, 1), capacity=5)
+        self.assertEqual(book_slot(self.students[0], slot).status, BOOKED)
+        self.assertEqual(book_slot(self.students[0], slot).status, ALREADY_BOOKED)
+        slot.refresh_from_db()
+        self.assertEqual(slot.booked_count, 1)
+
+    def test_student_cannot_book_overlapping_slots(self):
+        first, _ = create_slot(self.instructor, *hours(0, 1))
+        second, _ = create_slot(self.other_instructor, *hours(0.5, 1.5))
+        later, _ = create_slot(self.other_instructor, *hours(1.5, 2))
+        self.assertEqual(book_slot(self.students[0], first).status, BOOKED)
+        booking = book_slot(self.students[0], second)
+        self.assertEqual((booking.status, booking.conflicts), (TIME_CONFLICT, [first]))
+        self.assertEqual(book_slot(self.students[0], later).status, BOOKED)
+
+    def test_reconcile(self):
+        slot, _ = create_slot(self.instructor, *hours(0, 1), capacity=3)
+        book_slot(self.students[0], slot)
+        book_slot(self.students[1], slot)
+        self.students[0].delete()
+        self.assertEqual(reconcile_booking_counts(), [slot])
+        slot.refresh_from_db()
+        self.assertEqual(slot.booked_count, 1)
+        self.assertEqual(reconcile_booking_counts(), [])
+        out = StringIO()
+        call_command('reconcile_seat_counts', stdout=out)
+        self.assertIn('Reconciled 0 office-hour slot(s).', out.getvalue())
+
+    def test_views(self):
+        client = Client()
+        client.post(reverse('login'), {'name': 'ohprof', 'password': 'pass', 'role': 'instructor'})
+        response = client.post(reverse('office-hours-create'), {
+            'start_time': '2030-03-04T14:00', 'end_time': '2030-03-04T15:00', 'capacity': '1'})
+        self.assertRedirects(response, reverse('office-hours'), fetch_redirect_response=False)
+        response = client.post(reverse('office-hours-create'), {
+            'start_time': '2030-03-04T14:30', 'end_time': '2030-03-04T15:30', 'capacity': '1'})
+        self.assertContains(response, 'overlaps your office hours')
+        response = client.post(reverse('office-hours-create'), {
+            'start_time': '2030-03-04T16:00', 'end_time': '2030-03-04T15:00'})
+        self.assertContains(response, 'must end after it starts')
+        response = client.post(reverse('office-hours-create'), {
+            'start_time': '2030-02-30T10:00', 'end_time': '2030-02-30T11:00'})
+        self.assertContains(response, 'Enter a start and end time.')
+        response = client.post(reverse('office-hours-create'), {
+            'start_time': '2030-03-04T16:00', 'end_time': '2030-03-04T17:00', 'capacity': '0'})
+        self.assertContains(response, 'Capacity must be')
+        self.assertContains(client.get(reverse('office-hours'), {'start': '2030-03-01'}), '0 of 1 booked')
+
+        slot = OfficeHourSlot.objects.get()
+        for student, expected in [(self.students[0], None), (self.students[1], 'fully booked')]:
+            client = Client()
+            client.post(reverse('login'), {'name': student.name, 'password': 'pass', 'role': 'student'})
+            response = client.post(reverse('office-hours-book', args=[slot.id]))
+            if expected:
+                self.assertContains(response, expected)
+            else:
+                self.assertEqual(response.status_code, 302)
+        self.assertEqual(OfficeHourBooking.objects.count(), 1)
+
+
+class RecurringOfficeHourTests(TestCase):
+    # Monday 2030-03-04 to Sunday 2030-03-17: two Tuesdays and two Thursdays
+    FIRST, LAST = date(2030, 3, 4), date(2030, 3, 17)
+
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='recurprof', password='pass', role='instructor')
+
+    def test_expand(self):
+        times = expand_recurrence(parse_meeting_times('TTh 2-4pm'), self.FIRST, self.LAST)
+        self.assertEqual(len(times), 4 * 8)
+        self.assertEqual(times[0], (timezone.make_aware(datetime(2030, 3, 5, 14, 0)),
+                                    timezone.make_aware(datetime(2030, 3, 5, 14, 15))))
+        self.assertEqual(times[-1][1], timezone.make_aware(datetime(2030, 3, 14, 16, 0)))
+
+        # a holiday is skipped, and leftover minutes don't make a short slot
+        times = expand_recurrence([(TUESDAY, time(14), time(15, 10))], self.FIRST, self.LAST,
+                                  slot_minutes=20, skip_dates=[date(2030, 3, 12)])
+        self.assertEqual([start.strftime('%d %H:%M') for start, _ in times], ['05 14:00', '05 14:20', '05 14:40'])
+
+        with self.assertRaises(ValueError):
+            expand_recurrence(parse_meeting_times('MTWThF 8am-8pm'), self.FIRST, date(2031, 3, 4))
+
+    def test_bulk_create_skips_overlaps(self):
+        existing, _ = create_slot(self.instructor, timezone.make_aware(datetime(2030, 3, 5, 14, 50)),
+                                  timezone.make_aware(datetime(2030, 3, 5, 15, 20)))
+        times = expand_recurrence(parse_meeting_times('T 2-4pm, T 3:30-4:30pm'), self.FIRST, self.LAST)
+        with self.assertNumQueries(5):
+            result = create_recurring_slots(self.instructor, times, capacity=2)
+        # 8 + 4 quarter hours per Tuesday; the 3:30-4:00 pair duplicates and 2:45-3:15 hits the existing slot
+        self.assertEqual(len(result.skipped), 2 * 2 + 3)
+        self.assertEqual(len(result.created), 2 * 12 - len(result.skipped))
+        starts = list(OfficeHourSlot.objects.order_by('start_time').values_list('start_time', 'end_time'))
+        self.assertTrue(all(end <= next_start for (_, end), (next_start, _) in zip(starts, starts[1:])))
+        self.assertTrue(OfficeHourSlot.objects.exclude(id=existing.id).filter(capacity=2).exists())
+
+        # publishing the same rule again adds nothing
+        self.assertEqual(create_recurring_slots(self.instructor, times).created, [])
+
+    def test_views(self):
+        client = Client()
+        client.post(reverse('login'), {'name': 'recurprof', 'password': 'pass', 'role': 'instructor'})
+        response = client.post(reverse('office-hours-recurring'), {
+            'schedule': 'TTh 2-4pm', 'first_day': '2030-03-04', 'last_day': '2030-03-17',
+            'skip_dates': '2030-03-12, 2030-03-14', 'capacity': '1'})
+        self.assertContains(response, 'Published 16 slot(s).')
+        response = client.post(reverse('office-hours-recurring'), {
+            'schedule': 'whenever', 'first_day': '2030-03-04', 'last_day': '2030-03-17'})
+        self.assertContains(response, 'Enter the days and times')
+        response = client.post(reverse('office-hours-recurring'), {
+            'schedule': 'T 2-3pm', 'first_day': '2030-03-04', 'last_day': '2030-03-17', 'skip_dates': 'soon'})
+        self.assertContains(response, 'must be YYYY-MM-DD')
+        response = client.post(reverse('office-hours-recurring'), {
+            'schedule': 'T 2-3pm', 'first_day': '2030-02-30', 'last_day': '2030-03-17'})
+        self.assertContains(response, 'Enter a first and last day')
+        response = client.post(reverse('office-hours-recurring'), {
+            'schedule': 'T 2-3pm', 'first_day': '2030-03-04', 'last_day': '2030-03-17', 'skip_dates': '2030-02-31'})
+        self.assertContains(response, 'must be YYYY-MM-DD')
+
+        response = client.get(reverse('office-hours'), {'start': '2030-03-04'})
+        self.assertEqual(len(response.context['slots']), 16)
+        self.assertContains(response, '?start=2030-03-11')
+        self.assertEqual(len(client.get(reverse('office-hours'), {'start': '2030-03-11'}).context['slots']), 0)
+        # an impossible date shows the current week
+        self.assertEqual(client.get(reverse('office-hours'), {'start': '2030-02-30'}).context['start'],
+                         timezone.localdate())
+        self.assertEqual(len(slot_window(self.instructor, date(2030, 3, 5), days=1)), 8)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    CAPACITY = 3
+    STUDENTS = 20
+
+    def setUp(self):
+        instructor = MyUser.objects.create(name='rushprof', password='pass', role='instructor')
+        self.slot, _ = create_slot(instructor, *hours(0, 1), capacity=self.CAPACITY)
+        self.students = [MyUser.objects.create(name=f'rushbooker{i}', password='pass', role='student')
+                         for i in range(self.STUDENTS)]
+
+    def run_concurrently(self, targets):
+        barrier = threading.Barrier(len(targets))
+        results, errors = [], []
+
+        def worker(student):
+            try:
+                barrier.wait()
+                results.append(book_slot(student, OfficeHourSlot.objects.get(id=self.slot.id)).status)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in targets]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_no_overbooking_under_concurrent_booking(self):
+        results = self.run_concurrently(self.students)
+
+        self.slot.refresh_from_db()
+        self.assertEqual(results.count(BOOKED), self.CAPACITY)
+        self.assertEqual(results.count(SLOT_FULL), self.STUDENTS - self.CAPACITY)
+        self.assertEqual(OfficeHourBooking.objects.filter(slot=self.slot).count(), self.CAPACITY)
+        self.assertEqual(self.slot.booked_count, self.CAPACITY)
+
+    def test_double_submit_books_once(self):
+        results = self.run_concurrently([self.students[0]] * 8)
+
+        self.slot.refresh_from_db()
+        self.assertEqual(results.count(BOOKED), 1)
+        self.assertEqual(results.count(ALREADY_BOOKED), 7)
+        self.assertEqual(self.slot.booked_count, 1)
@@ -0,0 +1,114 @@
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+
+from ..models import MyUser, Course, PrerequisiteClosure
+from ..prerequisites import all_prerequisites, unlocked_by, creates_cycle, rebuild_closure
+
+
+class PrerequisiteGraphTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(name='graphprof', password='pass', role='instructor')
+        # chain: cs300 -> cs200 -> cs100, and cs250 -> cs100
+        self.cs100 = self.make_course('CS100')
+        self.cs200 = self.make_course('CS200', self.cs100)
+        self.cs250 = self.make_course('CS250', self.cs100)
+        self.cs300 = self.make_course('CS300', self.cs200)
+
+    def make_course(self, code, *prerequisites):
+        course = Course.objects.create(code=code, title=code, seat_limit=5, instructor=self.instructor)
+        course.prerequisites.add(*prerequisites)
+        return course
+
+    def codes(self, courses):
+        return sorted(c.code for c in courses)
+
+    def test_transitive_prerequisites(self):
+        self.assertEqual(self.codes(all_prerequisites(self.cs300)), ['CS100', 'CS200'])
+        self.assertEqual(self.codes(unlocked_by(self.cs100)), ['CS200', 'CS250', 'CS300'])
+
+    def test_single_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            list(all_prerequisites(self.cs300))
+            list(unlocked_by(self.cs100))
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_adding_edge_extends_dependents(self):
+        cs050 = self.make_course('CS050')
+        self.cs100.prerequisites.add(cs050)
+        self.assertEqual(self.codes(all_prerequisites(self.cs300)), ['CS050', 'CS100', 'CS200'])
+        self.assertEqual(self.codes(unlocked_by(cs050)), ['CS100', 'CS200', 'CS250', 'CS300'])
+
+    def test_reverse_add(self):
+        cs400 = self.make_course('CS400')
+        self.cs300.required_for.add(cs400)
+        self.assertEqual(self.codes(all_prerequisites(cs400)), ['CS100', 'CS200', 'CS300'])
+
+    def test_removing_edge_shrinks_closure(self):
+        self.cs200.prerequisites.remove(self.cs100)
+        self.assertEqual(self.codes(all_prerequisites(self.cs300)), ['CS200'])
+        self.assertEqual(self.codes(unlocked_by(self.cs100)), ['CS250'])
+
+    def test_set_and_clear(self):
+        self.cs300.prerequisites.set([self.cs250])
+        self.assertEqual(self.codes(all_prerequisites(self.cs300)), ['CS100', 'CS250'])
+        self.cs100.required_for.clear()
+        self.assertEqual(self.codes(all_prerequisites(self.cs300)), ['CS250'])
+
+    def test_deleting_middle_course(self):
+        self.cs200.delete()
+        self.assertEqual(self.codes(all_prerequisites(self.cs300)), [])
+
+    def test_cycles_rejected(self):
+        self.assertTrue(creates_cycle(self.cs100.id, [self.cs300.id]))
+        self.assertTrue(creates_cycle(self.cs100.id, [str(self.cs100.id)]))
+        self.assertFalse(creates_cycle(self.cs300.id, [self.cs250.id]))
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.cs100.prerequisites.add(self.cs300)
+        self.assertFalse(self.cs100.prerequisites.exists())
+
+    def test_rebuild_matches_incremental(self):
+        self.cs300.prerequisites.add(self.cs250)
+        before = set(PrerequisiteClosure.objects.values_list('course_id', 'prerequisite_id'))
+        PrerequisiteClosure.objects.all().delete()
+        rebuild_closure()
+        self.assertEqual(set(PrerequisiteClosure.objects.values_list('course_id', 'prerequisite_id')), before)
+
+    def test_admin_edit_rejects_cycle(self):
+        client = Client()
+        MyUser.objects.create(name='graphadmin', password='pass', role='administrator')
+        session = client.session
+        session['name'] = 'graphadmin'
+        session['role'] = 'administrator'
+        session.save()
+        response = client.post('/admin_edit_course/', {
+            'course_code': 'CS100',
+            'title': 'CS100',
+            'syllabus': '',
+            'meeting_times': '',
+            'seat_limit': 5,
+            'instructor_name': 'graphprof',
+            'prerequisites': [self.cs300.id],
+        })
+        self.assertContains(response, 'would create a cycle')
+        self.assertFalse(self.cs100.prerequisites.exists())
+
+    def test_admin_rejects_unknown_prerequisite_ids(self):
+        client = Client()
+        MyUser.objects.create(name='graphadmin', password='pass', role='administrator')
+        session = client.session
+        session['name'] = 'graphadmin'
+        session['role'] = 'administrator'
+        session.save()
+        course = {'title': 'CS400', 'syllabus': 'x', 'meeting_times': 'Mon 9:00-10:00', 'seat_limit': 5,
+                  'instructor_name': 'graphprof'}
+        for prerequisites in (['abc'], [self.cs100.id, 999999]):
+            response = client.post('/admin_edit_course/', dict(course, course_code='CS300',
+                                                                prerequisites=prerequisites))
+            self.assertContains(response, 'Invalid prerequisites')
+            response = client.post('/admin_add_course/', dict(course, course_code='CS400',
+                                                               prerequisites=prerequisites))
+            self.assertContains(response, 'Invalid prerequisites')
+        self.assertEqual(self.codes(self.cs300.prerequisites.all()), ['CS200'])
+        self.assertFalse(Course.objects.filter(code='CS400').exists())
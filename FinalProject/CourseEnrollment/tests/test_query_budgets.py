@@ -0,0 +1,215 @@
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from django.db import connection, transaction
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import urls
+from ..models import (MyUser, Course, Enrollment, OverrideRequest, WaitlistEntry, Grade, OfficeHourSlot,
+                      OfficeHourBooking)
+from ..office_hours import reconcile_booking_counts
+from ..seats import reconcile_seat_counts
+
+# Maximum number of queries each page may run, whatever the amount of data.
+# Every named URL in CourseEnrollment/urls.py must have an entry; a page whose
+# query count grows with the data fails even when it is under budget.
+QUERY_BUDGETS = {
+    'login': 2,
+    'redirect': 0,
+    'student_dashboard': 3,
+    'student': 3,
+    'search_courses': 4,
+    'enroll_course': 11,
+    'drop_course': 29,
+    'request_override': 3,
+    'waitlist_status': 3,
+    'instructor_dashboard': 3,
+    'student_courses': 3,
+    'admin_dashboard': 2,
+    'logout': 3,
+    'admin_course_manager': 3,
+    'admin_edit_course': 4,
+    'admin_enrollment_manager': 2,
+    'admin_student_manager': 2,
+    'enrollment_report_generator': 6,
+    'report_export': 2,
+    'report_analytics': 5,
+    'admin_add_course': 2,
+    'admin_import': 2,
+    'student_enrollment_history': 3,
+    'admin_edit_enrollment': 3,
+    'admin_student_acct_edit': 2,
+    'course_catalog': 6,
+    'instructor_enrollments': 4,
+    'instructor_requests': 3,
+    'instructor_email': 3,
+    'edit_course': 3,
+    'signup': 0,
+    'grade-entry': 3,
+    'gradebook': 5,
+    'grading-scheme': 6,
+    'office-hours': 2,
+    'office-hours-create': 1,
+    'office-hours-recurring': 6,
+    'office-hours-book': 10,
+}
+
+# Generous wall-clock ceiling per page at the larger scale; catches pathological
+# slowdowns without making the suite flaky on slow machines.
+LATENCY_BUDGET_MS = 1000
+
+SMALL, LARGE = 3, 15
+
+Page = namedtuple('Page', ['name', 'user', 'method', 'args', 'data', 'session'], defaults=((), None, None))
+
+
+class QueryBudgetTests(TestCase):
+    def build(self, scale):
+        """A campus where everything a page might list has `scale` rows."""
+        today = date.today()
+        self.admin = MyUser.objects.create(name='admin', fullName='Admin', password='pass', role='administrator')
+        self.instructor = MyUser.objects.create(name='prof', fullName='Prof', password='pass', role='instructor')
+        self.student = MyUser.objects.create(name='stud', fullName='Stud', password='pass', role='student',
+                                             email='stud@example.com')
+        classmates = MyUser.objects.bulk_create([
+            MyUser(name=f'classmate{i}', fullName=f'Classmate {i}', password='pass', role='student',
+                   email=f'classmate{i}@example.com')
+            for i in range(scale)
+        ])
+
+        courses = []
+        for i in range(3 * scale):
+            course = Course.objects.create(code=f'QB{i:03d}', title=f'Course {i}', syllabus='Syllabus',
+                                           meeting_times=f'MWF {8 + i % 8}-{9 + i % 8}AM',
+                                           seat_limit=scale + 1, instructor=self.instructor)
+            if courses:
+                course.prerequisites.add(courses[-1])
+            courses.append(course)
+        taken, waiting, untouched = courses[:scale], courses[scale:2 * scale], courses[2 * scale:]
+        self.course, self.other_course = taken[0], untouched[0]
+
+        Enrollment.objects.bulk_create(
+            [Enrollment(student=self.student, course=c, date_enrolled=today - timedelta(days=200 * (i % 2)))
+             for i, c in enumerate(taken)]
+            + [Enrollment(student=s, course=c, date_enrolled=today) for s in classmates for c in taken]
+        )
+        WaitlistEntry.objects.bulk_create(
+            [WaitlistEntry(student=s, course=c) for c in waiting for s in classmates[:2]]
+            + [WaitlistEntry(student=self.student, course=c) for c in waiting]
+        )
+        OverrideRequest.objects.bulk_create(
+            [OverrideRequest(student=s, course=c, reason='Please') for s in classmates for c in untouched[1:3]]
+        )
+        Grade.objects.bulk_create(
+            [Grade(enrollment=e, assignment_name='Quiz', score=90) for e in Enrollment.objects.filter(course__in=taken)]
+        )
+        start = timezone.make_aware(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+        self.slots = OfficeHourSlot.objects.bulk_create([
+            OfficeHourSlot(instructor=self.instructor, start_time=start + timedelta(hours=i),
+                           end_time=start + timedelta(hours=i, minutes=30))
+            for i in range(scale + 1)
+        ])
+        OfficeHourBooking.objects.bulk_create([OfficeHourBooking(slot=slot, student=classmates[0])
+                                               for slot in self.slots[1:]])
+        reconcile_seat_counts()
+        reconcile_booking_counts()
+
+    def pages(self):
+        student, instructor, admin = self.student, self.instructor, self.admin
+        return [
+            Page('login', None, 'get'),
+            Page('redirect', None, 'get'),
+            Page('signup', None, 'get'),
+            Page('logout', student, 'get'),
+            Page('student_dashboard', student, 'get'),
+            Page('student', student, 'get'),
+            Page('search_courses', student, 'get', data={'q': 'course'}),
+            Page('enroll_course', student, 'get', args=[self.other_course.id]),
+            Page('drop_course', student, 'post', args=[self.course.id]),
+            Page('request_override', student, 'get', args=[self.other_course.id]),
+            Page('waitlist_status', student, 'get'),
+            Page('student_courses', student, 'get'),
+            Page('course_catalog', student, 'get'),
+            Page('office-hours-book', student, 'post', args=[self.slots[0].id]),
+            Page('instructor_dashboard', instructor, 'get'),
+            Page('instructor_enrollments', instructor, 'get'),
+            Page('instructor_requests', instructor, 'get'),
+            Page('instructor_email', instructor, 'get'),
+            Page('edit_course', instructor, 'get', args=[self.course.id]),
+            Page('grade-entry', instructor, 'get', args=[self.course.id]),
+            Page('gradebook', instructor, 'get', args=[self.course.id], data={'assignment': 'Quiz'}),
+            Page('grading-scheme', instructor, 'get', args=[self.course.id]),
+            Page('office-hours', instructor, 'get'),
+            Page('office-hours-create', instructor, 'get'),
+            Page('office-hours-recurring', instructor, 'post', data={
+                'schedule': 'TTh 2-4pm', 'first_day': date.today() + timedelta(days=30),
+                'last_day': date.today() + timedelta(days=43), 'skip_dates': date.today() + timedelta(days=35)}),
+            Page('admin_dashboard', admin, 'get'),
+            Page('admin_course_manager', admin, 'get'),
+            Page('admin_edit_course', admin, 'get', session={'editing_course_id': self.course.code}),
+            Page('admin_enrollment_manager', admin, 'get'),
+            Page('admin_student_manager', admin, 'get'),
+            Page('enrollment_report_generator', admin, 'get'),
+            Page('report_export', admin, 'get', args=['roster'], data={'course': self.course.code}),
+            Page('report_analytics', admin, 'get'),
+            Page('admin_add_course', admin, 'get'),
+            Page('admin_import', admin, 'get'),
+            Page('student_enrollment_history', admin, 'post', data={'student_id': student.id}),
+            Page('admin_edit_enrollment', admin, 'post', data={'student_id': student.id}),
+            Page('admin_student_acct_edit', admin, 'post', data={'student_id': student.id}),
+        ]
+
+    def measure(self, page):
+        """Run one request, rolling back whatever it changed; returns (queries, milliseconds)."""
+        client = Client()
+        session = client.session
+        if page.user:
+            session.update({'user_id': page.user.id, 'name': page.user.name, 'role': page.user.role})
+        session.update(page.session or {})
+        session.save()
+
+        url = reverse(page.name, args=page.args)
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = getattr(client, page.method)(url, page.data or {})
+                elapsed = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+        self.assertLess(response.status_code, 400, f"{page.name} returned {response.status_code}")
+        return [q['sql'] for q in ctx.captured_queries], elapsed
+
+    def run_pages(self, scale):
+        MyUser.objects.all().delete()
+        self.build(scale)
+        return {page.name: self.measure(page) for page in self.pages()}
+
+    def test_every_url_has_a_budget(self):
+        self.build(SMALL)
+        names = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+        self.assertEqual(names, set(QUERY_BUDGETS))
+        self.assertEqual(names, {page.name for page in self.pages()})
+
+    def test_query_counts_stay_flat_and_within_budget(self):
+        small = self.run_pages(SMALL)
+        large = self.run_pages(LARGE)
+
+        problems = []
+        for name, budget in QUERY_BUDGETS.items():
+            (small_sql, _), (large_sql, elapsed) = small[name], large[name]
+            issues = []
+            if len(large_sql) != len(small_sql):
+                issues.append(f"grows with data: {len(small_sql)} queries at scale {SMALL}, "
+                              f"{len(large_sql)} at scale {LARGE}")
+            if len(large_sql) > budget:
+                issues.append(f"{len(large_sql)} queries, budget is {budget}")
+            if elapsed > LATENCY_BUDGET_MS:
+                issues.append(f"took {elapsed:.0f}ms, budget is {LATENCY_BUDGET_MS}ms")
+            if issues:
+                listing = '\n'.join(f'    {i}. {sql}' for i, sql in enumerate(large_sql, start=1))
+                problems.append(f"{name}: {'; '.join(issues)}\n{listing}")
+        if problems:
+            self.fail('\n\n' + '\n\n'.join(problems))
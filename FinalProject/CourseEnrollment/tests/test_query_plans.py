@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+from django.db import IntegrityError, connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import MyUser, Course, Enrollment, OverrideRequest, WaitlistEntry
+from ..office_hours import overlapping_slots, slot_window
+
+
+class QueryPlanTests(TestCase):
+    """The hot lookups must be answered from an index, never by scanning a table."""
+
+    def setUp(self):
+        self.student = MyUser.objects.create(name='planstudent', password='pass', role='student')
+        self.instructor = MyUser.objects.create(name='planinstructor', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS400', title='Databases', seat_limit=5,
+                                            instructor=self.instructor)
+        self.cutoff = date.today() - timedelta(days=119)
+
+    def assertNoFullScan(self, queryset):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite-specific')
+        plan = queryset.explain()
+        # "SEARCH ... USING INDEX" is an index lookup; a bare "SCAN <table>" reads every row
+        scans = [line for line in plan.splitlines()
+                 if 'SCAN' in line and 'USING' not in line and 'TEMP B-TREE' not in line]
+        self.assertEqual(scans, [], plan)
+
+    def test_user_by_name(self):
+        self.assertNoFullScan(MyUser.objects.filter(name='planstudent'))
+
+    def test_users_by_role(self):
+        self.assertNoFullScan(MyUser.objects.filter(role='student'))
+        self.assertNoFullScan(MyUser.objects.filter(name='planinstructor', role='instructor'))
+
+    def test_duplicate_enrollment_check(self):
+        self.assertNoFullScan(Enrollment.objects.filter(student=self.student, course=self.course))
+
+    def test_enrollment_cutoffs(self):
+        self.assertNoFullScan(Enrollment.objects.filter(student=self.student, date_enrolled__gte=self.cutoff))
+        self.assertNoFullScan(Enrollment.objects.filter(student=self.student, date_enrolled__lt=self.cutoff))
+        self.assertNoFullScan(Enrollment.objects.filter(date_enrolled__gte=self.cutoff))
+
+    def test_waitlist_order(self):
+        self.assertNoFullScan(WaitlistEntry.objects.filter(course=self.course).order_by('timestamp'))
+
+    def test_pending_override_requests(self):
+        self.assertNoFullScan(OverrideRequest.objects.filter(status='pending'))
+        self.assertNoFullScan(OverrideRequest.objects.filter(course__instructor=self.instructor, status='pending'))
+        self.assertNoFullScan(OverrideRequest.objects.filter(student=self.student, course=self.course))
+
+    def test_office_hour_overlap(self):
+        start = timezone.now()
+        self.assertNoFullScan(overlapping_slots(self.instructor, start, start + timedelta(hours=1)))
+        self.assertNoFullScan(slot_window(self.instructor, date.today()))
+
+    def test_user_names_are_unique(self):
+        with self.assertRaises(IntegrityError):
+            MyUser.objects.create(name='planstudent', password='other', role='student')
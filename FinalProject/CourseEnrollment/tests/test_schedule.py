@@ -0,0 +1,92 @@
+from datetime import time, date, timedelta
+
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..admission import admit, ENROLLED, SCHEDULE_CONFLICT
+from ..models import MyUser, Course
+from ..schedule import parse_meeting_times, parse_schedule_filter, MONDAY, TUESDAY, WEDNESDAY, THURSDAY, FRIDAY
+from ..seats import create_enrollment
+
+
+class MeetingTimeParserTests(TestCase):
+    def test_day_letters_and_meridiem(self):
+        self.assertEqual(parse_meeting_times('MWF 9-10AM'), [
+            (MONDAY, time(9), time(10)), (WEDNESDAY, time(9), time(10)), (FRIDAY, time(9), time(10))])
+        self.assertEqual(parse_meeting_times('TTh 1-2:30PM'), [
+            (TUESDAY, time(13), time(14, 30)), (THURSDAY, time(13), time(14, 30))])
+
+    def test_missing_meridiem_is_guessed(self):
+        self.assertEqual(parse_meeting_times('TF 12-1:50'), [
+            (TUESDAY, time(12), time(13, 50)), (FRIDAY, time(12), time(13, 50))])
+        self.assertEqual(parse_meeting_times('M 11-12PM'), [(MONDAY, time(11), time(12))])
+
+    def test_several_segments_and_names(self):
+        self.assertEqual(parse_meeting_times('Tuesday 2pm-3:15pm, R 8:00-8:50am'), [
+            (TUESDAY, time(14), time(15, 15)), (THURSDAY, time(8), time(8, 50))])
+
+    def test_unparseable(self):
+        self.assertEqual(parse_meeting_times('TBA'), [])
+        self.assertEqual(parse_meeting_times(''), [])
+
+    def test_schedule_filter(self):
+        self.assertEqual(parse_schedule_filter('free Tuesday afternoons'), ([TUESDAY], time(12), time(17)))
+        self.assertEqual(parse_schedule_filter('TR 2:00'), ([TUESDAY, THURSDAY], time(14), None))
+        self.assertEqual(parse_schedule_filter('MWF'), ([MONDAY, WEDNESDAY, FRIDAY], None, None))
+        self.assertIsNone(parse_schedule_filter('online'))
+
+
+class MeetingBlockTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.instructor = MyUser.objects.create(name='schedprof', password='pass', role='instructor')
+        self.student = MyUser.objects.create(name='schedstudent', password='pass', role='student')
+        self.morning = self.make_course('CS100', 'MWF 9-10AM')
+        self.afternoon = self.make_course('CS200', 'TTh 1-2:30PM')
+        self.clash = self.make_course('CS300', 'W 9:30-11AM')
+        self.evening = self.make_course('CS400', 'T 6-8:30PM')
+
+        session = self.client.session
+        session['name'] = self.student.name
+        session['role'] = self.student.role
+        session.save()
+
+    def make_course(self, code, meeting_times):
+        return Course.objects.create(code=code, title=f'Course {code}', meeting_times=meeting_times,
+                                     seat_limit=5, instructor=self.instructor)
+
+    def test_blocks_follow_meeting_times(self):
+        self.assertEqual(self.morning.meeting_blocks.count(), 3)
+        self.morning.meeting_times = 'T 9-10AM'
+        self.morning.save()
+        self.assertEqual(list(self.morning.meeting_blocks.values_list('day', flat=True)), [TUESDAY])
+
+    def test_conflicting_enrollment_rejected(self):
+        create_enrollment(self.student, self.morning)
+        result = admit(self.student, self.clash)
+        self.assertEqual(result.status, SCHEDULE_CONFLICT)
+        self.assertEqual(result.conflicts, [self.morning])
+        self.assertEqual(admit(self.student, self.afternoon).status, ENROLLED)
+
+    def test_completed_courses_do_not_conflict(self):
+        create_enrollment(self.student, self.morning, date_enrolled=date.today() - timedelta(days=200))
+        self.assertEqual(admit(self.student, self.clash).status, ENROLLED)
+
+    def test_catalog_reports_conflict(self):
+        create_enrollment(self.student, self.morning)
+        response = self.client.post(reverse('course_catalog'), {'course_id': self.clash.id})
+        self.assertContains(response, 'meets at the same time as Course CS100')
+
+    def test_search_by_day_part(self):
+        response = self.client.get(reverse('search_courses'), {'schedule': 'Tuesday afternoon'})
+        self.assertEqual([c.code for c in response.context['courses']], ['CS200'])
+
+    def test_search_by_start_time(self):
+        response = self.client.get(reverse('search_courses'), {'schedule': 'TR 6:00'})
+        self.assertEqual([c.code for c in response.context['courses']], ['CS400'])
+
+    def test_search_text_fallback(self):
+        Course.objects.create(code='CS500', title='Online', meeting_times='Online, asynchronous',
+                              seat_limit=5, instructor=self.instructor)
+        response = self.client.get(reverse('search_courses'), {'schedule': 'asynchronous'})
+        self.assertEqual([c.code for c in response.context['courses']], ['CS500'])
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admission import eligible_courses
+from ..models import MyUser, Course, Enrollment
+from ..search import search_courses, rebuild_search_index, PAGE_SIZE
+
+
+class CourseSearchIndexTests(TestCase):
+    def setUp(self):
+        self.instructor = MyUser.objects.create(fullName='Ada Lovelace', name='ada', password='pass',
+                                                role='instructor')
+        self.databases_course = Course.objects.create(code='CS557', title='Databases', seat_limit=5,
+                                                      syllabus='Relational algebra and SQL',
+                                                      instructor=self.instructor)
+        self.algebra_course = Course.objects.create(code='MATH240', title='Linear Algebra', seat_limit=5,
+                                                    syllabus='Matrices', instructor=self.instructor)
+
+    def codes(self, query):
+        return [c.code for c in search_courses(query)]
+
+    def test_prefix_match_on_title(self):
+        self.assertEqual(self.codes('datab'), ['CS557'])
+
+    def test_code_and_instructor_are_indexed(self):
+        self.assertEqual(self.codes('cs557'), ['CS557'])
+        self.assertCountEqual(self.codes('lovelace'), ['CS557', 'MATH240'])
+
+    def test_title_match_ranks_above_syllabus_match(self):
+        self.assertEqual(self.codes('algebra'), ['MATH240', 'CS557'])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.codes('algebra sql'), ['CS557'])
+
+    def test_punctuation_is_ignored(self):
+        self.assertEqual(self.codes('"datab*" ('), ['CS557'])
+
+    def test_index_follows_course_edits_and_deletes(self):
+        self.databases_course.title = 'Data Systems'
+        self.databases_course.save()
+        self.assertEqual(self.codes('databases'), [])
+        self.assertEqual(self.codes('systems'), ['CS557'])
+
+        self.databases_course.delete()
+        self.assertEqual(self.codes('systems'), [])
+
+    def test_index_follows_instructor_rename(self):
+        self.instructor.fullName = 'Grace Hopper'
+        self.instructor.save()
+        self.assertCountEqual(self.codes('hopper'), ['CS557', 'MATH240'])
+        self.assertEqual(self.codes('lovelace'), [])
+
+    def test_rebuild(self):
+        rebuild_search_index()
+        self.assertEqual(self.codes('matrices'), ['MATH240'])
+
+
+class SearchCoursesPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        student = MyUser.objects.create(name='searcher', password='pass', role='student')
+        instructor = MyUser.objects.create(name='prof', password='pass', role='instructor')
+        Course.objects.bulk_create([
+            Course(code=f'BIO{i:03d}', title=f'Biology {i}', seat_limit=5, instructor=instructor)
+            for i in range(PAGE_SIZE + 5)
+        ])
+        session = self.client.session
+        session['name'] = student.name
+        session['role'] = student.role
+        session.save()
+
+    def test_results_are_paginated(self):
+        response = self.client.get(reverse('search_courses'), {'q': 'biology'})
+        self.assertEqual(len(response.context['courses']), PAGE_SIZE)
+        self.assertContains(response, 'Page 1 of 2')
+
+        response = self.client.get(reverse('search_courses'), {'q': 'biology', 'page': 2})
+        self.assertEqual(len(response.context['courses']), 5)
+
+
+class SearchEligibilityTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.student = MyUser.objects.create(name='elig', password='pass', role='student')
+        self.instructor = MyUser.objects.create(name='eligprof', password='pass', role='instructor')
+        self.done = self.make_course('CS100')
+        self.recent = self.make_course('CS101')
+        self.todo = self.make_course('CS102')
+        Enrollment.objects.create(student=self.student, course=self.done,
+                                  date_enrolled=date.today() - timedelta(days=200))
+        Enrollment.objects.create(student=self.student, course=self.recent, date_enrolled=date.today())
+
+        session = self.client.session
+        session['name'] = self.student.name
+        session['role'] = self.student.role
+        session.save()
+
+    def make_course(self, code, *prerequisites):
+        course = Course.objects.create(code=code, title=f'Course {code}', seat_limit=5, instructor=self.instructor)
+        course.prerequisites.set(prerequisites)
+        return course
+
+    def test_only_courses_with_completed_prerequisites(self):
+        open_course = self.make_course('CS200', self.done)
+        self.make_course('CS201', self.done, self.recent)
+        self.make_course('CS202', self.todo)
+        codes = set(eligible_courses(self.student, Course.objects.all()).values_list('code', flat=True))
+        self.assertEqual(codes, {'CS100', 'CS101', 'CS102', open_course.code})
+
+    def test_search_query_count_independent_of_result_size(self):
+        def search_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('search_courses'), {'q': 'course'})
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.make_course('CS300', self.done)
+        search_queries()  # resolves and caches the logged-in user
+        small = search_queries()
+        for i in range(15):
+            self.make_course(f'CS4{i:02d}', self.done, self.recent)
+            self.make_course(f'CS5{i:02d}', self.done)
+        self.assertEqual(search_queries(), small)
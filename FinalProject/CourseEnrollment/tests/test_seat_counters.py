@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import MyUser, Course, Enrollment, OverrideRequest, WaitlistEntry
+from ..seats import create_enrollment, add_to_waitlist, reconcile_seat_counts
+
+
+class SeatCounterTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.student = MyUser.objects.create(name='seatstudent', password='pass', role='student')
+        self.other = MyUser.objects.create(name='otherstudent', password='pass', role='student')
+        self.instructor = MyUser.objects.create(name='seatinstructor', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS300', title='Systems', seat_limit=1,
+                                            instructor=self.instructor)
+        self.login(self.student)
+
+    def login(self, user):
+        session = self.client.session
+        session['name'] = user.name
+        session['role'] = user.role
+        session.save()
+
+    def assertCounts(self, enrolled, waitlisted):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, enrolled)
+        self.assertEqual(self.course.waitlist_count, waitlisted)
+
+    def test_catalog_enroll_increments_counter(self):
+        self.client.post(reverse('course_catalog'), {'course_id': self.course.id})
+        self.assertCounts(1, 0)
+
+    def test_full_course_waitlists_using_counter(self):
+        create_enrollment(self.other, self.course)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('course_catalog'), {'course_id': self.course.id})
+        self.assertTrue(WaitlistEntry.objects.filter(student=self.student, course=self.course).exists())
+        self.assertCounts(1, 1)
+        # the seat check reads the course row, it never counts the enrollments table
+        self.assertFalse(any('COUNT' in q['sql'] and 'enrollment' in q['sql'].lower()
+                             for q in ctx.captured_queries))
+
+    def test_catalog_drop_promotes_and_keeps_counts(self):
+        create_enrollment(self.student, self.course)
+        add_to_waitlist(self.other, self.course)
+        self.client.post(reverse('course_catalog'), {'course_id': self.course.id, 'action': 'drop'})
+        self.assertTrue(Enrollment.objects.filter(student=self.other, course=self.course).exists())
+        self.assertCounts(1, 0)
+
+    def test_drop_course_view_decrements(self):
+        create_enrollment(self.student, self.course)
+        self.client.post(reverse('drop_course', args=[self.course.id]))
+        self.assertCounts(0, 0)
+
+    def test_instructor_remove_decrements(self):
+        enrollment = create_enrollment(self.student, self.course)
+        self.login(self.instructor)
+        self.client.post(reverse('instructor_enrollments'), {'enrollment_id': enrollment.id, 'action': 'remove'})
+        self.assertCounts(0, 0)
+
+    def test_admin_override_approval_updates_both_counters(self):
+        add_to_waitlist(self.student, self.course)
+        req = OverrideRequest.objects.create(student=self.student, course=self.course, reason='please')
+        MyUser.objects.create(name='seatadmin', password='pass', role='administrator')
+        session = self.client.session
+        session['name'] = 'seatadmin'
+        session['role'] = 'administrator'
+        session.save()
+        self.client.post(reverse('admin_enrollment_manager'), {'request_id': req.id, 'action': 'approved'})
+        self.assertCounts(1, 0)
+
+    def test_reconcile_fixes_drift(self):
+        Enrollment.objects.create(student=self.student, course=self.course)
+        WaitlistEntry.objects.create(student=self.other, course=self.course)
+        self.assertCounts(0, 0)
+        drifted = reconcile_seat_counts()
+        self.assertEqual([c.id for c in drifted], [self.course.id])
+        self.assertCounts(1, 1)
+        self.assertEqual(reconcile_seat_counts(), [])
+
+    def test_reconcile_command(self):
+        Enrollment.objects.create(student=self.student, course=self.course)
+        out = StringIO()
+        call_command('reconcile_seat_counts', stdout=out)
+        self.assertIn('CS300: enrolled=1 waitlisted=0', out.getvalue())
+        self.assertCounts(1, 0)
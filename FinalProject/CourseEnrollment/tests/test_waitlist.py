@@ -0,0 +1,154 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import MyUser, Course, Enrollment, WaitlistEntry
+from ..seats import create_enrollment, add_to_waitlist
+from ..waitlist import student_waitlist, promote_from_waitlist
+
+
+class WaitlistPositionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.student = MyUser.objects.create(name='waiter', password='pass', role='student')
+        self.instructor = MyUser.objects.create(name='wprof', password='pass', role='instructor')
+        self.others = MyUser.objects.bulk_create([
+            MyUser(name=f'other{i}', password='pass', role='student') for i in range(30)
+        ])
+        session = self.client.session
+        session['name'] = self.student.name
+        session['role'] = self.student.role
+        session.save()
+
+    def queue(self, code, ahead):
+        """A full course with `ahead` students waiting before self.student."""
+        course = Course.objects.create(code=code, title=f'Course {code}', seat_limit=0, instructor=self.instructor)
+        for student in self.others[:ahead]:
+            WaitlistEntry.objects.create(student=student, course=course)
+        WaitlistEntry.objects.create(student=self.student, course=course)
+        for student in self.others[ahead:ahead + 3]:
+            WaitlistEntry.objects.create(student=student, course=course)
+        return course
+
+    def test_positions_for_every_waitlist_in_one_query(self):
+        for i, ahead in enumerate([0, 4, 25, 12]):
+            self.queue(f'WL{i}', ahead)
+        with self.assertNumQueries(1):
+            positions = {entry.course.code: entry.position for entry in student_waitlist(self.student)}
+        self.assertEqual(positions, {'WL0': 1, 'WL1': 5, 'WL2': 26, 'WL3': 13})
+
+    def test_timestamp_ties_fall_back_to_insertion_order(self):
+        course = self.queue('WL9', 2)
+        WaitlistEntry.objects.filter(course=course).update(timestamp=timezone.now() - timedelta(hours=1))
+        self.assertEqual([e.position for e in student_waitlist(self.student)], [3])
+
+    def test_status_page_shows_positions(self):
+        self.queue('WL5', 7)
+        response = self.client.get(reverse('waitlist_status'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Position: 8')
+
+
+class WaitlistPromotionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.instructor = MyUser.objects.create(name='promoprof', password='pass', role='instructor')
+        self.course = Course.objects.create(code='CS400', title='Compilers', seat_limit=2,
+                                            meeting_times='MWF 9-10AM', instructor=self.instructor)
+        self.enrolled = [self.student(f'in{i}') for i in range(2)]
+        for student in self.enrolled:
+            create_enrollment(student, self.course, date_enrolled=date.today())
+        self.waiting = [self.student(f'wait{i}') for i in range(5)]
+        for student in self.waiting:
+            add_to_waitlist(student, self.course)
+
+    def student(self, name):
+        return MyUser.objects.create(name=name, password='pass', role='student')
+
+    def login(self, user):
+        session = self.client.session
+        session['name'] = user.name
+        session['role'] = user.role
+        session.save()
+
+    def assertState(self, enrolled, waitlisted):
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, enrolled)
+        self.assertEqual(self.course.waitlist_count, waitlisted)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), enrolled)
+        self.assertEqual(WaitlistEntry.objects.filter(course=self.course).count(), waitlisted)
+
+    def is_enrolled(self, student):
+        return Enrollment.objects.filter(student=student, course=self.course).exists()
+
+    def test_full_course_promotes_nobody(self):
+        self.assertEqual(promote_from_waitlist(self.course), [])
+        self.assertState(2, 5)
+
+    def test_seat_limit_increase_promotes_in_fifo_order(self):
+        Course.objects.filter(id=self.course.id).update(seat_limit=5)
+        promoted = promote_from_waitlist(self.course)
+        self.assertEqual([e.student_id for e in promoted], [s.id for s in self.waiting[:3]])
+        self.assertState(5, 2)
+
+    def test_ineligible_students_are_skipped_and_keep_their_place(self):
+        prerequisite = Course.objects.create(code='CS100', title='Intro', seat_limit=50, instructor=self.instructor)
+        self.course.prerequisites.add(prerequisite)
+        for student in self.waiting[1:]:
+            Enrollment.objects.create(student=student, course=prerequisite,
+                                      date_enrolled=date.today() - timedelta(days=200))
+        clash = Course.objects.create(code='CS410', title='Clash', seat_limit=50, meeting_times='MW 9:30-11AM',
+                                      instructor=self.instructor)
+        create_enrollment(self.waiting[1], clash, date_enrolled=date.today())
+
+        Course.objects.filter(id=self.course.id).update(seat_limit=4)
+        promote_from_waitlist(self.course)
+        self.assertEqual([self.is_enrolled(s) for s in self.waiting], [False, False, True, True, False])
+        self.assertState(4, 3)
+
+    def test_already_enrolled_entries_are_cleared(self):
+        create_enrollment(self.waiting[0], self.course, date_enrolled=date.today())
+        Course.objects.filter(id=self.course.id).update(seat_limit=4)
+        promote_from_waitlist(self.course)
+        self.assertTrue(self.is_enrolled(self.waiting[1]))
+        self.assertFalse(WaitlistEntry.objects.filter(student=self.waiting[0]).exists())
+        self.assertState(4, 3)
+
+    def test_large_increase_is_batched(self):
+        extra = MyUser.objects.bulk_create([MyUser(name=f'bulk{i}', role='student') for i in range(60)])
+        for student in extra:
+            add_to_waitlist(student, self.course)
+        Course.objects.filter(id=self.course.id).update(seat_limit=52)
+        with CaptureQueriesContext(connection) as ctx:
+            promoted = promote_from_waitlist(self.course)
+        self.assertEqual(len(promoted), 50)
+        self.assertLess(len(ctx.captured_queries), 20)
+        self.assertState(52, 15)
+
+    def test_student_drop_promotes(self):
+        self.login(self.enrolled[0])
+        self.client.post(reverse('drop_course', args=[self.course.id]))
+        self.assertTrue(self.is_enrolled(self.waiting[0]))
+        self.assertState(2, 4)
+
+    def test_catalog_drop_promotes(self):
+        self.login(self.enrolled[0])
+        response = self.client.post(reverse('course_catalog'), {'course_id': self.course.id, 'action': 'drop'})
+        self.assertContains(response, 'wait0 has been auto-enrolled from the waitlist')
+        self.assertState(2, 4)
+
+    def test_instructor_removal_promotes(self):
+        self.login(self.instructor)
+        enrollment = Enrollment.objects.get(student=self.enrolled[1], course=self.course)
+        self.client.post(reverse('instructor_enrollments'), {'enrollment_id': enrollment.id, 'action': 'remove'})
+        self.assertTrue(self.is_enrolled(self.waiting[0]))
+
+    def test_instructor_seat_limit_increase_promotes(self):
+        self.login(self.instructor)
+        self.client.post(reverse('edit_course', args=[self.course.id]),
+                         {'syllabus': '', 'meeting_times': 'MWF 9-10AM', 'seat_limit': 4})
+        self.assertState(4, 3)
@@ -9,7 +9,8 @@ from .views import (
     ManageEnrollmentsView, ManageOverrideRequestsView,
     SendEmailView, EditCourseView, AdminView, AdminCourseView, AdminEnrollmentView, AdminStudentManagerView,
     EnrollmentGeneratorView, AdminEditCourseView, AdminAddCourseView, CourseCatalogView, SignupView, GradeEntryView,
-    OfficeHourSlotCreateView, OfficeHourListView, BookOfficeHourSlotView
+    OfficeHourSlotCreateView, OfficeHourListView, BookOfficeHourSlotView, RecurringOfficeHoursView, ExportView,
+    AnalyticsView, AdminImportView, GradebookView, GradingSchemeView
 )
 
 urlpatterns = [
@@ -33,7 +34,10 @@ urlpatterns = [
     path('admin_enrollment_manager/', AdminEnrollmentView.as_view(), name='admin_enrollment_manager'),
     path('admin_student_manager/', AdminStudentManagerView.as_view(), name='admin_student_manager'),
     path('enrollment_report_generator/', EnrollmentGeneratorView.as_view(), name = 'enrollment_report_generator'),
+    path('enrollment_report_generator/export/<str:dataset>/', ExportView.as_view(), name='report_export'),
+    path('enrollment_report_generator/analytics/', AnalyticsView.as_view(), name='report_analytics'),
     path('admin_add_course/', AdminAddCourseView.as_view(), name = 'admin_add_course'),
+    path('admin_import/', AdminImportView.as_view(), name='admin_import'),
     path('student_enroll_history/', AdminEnrollmentHistoryView.as_view(), name = 'student_enrollment_history'),
     path('edit_enrollment/', EditEnrollmentView.as_view(), name = 'admin_edit_enrollment'),
     path('admin_student_acct_edit', AdminStudentEditView.as_view(), name = 'admin_student_acct_edit'),
@@ -49,7 +53,10 @@ urlpatterns += [
     path('instructor/course/<int:course_id>/edit/', EditCourseView.as_view(), name='edit_course'),
     path('signup/', SignupView.as_view(), name='signup'),
     path('course/<int:course_id>/grades/', GradeEntryView.as_view(), name='grade-entry'),
+    path('course/<int:course_id>/gradebook/', GradebookView.as_view(), name='gradebook'),
+    path('course/<int:course_id>/grading/', GradingSchemeView.as_view(), name='grading-scheme'),
     path('office-hours/', OfficeHourListView.as_view(), name='office-hours'),
     path('office-hours/new/', OfficeHourSlotCreateView.as_view(), name='office-hours-create'),
+    path('office-hours/recurring/', RecurringOfficeHoursView.as_view(), name='office-hours-recurring'),
     path('office-hours/<int:slot_id>/book/', BookOfficeHourSlotView.as_view(), name='office-hours-book'),
 ]
@@ -1,15 +1,38 @@
-from datetime import date, timedelta, datetime
+import io
+import re
+from datetime import timedelta
 
 from django.contrib.auth import logout
 
 from idlelib.rpc import request_queue
 
-from django.db.models import Count
-from django.http import HttpResponse
+from django.core.paginator import Paginator
+from django.db.models import Prefetch
+from django.http import HttpResponse, HttpResponseBadRequest, Http404, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.views import View
-from django.core.mail import send_mail
 
+from . import analytics
+from .catalog import render_catalog
+from .exports import export_lines, DATASETS, FORMATS
+from .history import apply_enrollment_edits, edits_from_post, split_history, student_history
+from .grading import post_final_grades, record_letter_removal, save_scheme, scheme_rows, student_gpa
+from .gradebook import Cell, assignment_column, assignments, csv_cells, form_cells, roster, save_grades
+from .imports import run_import, IMPORTERS
+from .mailer import queue_course_email, send_in_background
+from .office_hours import (book_slot, booking_message, create_recurring_slots, create_slot, expand_recurrence,
+                           slot_window, BOOKED, SLOT_MINUTES, WINDOW_DAYS)
+from .current_user import role_required
+from .prerequisites import creates_cycle
+from .schedule import parse_meeting_times, parse_schedule_filter, courses_meeting
+from .waitlist import student_waitlist, promote_from_waitlist, drop_and_promote
+from .stats import (enrollment_report, enrollment_trend, move_course, record_removal,
+                    GRANULARITIES)
+from .search import search_courses, PAGE_SIZE as SEARCH_PAGE_SIZE
+from .admission import admit, admission_message, eligible_courses, ENROLLED, ALREADY_ENROLLED
+from .seats import remove_from_waitlist
 from .models import MyUser, Course, Enrollment, OverrideRequest, WaitlistEntry, Grade, OfficeHourSlot, OfficeHourBooking
 
 
@@ -35,12 +58,10 @@ class LoginView(View):
         request.session['user_id'] = user.id
         request.session['name']    = user.name
         request.session['role']    = user.role
-        print("post made it here!")
         if user.role == 'student':
             return redirect('student_dashboard')
         elif user.role == 'administrator':
             return redirect('admin_dashboard')
-        print("role:", user.role)
         return redirect('instructor_dashboard')
         # return HttpResponse("Redirecting to instructor dashboard")
 
@@ -53,12 +74,9 @@ class RedirectView(View):
 class StudentView(View):
     # gather information needed for Student View
     # gather all courses that students are enrolled in
+    @role_required('student')
     def get(self, request):
-        name = request.session.get('name')
-        if not name or request.session.get('role') != 'student':
-            return redirect('login')
-
-        student = MyUser.objects.filter(name=name, role='student').first()
+        student = request.current_user
         # Get course IDs the student is already enrolled in
         enrolled_course_ids = Enrollment.objects.filter(student=student).values_list('course_id', flat=True)
 
@@ -70,20 +88,14 @@ class StudentView(View):
 
 
 class InstructorView(View):
+    @role_required('instructor')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'instructor':
-            return redirect('login')
-
-        # it isn't finding the user object. because of the two lines commented out
-        # instructor = get_object_or_404(MyUser, name=name, role='instructor')
-        user = MyUser.objects.filter(name=name).first()
+        user = request.current_user
         courses = Course.objects.filter(instructor=user).all()
 
         return render(request, 'instructor_dashboard.html', {
             'name': user.fullName,
-            'role': role,
+            'role': user.role,
             'courses': courses,
         })
 class AdminView(View):
@@ -93,142 +105,100 @@ class AdminView(View):
     # exceptions)
     # Feature 3: Manage student accounts and enrollment history
     # Feature 4: Generate reports on enrollment statistics and trends
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-        print("role:", role)
-        student = MyUser.objects.filter(name=name).first()
-        return render(request, 'admin_dashboard.html', {'name': student.fullName, 'role': role})
+        user = request.current_user
+        return render(request, 'admin_dashboard.html', {'name': user.fullName, 'role': user.role})
 
 
 class SearchCoursesView(View):
+    @role_required('student')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'student':
-            return redirect('login')
-
-        student = MyUser.objects.filter(name=name, role='student').first()
-        if not student:
-            return redirect('login')
+        student = request.current_user
 
         # Gather filters
         query = request.GET.get('q', '').strip()
         schedule = request.GET.get('schedule', '').strip()
 
-        # Start with all courses
-        courses = Course.objects.all()
-
-        # Filter by title or code
-        if query:
-            courses = courses.filter(title__icontains=query) | courses.filter(code__icontains=query)
+        # Full-text search over code, title, syllabus and instructor, best matches first
+        courses = search_courses(query).select_related('instructor')
 
-        # Filter by meeting_times
+        # Filter by meeting times: an indexed range query over the parsed meeting blocks,
+        # falling back to a text match when the filter isn't a day/time we understand
         if schedule:
-            courses = courses.filter(meeting_times__icontains=schedule)
-
-        # Filter by completed prerequisites (enrolled 119+ days ago)
-        cutoff = date.today() - timedelta(days=119)
-        completed_course_ids = Enrollment.objects.filter(
-            student=student,
-            date_enrolled__lte=cutoff
-        ).values_list('course_id', flat=True)
+            window = parse_schedule_filter(schedule)
+            if window:
+                courses = courses_meeting(courses, *window)
+            else:
+                courses = courses.filter(meeting_times__icontains=schedule)
 
-        eligible_courses = []
-        for course in courses:
-            unmet_prereqs = course.prerequisites.exclude(id__in=completed_course_ids)
-            if not unmet_prereqs.exists():
-                eligible_courses.append(course)
+        # Only courses whose prerequisites are completed (enrolled 119+ days ago)
+        courses = eligible_courses(student, courses)
 
+        page = Paginator(courses, SEARCH_PAGE_SIZE).get_page(request.GET.get('page'))
         return render(request, 'search_courses.html', {
-            'courses': eligible_courses,
+            'courses': page.object_list,
+            'page_obj': page,
             'query': query,
             'schedule': schedule
         })
 
 
 class EnrollCourseView(View):
+    @role_required()
     def get(self, request, course_id):
-        name = request.session.get('name')
-        if not name:
-            return redirect('login')
-        user = get_object_or_404(MyUser, name=name)
+        user = request.current_user
         course = get_object_or_404(Course, id=course_id)
 
+        admission = admit(user, course)
         # prevent double-enroll
-        if Enrollment.objects.filter(student=user, course=course).exists():
+        if admission.status == ALREADY_ENROLLED:
             return render(request, "already_enrolled.html", {"course": course})
-
-        Enrollment.objects.create(student=user, course=course)
+        if admission.status != ENROLLED:
+            return render_catalog(request, user, admission_message(admission, course))
         return redirect('student_dashboard')
 
 
 class DropCourseView(View):
+    @role_required()
     def post(self, request, course_id):
-        name = request.session.get('name')
-        if not name:
-            return redirect('login')
-
         course = get_object_or_404(Course, id=course_id)
-        enrollment = Enrollment.objects.filter(student__name=name, course=course).first()
-        if enrollment:
-            enrollment.delete()
+        drop_and_promote(Enrollment.objects.filter(student=request.current_user, course=course))
 
         return redirect('student_courses')
 
 
 class StudentCoursesView(View):
+    @role_required()
     def get(self, request):
-        name = request.session.get('name')
-        if not name:
-            return redirect('login')
-        user = get_object_or_404(MyUser, name=name)
-        enrollments = Enrollment.objects.filter(student=user)
+        enrollments = Enrollment.objects.filter(student=request.current_user).select_related('course')
         return render(request, 'student_courses.html', {'enrollments': enrollments})
 
 
 class RequestOverrideView(View):
+    @role_required()
     def get(self, request, course_id):
-        name = request.session.get('name')
-        if not name:
-            return redirect('login')
         course = get_object_or_404(Course, id=course_id)
-        existing = OverrideRequest.objects.filter(student__name=name, course=course).first()
+        existing = OverrideRequest.objects.filter(student=request.current_user, course=course).first()
         if existing:
             return render(request, 'already_requested.html', {'course': course})
         return render(request, 'request_override.html', {'course': course})
 
+    @role_required()
     def post(self, request, course_id):
-        name = request.session.get('name')
-        if not name:
-            return redirect('login')
         course = get_object_or_404(Course, id=course_id)
-        student = get_object_or_404(MyUser, name=name)
         reason = request.POST.get('reason')
-        OverrideRequest.objects.create(student=student, course=course, reason=reason)
+        OverrideRequest.objects.create(student=request.current_user, course=course, reason=reason)
         return redirect('student_dashboard')
 
 
 class WaitListStatusView(View):
+    @role_required('student')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'student':
-            return redirect('login')
-
-        student = MyUser.objects.filter(name=name, role='student').first()
-        if not student:
-            return redirect('login')
-
-        entries = WaitlistEntry.objects.filter(student=student)
-
-        entries_with_position = []
-        for entry in entries:
-            waitlist = WaitlistEntry.objects.filter(course=entry.course).order_by('timestamp')
-            position = list(waitlist.values_list('student_id', flat=True)).index(student.id) + 1
-            entries_with_position.append({'entry': entry, 'position': position})
+        # positions for every course come back with the entries in a single query
+        entries_with_position = [
+            {'entry': entry, 'position': entry.position} for entry in student_waitlist(request.current_user)
+        ]
 
         return render(request, 'waitlist_status.html', {
             'waitlist_entries': entries_with_position
@@ -242,137 +212,128 @@ class LogoutView(View):
 
 # feature 1: Manage Enrollments
 class ManageEnrollmentsView(View):
+    @role_required('instructor')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'instructor':
-            return redirect('login')
-        instructor = get_object_or_404(MyUser, name=name, role='instructor')
-        courses = Course.objects.filter(instructor=instructor)
+        courses = Course.objects.filter(instructor=request.current_user).prefetch_related(
+            Prefetch('enrollments', queryset=Enrollment.objects.select_related('student')))
         return render(request, 'instructor_enrollments.html', {'courses': courses})
 
+    @role_required('instructor')
     def post(self, request):
         enrollment_id = request.POST.get('enrollment_id')
-        enrollment = get_object_or_404(Enrollment, id=enrollment_id)
+        # only enrollments in the instructor's own courses
+        enrollment = get_object_or_404(Enrollment, id=enrollment_id, course__instructor=request.current_user)
         if request.POST.get('action') == 'remove':
-            enrollment.delete()
+            drop_and_promote(Enrollment.objects.filter(id=enrollment.id))
         return redirect('instructor_enrollments')
 
 
 # feature 2: Override Requests
 class ManageOverrideRequestsView(View):
+    @role_required('instructor')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'instructor':
-            return redirect('login')
-
-        instructor = MyUser.objects.filter(name=name, role='instructor').first()
-        reqs = OverrideRequest.objects.filter(course__instructor=instructor, status='pending')
+        reqs = OverrideRequest.objects.filter(course__instructor=request.current_user, status='pending') \
+            .select_related('student', 'course')
         return render(request, 'instructor_requests.html', {'requests': reqs})
 
+    @role_required('instructor')
     def post(self, request):
-        req = get_object_or_404(OverrideRequest, id=request.POST.get('request_id'))
+        req = get_object_or_404(OverrideRequest, id=request.POST.get('request_id'),
+                                course__instructor=request.current_user)
         req.status = 'approved' if request.POST.get('action') == 'approve' else 'denied'
         req.save()
         if req.status == 'approved':
-            Enrollment.objects.create(student=req.student, course=req.course)
+            # an approved override skips the prerequisite and seat limit checks
+            admit(req.student, req.course, check_prerequisites=False, enforce_seat_limit=False,
+                  check_schedule=False)
         return redirect('instructor_requests')
 
 
 # feature 3: Send Email
 class SendEmailView(View):
+    @role_required('instructor')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'instructor':
-            return redirect('login')
-        instructor = get_object_or_404(MyUser, name=name, role='instructor')
-        courses = Course.objects.filter(instructor=instructor)
+        courses = Course.objects.filter(instructor=request.current_user)
         return render(request, 'instructor_email.html', {'courses': courses})
 
+    @role_required('instructor')
     def post(self, request):
-        course = Course.objects.filter(
-            id=request.POST.get('course_id'),
-            instructor__name=request.session.get('name'),
-        ).first()
-        subject = request.POST.get('subject')
-        message = request.POST.get('message')
-        students = [enr.student for enr in Enrollment.objects.filter(course=course)]
-        recipient_list = [s.email for s in students if s.email]
-        send_mail(subject, message, None, recipient_list)
-        return render(request, 'email_sent.html', {'recipients': recipient_list})
+        course = Course.objects.filter(id=request.POST.get('course_id'), instructor=request.current_user).first()
+        if course is None:
+            return redirect('instructor_email')
+        # the request only records the email; the students get it from a worker thread
+        delivery, recipients = queue_course_email(course, request.current_user,
+                                                  request.POST.get('subject', ''), request.POST.get('message', ''))
+        send_in_background(delivery)
+        return render(request, 'email_sent.html', {'course': course, 'delivery': delivery,
+                                                   'recipients': recipients})
 
 
 # feature 4: Edit Course details
 class EditCourseView(View):
+    @role_required('instructor')
     def get(self, request, course_id):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'instructor':
-            return redirect('login')
-
-        instructor = get_object_or_404(MyUser, name=name, role='instructor')
-        course = get_object_or_404(Course, id=course_id, instructor=instructor)
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
         return render(request, 'instructor_edit_course.html', {'course': course})
 
+    @role_required('instructor')
     def post(self, request, course_id):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'instructor':
-            return redirect('login')
-
-        instructor = get_object_or_404(MyUser, name=name, role='instructor')
-        course = get_object_or_404(Course, id=course_id, instructor=instructor)
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
 
         course.syllabus      = request.POST.get('syllabus')
         course.meeting_times = request.POST.get('meeting_times')
         course.seat_limit    = int(request.POST.get('seat_limit'))
         course.save()
+        # a higher limit opens seats for the waitlist
+        promote_from_waitlist(course)
 
         return redirect('instructor_dashboard')
 class AdminCourseView(View):
     # Get method used to fetch list of courses.
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
-        courses = Course.objects.all()
+        courses = Course.objects.select_related('instructor').prefetch_related('prerequisites')
         return render(request,'admin_course_manager.html', {
             'courses': courses,
-            'name' : name ,
-            'role' : role})
+            'name' : request.session.get('name'),
+            'role' : request.session.get('role')})
     # Post method will be used to add/delete/edit courses
+    @role_required('administrator')
     def post(self, request):
         course_id = request.POST.get('course_id')
         action = request.POST.get('action')
-        print("Action: ", action)
         if action == 'delete':
             course = Course.objects.filter(code=course_id).first()
+            record_removal(course.enrollments.all())
+            record_letter_removal(course.enrollments.all())
             course.delete()
-            all_courses = Course.objects.all()
+            all_courses = Course.objects.select_related('instructor').prefetch_related('prerequisites')
             return render(request, 'admin_course_manager.html', {
                 'courses': all_courses,
                 'message': 'Course Deleted Successfully'
             })
         request.session['editing_course_id'] = course_id  # store in session
         return redirect('admin_edit_course')
+
+def _prerequisite_ids(values):
+    # The posted prerequisite ids as ints, or None if any of them is not the id of an existing course
+    if not all(value.isdigit() for value in values):
+        return None
+    ids = {int(value) for value in values}
+    return ids if Course.objects.filter(id__in=ids).count() == len(ids) else None
+
 class AdminEditCourseView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
         course_id = request.session.get('editing_course_id')
         if not course_id:
             return redirect('admin_course_manager')  # fallback
-        course = Course.objects.filter(code=course_id).first()
+        course = Course.objects.filter(code=course_id).select_related('instructor') \
+            .prefetch_related('prerequisites').first()
         all_courses = Course.objects.exclude(code=course_id)  # don’t allow self as prereq
         return render(request, 'admin_edit_course.html', {'course': course,
                                                           'all_courses': all_courses})
+    @role_required('administrator')
     def post(self, request):
         # Something wrong when we try to save course editing information.
         course_code = request.POST.get('course_code')
@@ -383,16 +344,37 @@ class AdminEditCourseView(View):
         course = Course.objects.get(code=course_code)
         if not course:
             return redirect('admin_course_manager')
+
+        # Reject prerequisites that would make the course (indirectly) require itself
+        prereq_ids = _prerequisite_ids(request.POST.getlist('prerequisites'))
+        if prereq_ids is None:
+            return render(request, 'admin_edit_course.html', {
+                'course': course,
+                'all_courses': Course.objects.exclude(code=course_code),
+                'message': 'Invalid prerequisites. Choose them from the list of courses.'})
+        if creates_cycle(course.id, prereq_ids):
+            return render(request, 'admin_edit_course.html', {
+                'course': course,
+                'all_courses': Course.objects.exclude(code=course_code),
+                'message': 'Those prerequisites would create a cycle: a course cannot require itself, '
+                           'directly or through its prerequisites.'})
+
         course.title = request.POST.get('title')
         course.syllabus = request.POST.get('syllabus')
         course.meeting_times = request.POST.get('meeting_times')
         # for changes to instructor:
         # We will first check to see if instructor already exist
         instructor_name = request.POST.get('instructor_name')
+        previous_instructor_id = course.instructor_id
         # This line will avoid any exception being returned when trying to find instructor.
         find_instructor = MyUser.objects.filter(name=instructor_name, role='instructor').first()
         if find_instructor:
             course.instructor = find_instructor
+        elif MyUser.objects.filter(name=instructor_name).exists():
+            return render(request, 'admin_edit_course.html', {
+                'course': course,
+                'all_courses': Course.objects.exclude(code=course_code),
+                'message': f'{instructor_name} is a user but not an instructor.'})
         else:
             course.instructor = MyUser.objects.create(name=instructor_name, password = "pass",
                                                       role='instructor')
@@ -401,21 +383,20 @@ class AdminEditCourseView(View):
         course.seat_limit = request.POST.get('seat_limit')
 
         # Save the prereqs
-        prereq_ids = request.POST.getlist('prerequisites')
         course.prerequisites.set(prereq_ids)  # ManyToManyField update
 
         course.save()
+        if course.instructor_id != previous_instructor_id:
+            move_course(course.id, previous_instructor_id, course.instructor_id)
+        promote_from_waitlist(course)
         return redirect('admin_course_manager')
 class AdminAddCourseView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
         courses = Course.objects.all()
         return render(request, 'admin_add_course.html', {'courses': courses})
     # handle the processing of adding a new course.
+    @role_required('administrator')
     def post(self, request):
         course_code = request.POST.get('course_code')
         # check if course code exist first and is not just blank or whitespace answer
@@ -447,6 +428,9 @@ class AdminAddCourseView(View):
             instructor_found = MyUser.objects.filter(name=instructor_name, role='instructor').first()
             if instructor_found:
                 instructor = instructor_found
+            elif MyUser.objects.filter(name=instructor_name).exists():
+                return render(request, 'admin_add_course.html',
+                              {'message': f'{instructor_name} is a user but not an instructor.'})
             else:
                 instructor = MyUser.objects.create(name=instructor_name, password = "pass", role = 'instructor')
         else:
@@ -460,12 +444,14 @@ class AdminAddCourseView(View):
             seat_limit = int(seat_limit)
         except (TypeError, ValueError):
             seat_limit = 0  # or raise a validation error
-        print("seat limit: ", seat_limit)
         # print("seat limit: ", int(seat_limit))
         if seat_limit <= 0:
             return render(request, 'admin_add_course.html', {'message': 'Invalid seat limit. Seat limit must be one or more'})
         # Save the prereqs
-        prereq_ids = request.POST.getlist('prerequisites')
+        prereq_ids = _prerequisite_ids(request.POST.getlist('prerequisites'))
+        if prereq_ids is None:
+            return render(request, 'admin_add_course.html',
+                          {'message': 'Invalid prerequisites. Choose them from the list of courses.'})
         # create course
         new_course = Course.objects.create(code = course_code, title = course_title, syllabus = course_syllabus,
                                            meeting_times = meeting_times, seat_limit = seat_limit, instructor = instructor, waitlist_enabled=waitlist_enabled)
@@ -475,26 +461,23 @@ class AdminAddCourseView(View):
         return render(request, 'admin_course_manager.html', { 'courses' : courses, 'message': 'Added course successfully.'})
 
 class AdminEnrollmentView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
-        pending_requests = OverrideRequest.objects.filter(status='pending')
+        pending_requests = OverrideRequest.objects.filter(status='pending').select_related('student', 'course')
         return render(request, 'admin_enrollment_manager.html', {
-            'name': name,
-            'role': role,
+            'name': request.session.get('name'),
+            'role': request.session.get('role'),
             'requests': pending_requests
         })
 
+    @role_required('administrator')
     def post(self, request):
         request_id = request.POST.get('request_id')
         action = request.POST.get('action')
 
         override_request = OverrideRequest.objects.filter(id=request_id).first()
         if not override_request:
-            pending_requests = OverrideRequest.objects.filter(status='pending')
+            pending_requests = OverrideRequest.objects.filter(status='pending').select_related('student', 'course')
             return render(request, 'admin_enrollment_manager.html', {
                 'requests': pending_requests,
                 'message': 'Override request not found.'
@@ -512,63 +495,44 @@ class AdminEnrollmentView(View):
             course = override_request.course
 
             # Enroll the student if not already enrolled
-            if not Enrollment.objects.filter(student=student, course=course).exists():
-                Enrollment.objects.create(
-                    student=student,
-                    course=course,
-                    date_enrolled=date.today()
-                )
+            admit(student, course, check_prerequisites=False, enforce_seat_limit=False, check_schedule=False)
 
             # Remove from waitlist if present
-            WaitlistEntry.objects.filter(student=student, course=course).delete()
+            remove_from_waitlist(WaitlistEntry.objects.filter(student=student, course=course))
 
             message = 'Request accepted and student enrolled successfully.'
 
         # Reload pending requests
-        pending_requests = OverrideRequest.objects.filter(status='pending')
+        pending_requests = OverrideRequest.objects.filter(status='pending').select_related('student', 'course')
         return render(request, 'admin_enrollment_manager.html', {
             'requests': pending_requests,
             'message': message
         })
 
 class AdminStudentManagerView(View):
+    @role_required('administrator')
     def get(self, request):
-        # name = request.session.get('name')
-        # role = request.session.get('role')
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
         students = MyUser.objects.filter(role='student')
         return render(request, 'admin_student_manager.html', {'students' : students})
+    @role_required('administrator')
     def post(self, request):
         student_id = request.POST.get('student_id')
         student = MyUser.objects.filter(id=student_id).first()
-
-        all_enrollments = Enrollment.objects.filter(student=student)
-
-        today = date.today()
-        cutoff = today - timedelta(days=119)
-
-        current_enrollments = all_enrollments.filter(date_enrolled__gte=cutoff)
-        past_enrollments = all_enrollments.filter(date_enrolled__lt=cutoff)
+        current_enrollments, past_enrollments = student_history(student)
 
         return render(request, 'student_enrollment_history.html', {
             'student': student,
+            'gpa': student_gpa(student),
             'current_enrollments': current_enrollments,
             'past_enrollments': past_enrollments
         })
 
 # will work alongside AdminStudentManagerView
 class AdminEnrollmentHistoryView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
         return render(request, 'student_enrollment_history.html')
+    @role_required('administrator')
     def post(self, request):
         # Case: Button clicked on enrollment history page
         student_id = request.POST.get('student_id')
@@ -585,22 +549,14 @@ class AdminEnrollmentHistoryView(View):
 
         if action == 'Drop':
             enrollment_id = request.POST.get('enrollment_id')
-            enrollment = Enrollment.objects.filter(id=enrollment_id,student = student)
-            enrollment.delete()
-
-            all_enrollments = Enrollment.objects.filter(student=student)
-
-            today = date.today()
-            cutoff = today - timedelta(days=119)
-
-            current_enrollments = all_enrollments.filter(date_enrolled__gte=cutoff)
-            past_enrollments = all_enrollments.filter(date_enrolled__lt=cutoff)
+            drop_and_promote(Enrollment.objects.filter(id=enrollment_id, student=student))
+            current_enrollments, past_enrollments = student_history(student)
             return render(request, 'student_enrollment_history.html', {
                 'current_enrollments': current_enrollments,
             'past_enrollments': past_enrollments,
                 'message': 'Enrollment dropped successfully.'})
         # Get all enrollments for the student
-        enrollments = Enrollment.objects.filter(student=student)
+        enrollments = Enrollment.objects.filter(student=student).select_related('course')
 
         return render(request, 'admin_edit_enrollment.html', {
             'student': student,
@@ -608,13 +564,10 @@ class AdminEnrollmentHistoryView(View):
         })
 
 class EditEnrollmentView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
         return render(request, 'admin_edit_enrollment.html')
+    @role_required('administrator')
     def post(self, request):
         student_id = request.POST.get('student_id')
         action = request.POST.get('action')
@@ -627,66 +580,40 @@ class EditEnrollmentView(View):
             return redirect('admin_student_manager')
 
         if action == 'go_back':
-            all_enrollments = Enrollment.objects.filter(student=student)
-
-            today = date.today()
-            cutoff = today - timedelta(days=119)
-
-            current_enrollments = all_enrollments.filter(date_enrolled__gte=cutoff)
-            past_enrollments = all_enrollments.filter(date_enrolled__lt=cutoff)
+            current_enrollments, past_enrollments = student_history(student)
             return render(request, 'student_enrollment_history.html', {
                 'student':student,'current_enrollments': current_enrollments,
-                'past_enrollments': past_enrollments})
+                'past_enrollments': past_enrollments, 'gpa': student_gpa(student)})
 
         # Check if form is trying to save edited data
-        if any(key.startswith('grade_') or key.startswith('date_') for key in request.POST):
-            # Update enrollments
-            for key in request.POST:
-                if key.startswith('grade_'):
-                    enrollment_id = key.split('_')[1]
-                    grade = request.POST.get(f'grade_{enrollment_id}')
-                    date_str = request.POST.get(f'date_{enrollment_id}')
-                    try:
-                        enrollment = Enrollment.objects.get(id=enrollment_id)
-                        enrollment.final_grade = grade or None
-                        if date_str:
-                            enrollment.date_enrolled = datetime.strptime(date_str, '%Y-%m-%d').date()
-                        enrollment.save()
-                    except Enrollment.DoesNotExist:
-                        continue
-
-            # After saving, render back to enrollment history
-
-            all_enrollments = Enrollment.objects.filter(student=student)
-
-            today = date.today()
-            cutoff = today - timedelta(days=119)
-
-            current_enrollments = all_enrollments.filter(date_enrolled__gte=cutoff)
-            past_enrollments = all_enrollments.filter(date_enrolled__lt=cutoff)
+        edits = edits_from_post(request.POST)
+        if edits:
+            result = apply_enrollment_edits(edits, student)
+            # render the history from the rows the edit already fetched
+            current_enrollments, past_enrollments = split_history(
+                e for e in result.enrollments.values() if e.student_id == student.id)
 
             return render(request, 'student_enrollment_history.html', {
                 'student': student,
+                'gpa': student_gpa(student),
                 'current_enrollments': current_enrollments,
-                'past_enrollments': past_enrollments
+                'past_enrollments': past_enrollments,
+                'message': ' '.join(result.errors),
             })
 
         # If just clicking "Edit Enrollments", show the edit form
-        enrollments = Enrollment.objects.filter(student=student)
+        enrollments = Enrollment.objects.filter(student=student).select_related('course')
         return render(request, 'admin_edit_enrollment.html', {
             'student': student,
             'enrollments': enrollments
         })
 
 class AdminStudentEditView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
         return render(request, 'admin_student_acct_edit.html')
 
+    @role_required('administrator')
     def post(self, request):
         student_id = request.POST.get('student_id')
         student = MyUser.objects.filter(id=student_id).first()
@@ -696,7 +623,13 @@ class AdminStudentEditView(View):
 
         # If the user submitted the edit form with changes
         if 'name' in request.POST and 'email' in request.POST:
-            student.name = request.POST.get('name')
+            name = request.POST.get('name')
+            if MyUser.objects.filter(name=name).exclude(id=student.id).exists():
+                return render(request, 'admin_student_acct_edit.html', {
+                    'student': student,
+                    'message': 'That username is already taken.'
+                })
+            student.name = name
             student.email = request.POST.get('email')
             student.password = request.POST.get('password')
             student.save()
@@ -709,157 +642,114 @@ class AdminStudentEditView(View):
         })
 
 class EnrollmentGeneratorView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'administrator':
-            return redirect('login')
-
-        total_enrollments = Enrollment.objects.count()
-        total_students = MyUser.objects.filter(role='student').count()
-        top_course = Course.objects.annotate(num_students=Count('enrollments')) \
-            .order_by('-num_students') \
-            .first()
-        enrollments_by_course = Course.objects.annotate(num_enrollments=Count('enrollments')).order_by(
-            '-num_enrollments')
-        enrollments_by_month = (
-            Enrollment.objects
-            .extra(select={'month': "strftime('%%Y-%%m', date_enrolled)"})
-            .values('month')
-            .annotate(total=Count('id'))
-            .order_by('month')
-        )
-        return render(request, 'enrollment_report_generator.html',
-                      {'total_enrollments': total_enrollments,
-                      'total_students': total_students,
-                       'top_course': top_course,
-                       'enrollments_by_course': enrollments_by_course,
-                       'enrollments_by_month': enrollments_by_month})
+        granularity = request.GET.get('granularity', 'month')
+        if granularity not in GRANULARITIES:
+            granularity = 'month'
+        start = _parse_report_date(request.GET.get('start'))
+        end = _parse_report_date(request.GET.get('end'))
+
+        context = enrollment_report()
+        context.update({
+            'trend': enrollment_trend(granularity, start, end),
+            'granularity': granularity,
+            'granularities': GRANULARITIES,
+            'start': start,
+            'end': end,
+        })
+        return render(request, 'enrollment_report_generator.html', context)
+    @role_required('administrator')
     def post(self, request):
         return render(request, 'enrollment_report_generator.html')
 
-class CourseCatalogView(View):
+def _parse_report_date(value):
+    # None for a blank, malformed or impossible (2025-02-30) date, e.g. to leave that end of a range open
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+class AnalyticsView(View):
+    @role_required('administrator')
     def get(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        if not name or role != 'student':
-            return redirect('login')
+        if not analytics.available():
+            return render(request, 'admin_analytics.html', {'message': 'Analytics needs NumPy installed on the server.'})
+        return render(request, 'admin_analytics.html', analytics.campus_analytics())
 
-        courses = Course.objects.all()
-        student = MyUser.objects.filter(name=name).first()
-        enrollments = Enrollment.objects.filter(student=student)
-        return render(request, 'course_catalog.html', {
-            'courses': courses,
-            'name': name,
-            'role': role,
-        'enrollments': enrollments})
+class AdminImportView(View):
+    @role_required('administrator')
+    def get(self, request):
+        return render(request, 'admin_import.html', {'kinds': IMPORTERS})
 
+    @role_required('administrator')
     def post(self, request):
-        name = request.session.get('name')
-        role = request.session.get('role')
-        action = request.POST.get('action')
+        kind = request.POST.get('kind')
+        upload = request.FILES.get('csv_file')
+        context = {'kinds': IMPORTERS, 'kind': kind}
+        if kind not in IMPORTERS or upload is None:
+            context['message'] = 'Choose what to import and a CSV file.'
+            return render(request, 'admin_import.html', context)
+        dry_run = bool(request.POST.get('dry_run'))
+        try:
+            # read the upload a line at a time instead of decoding it all up front
+            context['result'] = run_import(kind, io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''),
+                                           dry_run=dry_run)
+        except (ValueError, UnicodeDecodeError) as exc:
+            context['message'] = str(exc)
+        context['dry_run'] = dry_run
+        return render(request, 'admin_import.html', context)
+
+class ExportView(View):
+    # Raw report data as CSV or JSON Lines, e.g.
+    # /enrollment_report_generator/export/roster/?format=csv&course=CS101&start=2024-01-01
+    @role_required('administrator')
+    def get(self, request, dataset):
+        if dataset not in DATASETS:
+            raise Http404(f"No export called {dataset}")
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in FORMATS:
+            return HttpResponseBadRequest(f"Unknown format {fmt}; use one of {', '.join(FORMATS)}")
+
+        course = None
+        code = request.GET.get('course')
+        if code:
+            course = get_object_or_404(Course, code=code)
+        elif DATASETS[dataset].needs_course:
+            return HttpResponseBadRequest("A roster needs a course, e.g. ?course=CS101")
+        start = _parse_report_date(request.GET.get('start'))
+        end = _parse_report_date(request.GET.get('end'))
+
+        response = StreamingHttpResponse(export_lines(dataset, fmt, course, start, end),
+                                         content_type=FORMATS[fmt])
+        filename = f"{dataset}-{course.code}" if course else dataset
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+        return response
 
-        if not name or role != 'student':
-            return redirect('login')
+class CourseCatalogView(View):
+    @role_required('student')
+    def get(self, request):
+        return render_catalog(request, request.current_user)
 
+    @role_required('student')
+    def post(self, request):
+        action = request.POST.get('action')
         course_id = request.POST.get('course_id')
-        student = MyUser.objects.filter(name=name).first()
+        student = request.current_user
         course = Course.objects.filter(id=course_id).first()
 
         # Handle course drop
         if action == 'drop':
-            Enrollment.objects.filter(student=student, course=course).delete()
+            promoted = drop_and_promote(Enrollment.objects.filter(student=student, course=course))
             message = f"You have been dropped from {course.name}."
+            for enrollment in promoted:
+                message += f" {enrollment.student.name} has been auto-enrolled from the waitlist."
 
-            # Auto-enroll next waitlisted student
-            next_waitlisted = WaitlistEntry.objects.filter(course=course).order_by('timestamp').first()
-            if next_waitlisted:
-                Enrollment.objects.create(
-                    student=next_waitlisted.student,
-                    course=course,
-                    date_enrolled=date.today()
-                )
-                next_waitlisted.delete()
-                message += f" {next_waitlisted.student.name} has been auto-enrolled from the waitlist."
-
-            courses = Course.objects.all()
-            enrollments = Enrollment.objects.filter(student=student)
-            return render(request, 'course_catalog.html', {
-                'message': message,
-                'courses': courses,
-                'enrollments': enrollments
-            })
-
-        # Prevent duplicate enrollment
-        if Enrollment.objects.filter(student=student, course=course).exists():
-            message = f"Oops! You're already enrolled in {course.name}."
-            courses = Course.objects.all()
-            enrollments = Enrollment.objects.filter(student=student)
-            return render(request, 'course_catalog.html', {
-                'message': message,
-                'courses': courses,
-                'enrollments': enrollments
-            })
-
-        # Prerequisite completion check (must be enrolled for 119+ days)
-        prereqs = course.prerequisites.all()
-        cutoff_date = date.today() - timedelta(days=119)
-        completed_prereq_ids = Enrollment.objects.filter(
-            student=student,
-            date_enrolled__lte=cutoff_date
-        ).values_list('course_id', flat=True)
-        missing_prereqs = prereqs.exclude(id__in=completed_prereq_ids)
-
-        if missing_prereqs.exists():
-            missing_titles = ", ".join([p.title for p in missing_prereqs])
-            message = (
-                f"Oops! You must complete all prerequisites for {course.name} at least 119 days before enrolling. "
-                f"Missing or too recent: {missing_titles}."
-            )
-            courses = Course.objects.all()
-            enrollments = Enrollment.objects.filter(student=student)
-            return render(request, 'course_catalog.html', {
-                'message': message,
-                'courses': courses,
-                'enrollments': enrollments
-            })
-
-        # Seat limit check
-        current_enrollment_count = course.enrollments.count()
-        if current_enrollment_count >= course.seat_limit:
-            if course.waitlist_enabled:
-                already_waitlisted = WaitlistEntry.objects.filter(student=student, course=course).exists()
-                if not already_waitlisted:
-                    WaitlistEntry.objects.create(student=student, course=course)
-                    message = f"{course.name} is full. You have been added to the waitlist."
-                else:
-                    message = f"You are already on the waitlist for {course.name}."
-            else:
-                message = f"{course.name} is full, and this course does not support waitlisting."
-
-            courses = Course.objects.all()
-            enrollments = Enrollment.objects.filter(student=student)
-            return render(request, 'course_catalog.html', {
-                'message': message,
-                'courses': courses,
-                'enrollments': enrollments
-            })
-
-        # All checks passed — enroll the student
-        Enrollment.objects.create(
-            student=student,
-            course=course,
-            date_enrolled=date.today()
-        )
-        message = f"🎉 You have successfully enrolled in {course.name}!"
+            return render_catalog(request, student, message)
 
-        courses = Course.objects.all()
-        enrollments = Enrollment.objects.filter(student=student)
-        return render(request, 'course_catalog.html', {
-            'message': message,
-            'courses': courses,
-            'enrollments': enrollments
-        })
+        # Duplicate, prerequisite (enrolled 119+ days), seat and waitlist checks
+        admission = admit(student, course)
+        return render_catalog(request, student, admission_message(admission, course))
 
 class SignupView(View):
     def get(self, request):
@@ -890,54 +780,195 @@ class SignupView(View):
             return redirect('admin_dashboard')
 
 class GradeEntryView(View):
+    @role_required('instructor')
     def get(self, request, course_id):
-        course      = Course.objects.get(id=course_id)
-        enrollments = Enrollment.objects.filter(course=course)
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
         return render(request, 'grade_entry.html', {
             'course': course,
-            'enrollments': enrollments
+            'enrollments': roster(course),
         })
 
+    @role_required('instructor')
     def post(self, request, course_id):
-        eid = request.POST['enrollment_id']
-        g, _ = Grade.objects.update_or_create(
-            enrollment=Enrollment.objects.get(id=eid),
-            assignment_name=request.POST['assignment'],
-            defaults={
-                'score': request.POST['score'],
-                'feedback': request.POST.get('feedback','')
-            }
-        )
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
+        enrollment_id = request.POST.get('enrollment_id', '')
+        if not enrollment_id.isdigit():
+            message = 'Choose a student from the roster.'
+        else:
+            result = save_grades(course, [Cell(None, int(enrollment_id), None,
+                                               request.POST.get('assignment'), request.POST.get('score'),
+                                               request.POST.get('feedback', ''))])
+            message = result.errors[0].message if result.errors else None
+        if message:
+            return render(request, 'grade_entry.html', {
+                'course': course,
+                'enrollments': roster(course),
+                'message': message,
+            })
         return redirect('grade-entry', course_id=course_id)
 
 
+class GradebookView(View):
+    # one assignment for the whole class at a time, e.g. /course/3/gradebook/?assignment=Midterm
+    @role_required('instructor')
+    def get(self, request, course_id):
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
+        return render(request, 'gradebook.html', self.context(course, request.GET.get('assignment', '').strip()))
+
+    @role_required('instructor')
+    def post(self, request, course_id):
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
+        assignment = request.POST.get('assignment', '').strip()
+        upload = request.FILES.get('csv_file')
+        message = None
+        if upload is not None:
+            cells = csv_cells(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''), assignment)
+        else:
+            cells = form_cells(request.POST, assignment)
+        try:
+            result = save_grades(course, cells)
+        except (ValueError, UnicodeDecodeError) as exc:
+            result, message = None, str(exc)
+        context = self.context(course, assignment)
+        context.update(result=result, message=message)
+        return render(request, 'gradebook.html', context)
+
+    def context(self, course, assignment):
+        return {
+            'course': course,
+            'assignment': assignment,
+            'assignments': assignments(course),
+            'rows': assignment_column(course, assignment) if assignment else [],
+        }
+
+
+class GradingSchemeView(View):
+    # the course's categories, weights and assignment categories, with every student's running score
+    @role_required('instructor')
+    def get(self, request, course_id):
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
+        return render(request, 'grading_scheme.html', self.context(course))
+
+    @role_required('instructor')
+    def post(self, request, course_id):
+        course = get_object_or_404(Course, id=course_id, instructor=request.current_user)
+        if request.POST.get('action') == 'post':
+            posted = post_final_grades(course)
+            return render(request, 'grading_scheme.html',
+                          self.context(course, notes=[f"Posted {posted} final grade(s)."]))
+
+        deleted = set(request.POST.getlist('delete'))
+        categories = [(int(category_id) if category_id.isdigit() else None, name, weight, category_id in deleted)
+                      for category_id, name, weight in zip(request.POST.getlist('category_id'),
+                                                           request.POST.getlist('category_name'),
+                                                           request.POST.getlist('category_weight'))]
+        mapping = {name: int(category_id) if category_id.isdigit() else None
+                   for name, category_id in zip(request.POST.getlist('assignment_name'),
+                                                request.POST.getlist('assignment_category'))}
+        problems = save_scheme(course, categories, mapping)
+        return render(request, 'grading_scheme.html',
+                      self.context(course, notes=problems or ["Grading scheme saved and scores recomputed."]))
+
+    def context(self, course, notes=()):
+        categories, assignment_rows = scheme_rows(course)
+        return {
+            'course': course,
+            'categories': categories,
+            'assignment_rows': assignment_rows,
+            'enrollments': roster(course),
+            'notes': notes,
+        }
+
+
 class OfficeHourSlotCreateView(View):
+    @role_required('instructor')
     def get(self, request):
         return render(request, 'slot_form.html')
 
+    @role_required('instructor')
     def post(self, request):
-        instructor = MyUser.objects.get(id=request.session['user_id'])
-        OfficeHourSlot.objects.create(
-            instructor=instructor,
-            start_time=request.POST['start_time'],
-            end_time=request.POST['end_time']
-        )
+        try:
+            start = parse_datetime(request.POST.get('start_time', ''))
+            end = parse_datetime(request.POST.get('end_time', ''))
+        except ValueError:  # well formed but impossible, e.g. February 30
+            start = end = None
+        capacity = request.POST.get('capacity', '1')
+        if start is None or end is None:
+            return render(request, 'slot_form.html', {'message': "Enter a start and end time."})
+        # datetime-local inputs carry no offset; read them in the site's time zone
+        start, end = [timezone.make_aware(t) if timezone.is_naive(t) else t for t in (start, end)]
+        if end <= start:
+            return render(request, 'slot_form.html', {'message': "The slot must end after it starts."})
+        if not capacity.isdigit() or int(capacity) < 1:
+            return render(request, 'slot_form.html', {'message': "Capacity must be a whole number of one or more."})
+
+        slot, conflicts = create_slot(request.current_user, start, end, int(capacity))
+        if slot is None:
+            overlaps = ", ".join(f"{c.start_time:%b %d %H:%M}-{c.end_time:%H:%M}" for c in conflicts)
+            return render(request, 'slot_form.html', {'message': f"That overlaps your office hours on {overlaps}."})
         return redirect('office-hours')
 
 
+class RecurringOfficeHoursView(View):
+    # e.g. "TTh 2-4pm" from the first to the last day of term, in 15-minute slots, skipping holidays
+    @role_required('instructor')
+    def post(self, request):
+        blocks = parse_meeting_times(request.POST.get('schedule', ''))
+        first_day = _parse_report_date(request.POST.get('first_day'))
+        last_day = _parse_report_date(request.POST.get('last_day'))
+        slot_minutes = request.POST.get('slot_minutes', str(SLOT_MINUTES))
+        capacity = request.POST.get('capacity', '1')
+        skip_text = re.split(r'[\s,;]+', request.POST.get('skip_dates', '').strip())
+        skip_dates = [_parse_report_date(text) for text in skip_text if text]
+
+        message = None
+        if not blocks:
+            message = "Enter the days and times, e.g. TTh 2-4pm."
+        elif first_day is None or last_day is None or last_day < first_day:
+            message = "Enter a first and last day, the last on or after the first."
+        elif None in skip_dates:
+            message = "Dates to skip must be YYYY-MM-DD."
+        elif not slot_minutes.isdigit() or int(slot_minutes) < 1:
+            message = "Slot length must be a whole number of minutes."
+        elif not capacity.isdigit() or int(capacity) < 1:
+            message = "Capacity must be a whole number of one or more."
+        if message:
+            return render(request, 'slot_form.html', {'message': message})
+        try:
+            times = expand_recurrence(blocks, first_day, last_day, int(slot_minutes), skip_dates)
+        except ValueError as exc:
+            return render(request, 'slot_form.html', {'message': str(exc)})
+
+        result = create_recurring_slots(request.current_user, times, int(capacity))
+        message = f"Published {len(result.created)} slot(s)."
+        if result.skipped:
+            message += f" Skipped {len(result.skipped)} that overlap office hours you already have."
+        return render(request, 'slot_form.html', {'message': message})
+
+
 class OfficeHourListView(View):
+    # one week of slots at a time, e.g. /office-hours/?start=2025-09-01
+    @role_required('instructor')
     def get(self, request):
-        slots = OfficeHourSlot.objects.filter(
-            instructor__id=request.session['user_id']
-        )
-        return render(request, 'office_hours.html', {'slots': slots})
+        start = _parse_report_date(request.GET.get('start')) or timezone.localdate()
+        slots = slot_window(request.current_user, start)
+        return render(request, 'office_hours.html', {
+            'slots': slots,
+            'start': start,
+            'end': start + timedelta(days=WINDOW_DAYS - 1),
+            'previous': start - timedelta(days=WINDOW_DAYS),
+            'next': start + timedelta(days=WINDOW_DAYS),
+        })
 
 
 class BookOfficeHourSlotView(View):
+    @role_required('student')
     def post(self, request, slot_id):
-        student = MyUser.objects.get(id=request.session['user_id'])
-        OfficeHourBooking.objects.create(
-            slot=OfficeHourSlot.objects.get(id=slot_id),
-            student=student
-        )
+        slot = get_object_or_404(OfficeHourSlot, id=slot_id)
+        booking = book_slot(request.current_user, slot)
+        if booking.status != BOOKED:
+            return render(request, 'office_hour_booking.html', {
+                'slot': slot,
+                'message': booking_message(booking, slot),
+            })
         return redirect('student')
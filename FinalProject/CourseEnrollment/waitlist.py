@@ -0,0 +1,139 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .admission import current_term_start
+from .models import Course, Enrollment, MeetingBlock, WaitlistEntry
+from .schedule import overlapping
+from .seats import drop_enrollments, remove_from_waitlist
+from .stats import record_enrollments
+
+# How many waitlist entries to examine per round when filling seats; skipped
+# (ineligible) students mean we may need more than one round.
+SCAN_BATCH = 200
+
+
+def with_positions(entries):
+    """
+    Annotate WaitlistEntry rows with their 1-based `position` in their
+    course's FIFO queue (timestamp, then id for ties). The position is a
+    correlated COUNT served by the (course, timestamp) index, so any number
+    of entries is answered in one query.
+    """
+    ahead = (
+        WaitlistEntry.objects
+        .filter(course=OuterRef('course'))
+        .filter(Q(timestamp__lt=OuterRef('timestamp')) | Q(timestamp=OuterRef('timestamp'), id__lt=OuterRef('id')))
+        .order_by()
+        .values('course')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return entries.annotate(position=Coalesce(Subquery(ahead), Value(0)) + 1)
+
+
+def student_waitlist(student):
+    """All of the student's waitlist entries with course and position, in one query."""
+    return with_positions(WaitlistEntry.objects.filter(student=student)) \
+        .select_related('course').order_by('timestamp', 'id')
+
+
+def promote_from_waitlist(course):
+    """
+    Fill every free seat in `course` from its waitlist, first come first
+    served, and return the new Enrollments.
+
+    Students who are already enrolled have their stale entry removed.
+    Students missing a prerequisite or with a timetable clash are skipped
+    and keep their place. Eligibility is checked for a whole batch of
+    entries at once and the seats are taken with one counter update, so
+    raising a seat limit by 50 costs a handful of queries, not 50 admits.
+    """
+    with transaction.atomic():
+        # lock the course row so concurrent drops/admits see our counter
+        course = Course.objects.select_for_update().get(id=course.id)
+        free = course.seat_limit - course.enrolled_count
+        if free <= 0:
+            return []
+
+        prerequisite_ids = set(course.prerequisites.values_list('id', flat=True))
+        blocks = list(course.meeting_blocks.all())
+        since = current_term_start()
+
+        promoted_entries, stale_ids = [], []
+        last = None
+        while len(promoted_entries) < free:
+            batch = WaitlistEntry.objects.filter(course=course).order_by('timestamp', 'id')
+            if last is not None:
+                batch = batch.filter(Q(timestamp__gt=last.timestamp) | Q(timestamp=last.timestamp, id__gt=last.id))
+            batch = list(batch[:SCAN_BATCH])
+            if not batch:
+                break
+            last = batch[-1]
+
+            student_ids = [entry.student_id for entry in batch]
+            enrolled = set(Enrollment.objects.filter(course=course, student_id__in=student_ids)
+                           .values_list('student_id', flat=True))
+            blocked = _missing_prerequisites(student_ids, prerequisite_ids) | _clashing(student_ids, course, blocks, since)
+            for entry in batch:
+                if entry.student_id in enrolled:
+                    stale_ids.append(entry.id)
+                elif entry.student_id not in blocked and len(promoted_entries) < free:
+                    promoted_entries.append(entry)
+
+        if promoted_entries:
+            Course.objects.filter(id=course.id).update(enrolled_count=F('enrolled_count') + len(promoted_entries))
+        enrollments = Enrollment.objects.bulk_create([
+            Enrollment(student_id=entry.student_id, course=course, date_enrolled=date.today())
+            for entry in promoted_entries
+        ])
+        # bulk_create sends no signals, so count the new enrollments here
+        record_enrollments(enrollments, instructors={course.id: course.instructor_id})
+        remove_from_waitlist(WaitlistEntry.objects.filter(id__in=stale_ids + [e.id for e in promoted_entries]))
+    return enrollments
+
+
+def promote_courses(course_ids):
+    """Run promote_from_waitlist for each course; returns all new Enrollments."""
+    promoted = []
+    for course in Course.objects.filter(id__in=set(course_ids)).order_by('id'):
+        promoted.extend(promote_from_waitlist(course))
+    return promoted
+
+
+def drop_and_promote(enrollments):
+    """Drop the given Enrollment queryset and hand the freed seats to the waitlists."""
+    with transaction.atomic():
+        course_ids = list(enrollments.values_list('course_id', flat=True))
+        drop_enrollments(enrollments)
+        return promote_courses(course_ids)
+
+
+def _missing_prerequisites(student_ids, prerequisite_ids):
+    """Students among `student_ids` who haven't completed all of `prerequisite_ids`."""
+    if not prerequisite_ids:
+        return set()
+    completed = (
+        Enrollment.objects
+        .filter(student_id__in=student_ids, course_id__in=prerequisite_ids, date_enrolled__lte=current_term_start())
+        .order_by()
+        .values('student_id')
+        .annotate(done=Count('course_id', distinct=True))
+        .filter(done=len(prerequisite_ids))
+        .values_list('student_id', flat=True)
+    )
+    return set(student_ids) - set(completed)
+
+
+def _clashing(student_ids, course, blocks, since):
+    """Students among `student_ids` taking a current course that meets at the same time as `course`."""
+    if not blocks:
+        return set()
+    clashing_courses = MeetingBlock.objects.filter(overlapping(blocks)).exclude(course_id=course.id).values('course_id')
+    return set(
+        Enrollment.objects
+        .filter(student_id__in=student_ids, date_enrolled__gte=since, course_id__in=clashing_courses)
+        .values_list('student_id', flat=True)
+    )
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'CourseEnrollment.current_user.CurrentUserMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -77,9 +78,41 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Take the write lock when a transaction starts and wait for it instead
+        # of failing with "database is locked" when enrollments arrive together.
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # An on-disk test database so the concurrency tests can use real
+        # connections from several threads.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The logged-in user is cached between requests (CourseEnrollment/current_user.py)
+# and dropped from the cache when an account changes, so every worker process
+# must share one cache; the default per-process cache would keep serving the
+# old account in the other workers. Files work for any number of workers on
+# this host, which is all a SQLite deployment can have. Running on several
+# hosts needs a networked cache here instead, e.g. Redis (pip install redis):
+#     'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#     'LOCATION': 'redis://127.0.0.1:6379',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# manage.py test swaps in a per-process cache (CourseEnrollment/tests/runner.py)
+TEST_RUNNER = 'CourseEnrollment.tests.runner.LocalCacheTestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,3 +157,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email backend for testing and development
 EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Course emails are sent from a worker thread after the request returns (see
+# CourseEnrollment/mailer.py); set this to False to send them inside the request.
+EMAIL_IN_BACKGROUND = True